@@ -0,0 +1,282 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session, SQLModel, select
+
+from app.broker import IdCursor
+from app.db import AnalyticsState, TradeEvent
+
+# event types that change the position
+_OPENING = {"entry", "grid_fill"}
+_CLOSING = {"tp_fill", "sl", "close"}
+_EPS = 1e-12
+# events read per query while catching up
+SYNC_PAGE = int(os.getenv("ANALYTICS_SYNC_PAGE", "5000"))
+# how long an id skipped by the cursor is re-read (transactions that commit late)
+HOLE_TTL = float(os.getenv("ANALYTICS_HOLE_TTL", "60"))
+_STATE_NAME = "analytics"
+
+
+def _ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class DealStats:
+    """Running state of one deal (entry ... last close), updated per fill."""
+
+    def __init__(self, key: str, symbol: str, side: str, opened_at: Optional[datetime]):
+        self.key = key
+        self.symbol = symbol
+        self.side = side
+        self.opened_at = opened_at
+        self.closed_at: Optional[datetime] = None
+        self.qty = 0.0              # open position
+        self.avg_price = 0.0        # average entry price of the open position
+        self.bought_qty = 0.0       # total opened qty
+        self.bought_notional = 0.0  # total opened notional (for avg fill price over the deal)
+        self.realized_pnl = 0.0
+        self.fills = 0
+        self.grid_fills = 0
+        self.tp_fills = 0
+        self.last_price: Optional[float] = None
+
+    @property
+    def direction(self) -> int:
+        return 1 if self.side == "long" else -1
+
+    def open(self, price: float, qty: float):
+        total = self.qty + qty
+        self.avg_price = (self.avg_price * self.qty + price * qty) / total if total > _EPS else price
+        self.qty = total
+        self.bought_qty += qty
+        self.bought_notional += price * qty
+
+    def close(self, price: float, qty: float) -> float:
+        qty = min(qty, self.qty)
+        pnl = (price - self.avg_price) * qty * self.direction
+        self.realized_pnl += pnl
+        self.qty -= qty
+        return pnl
+
+    def unrealized(self, mark: Optional[float]) -> float:
+        if mark is None or self.qty <= _EPS:
+            return 0.0
+        return (mark - self.avg_price) * self.qty * self.direction
+
+    def as_dict(self, mark: Optional[float] = None) -> Dict[str, Any]:
+        mark = mark if mark is not None else self.last_price
+        return {
+            "deal": self.key,
+            "symbol": self.symbol,
+            "side": self.side,
+            "status": "closed" if self.closed_at else "open",
+            "opened_at": self.opened_at.isoformat() if self.opened_at else None,
+            "closed_at": self.closed_at.isoformat() if self.closed_at else None,
+            "position_qty": self.qty,
+            "avg_price": self.avg_price,
+            "avg_fill_price": self.bought_notional / self.bought_qty if self.bought_qty else None,
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized(mark),
+            "fills": self.fills,
+            "grid_fills": self.grid_fills,
+            "tp_fills": self.tp_fills,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        data = dict(vars(self))
+        data["opened_at"] = self.opened_at.isoformat() if self.opened_at else None
+        data["closed_at"] = self.closed_at.isoformat() if self.closed_at else None
+        return data
+
+    @classmethod
+    def from_state(cls, data: Dict[str, Any]) -> "DealStats":
+        deal = cls(data["key"], data["symbol"], data["side"], None)
+        vars(deal).update(data)
+        deal.opened_at, deal.closed_at = _ts(data.get("opened_at")), _ts(data.get("closed_at"))
+        return deal
+
+
+class SymbolStats:
+    """Aggregates over all deals on a symbol: win rate and drawdown of realized equity."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.deals = 0
+        self.closed = 0
+        self.wins = 0
+        self.realized_pnl = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.last_deal: Optional[str] = None
+
+    def on_realized(self, pnl: float):
+        self.realized_pnl += pnl
+        self.peak = max(self.peak, self.realized_pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.realized_pnl)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "deals": self.deals,
+            "closed_deals": self.closed,
+            "wins": self.wins,
+            "win_rate": self.wins / self.closed if self.closed else None,
+            "realized_pnl": self.realized_pnl,
+            "max_drawdown": self.max_drawdown,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_state(cls, data: Dict[str, Any]) -> "SymbolStats":
+        sym = cls(data["symbol"])
+        vars(sym).update(data)
+        return sym
+
+
+class Analytics:
+    """
+    Incremental per-deal / per-symbol PnL statistics over TradeEvent.
+
+    Each event is applied once in O(1); `sync` only reads events past an IdCursor
+    (primary-key range scan, SYNC_PAGE rows per query, ids committed late are
+    picked up from the cursor's holes), so the cost of /stats does not grow with
+    the size of the history. The aggregates and the cursor are stored in the
+    AnalyticsState table, so a restart resumes from the snapshot instead of
+    re-reading every event. Only open deals and the last deal of each symbol are
+    kept; any number of deals can be open on a symbol at once.
+    """
+
+    def __init__(self):
+        self.deals: Dict[str, DealStats] = {}
+        self.symbols: Dict[str, SymbolStats] = {}
+        self._open: Dict[str, str] = {}     # key of an open deal -> its symbol
+        self.cursor = IdCursor(hole_ttl=HOLE_TTL)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def last_id(self) -> int:
+        return self.cursor.last_id
+
+    def _deal_key(self, ev: Dict[str, Any]) -> str:
+        # events written before deal_id existed fall back to "<symbol>#<n>"
+        return ev.get("deal_id") or f"{ev['symbol']}#{self.symbols[ev['symbol']].deals}"
+
+    def apply(self, ev: Dict[str, Any]):
+        """Apply one event (TradeEvent as dict)."""
+        etype, symbol = ev.get("type"), ev.get("symbol")
+        price, qty = ev.get("price"), ev.get("qty")
+        if not symbol:
+            return
+        sym = self.symbols.setdefault(symbol, SymbolStats(symbol))
+
+        if etype == "entry":
+            sym.deals += 1
+            key = self._deal_key(ev)
+            self.deals[key] = DealStats(key, symbol, ev.get("side") or "long", ev.get("ts"))
+            self._open[key] = symbol
+            prev = self.deals.get(sym.last_deal or "")
+            if prev is not None and prev.closed_at is not None and prev.key != key:
+                self.deals.pop(prev.key, None)
+            sym.last_deal = key
+
+        # events without deal_id belong to the symbol's latest deal
+        deal = self.deals.get(ev.get("deal_id") or sym.last_deal or "")
+        if deal is None or price is None:
+            return
+        deal.last_price = price
+        if qty is None or etype not in _OPENING | _CLOSING:
+            return
+
+        deal.fills += 1
+        if etype in _OPENING:
+            deal.open(price, qty)
+            if etype == "grid_fill":
+                deal.grid_fills += 1
+            return
+
+        if etype == "tp_fill":
+            deal.tp_fills += 1
+        sym.on_realized(deal.close(price, qty))
+        if etype in ("sl", "close") or deal.qty <= _EPS:
+            deal.closed_at = ev.get("ts")
+            sym.closed += 1
+            if deal.realized_pnl > 0:
+                sym.wins += 1
+            self._open.pop(deal.key, None)
+            if deal.key != sym.last_deal:
+                self.deals.pop(deal.key, None)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "deals": [d.state() for d in self.deals.values()],
+            "symbols": [s.state() for s in self.symbols.values()],
+            "open": self._open,
+            "holes": sorted(self.cursor.holes),
+        }
+
+    def load_state(self, data: Dict[str, Any], last_id: int):
+        self.deals = {d.key: d for d in map(DealStats.from_state, data.get("deals", []))}
+        self.symbols = {s.symbol: s for s in map(SymbolStats.from_state, data.get("symbols", []))}
+        self._open = dict(data.get("open", {}))
+        self.cursor.restore(last_id, data.get("holes", []))
+
+    def _load(self, session: Session):
+        saved = session.get(AnalyticsState, _STATE_NAME)
+        if saved is not None and saved.last_id > self.last_id:
+            self.load_state(json.loads(saved.data), saved.last_id)
+        self._loaded = True
+
+    def _save(self, session: Session):
+        saved = session.get(AnalyticsState, _STATE_NAME)
+        if saved is not None and saved.last_id > self.last_id:
+            return  # another worker already stored a newer snapshot
+        saved = saved or AnalyticsState(name=_STATE_NAME)
+        saved.last_id = self.last_id
+        saved.data = json.dumps(self.state())
+        session.add(saved)
+        session.commit()
+
+    def sync(self, engine) -> int:
+        """Apply events stored since the last sync page by page; returns how many were applied."""
+        applied = 0
+        with self._lock, Session(engine) as session:
+            if not self._loaded:
+                SQLModel.metadata.create_all(engine, tables=[AnalyticsState.__table__])
+                self._load(session)
+            while True:
+                rows: List[TradeEvent] = session.exec(
+                    select(TradeEvent).where(self.cursor.condition(TradeEvent.id))
+                    .order_by(TradeEvent.id).limit(SYNC_PAGE)
+                ).all()
+                fresh = self.cursor.accept(rows, key=lambda r: r.id)
+                for r in fresh:
+                    self.apply(r.model_dump())
+                applied += len(fresh)
+                if len(rows) < SYNC_PAGE:
+                    break
+            if applied:
+                self._save(session)
+        return applied
+
+    def summary(self, symbol: Optional[str] = None, mark: Optional[float] = None) -> Dict[str, Any]:
+        symbols = [s for s in self.symbols.values() if symbol is None or s.symbol == symbol]
+        open_deals = [self.deals[k] for k, s in self._open.items() if symbol is None or s == symbol]
+        last_closed = [
+            d for d in (self.deals.get(s.last_deal or "") for s in symbols)
+            if d is not None and d.closed_at is not None
+        ]
+        return {
+            "symbols": [s.as_dict() for s in symbols],
+            "open_deals": [d.as_dict(mark if symbol else None) for d in open_deals],
+            "last_closed": [d.as_dict() for d in last_closed],
+            "events_seen": self.last_id,
+        }
+
+
+analytics = Analytics()
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import os
-from datetime import datetime
-from typing import Optional, List, Literal
+import secrets
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional, List, Literal, Tuple
 
 # Load .env early so ccxt client and other components see env vars.
 from dotenv import load_dotenv
 load_dotenv()
 
+import numpy as np
 from fastapi import (
+    Depends,
     FastAPI,
+    Header,
+    Request,
     WebSocket,
     WebSocketDisconnect,
     Query,
@@ -17,18 +26,25 @@ from fastapi import (
 )
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 from sqlmodel import Session, select
 
-from app.event_bus import bus
+from app.analytics import analytics
+from app.archive import CANDLE_DTYPE, archive as market_archive, timeframe_ms
+from app.event_bus import SubscriberOverflow, bus
+from app import stream as ev_stream
 from app.db import init_db, TradeEvent, engine as db_engine
-from app.exchanges.ccxt_client import CcxtClient
+from app.downsample import bucket_markers, bucket_ms, lttb, ohlc_buckets
+from app.exchanges.ccxt_client import shared_client
+from app.flatten import flatten_all
+from app.models import DealConfig, FlattenRequest
+from app.export import MEDIA_TYPES, iter_event_chunks, stream_csv, stream_ndjson, stream_parquet
 
-# Optional: engine import (not required for API itself).
+# Optional: deal runner (not required for API itself).
 try:
-    from app.engine import Engine  # noqa: F401
+    from app.runner import DealExists, runner
     _ENGINE_AVAILABLE = True
 except Exception:
     _ENGINE_AVAILABLE = False
@@ -38,13 +54,26 @@ except Exception:
 # FastAPI application
 # ---------------------------------------------------------------------------
 
-app = FastAPI(title="Crypto Engine Monitor", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # EVENT_BROKER=db|redis://...: events published by any worker / engine process reach every worker
+    await bus.start()
+    yield
+    if _ENGINE_AVAILABLE:
+        # deals run inside this process: stop them before the workers go away
+        await asyncio.to_thread(runner.shutdown)
+    await bus.stop()
+
+
+app = FastAPI(title="Crypto Engine Monitor", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS if the UI may be opened from another origin.
+_CORS_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "*").split(",")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=os.getenv("CORS_ALLOW_ORIGINS", "*").split(","),
-    allow_credentials=True,
+    allow_origins=_CORS_ORIGINS,
+    # no cookies / credentials for any origin ("*"); trading endpoints use X-API-Token
+    allow_credentials="*" not in _CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -52,8 +81,18 @@ app.add_middleware(
 # Initialize DB (SQLite by default).
 init_db()
 
-# Global exchange client used by monitoring endpoints.
-ex = CcxtClient()
+# Global exchange client used by monitoring endpoints (shared pooled session).
+ex = shared_client()
+
+# Market data cached through the bus broker: shared between workers with a
+# shared broker (EVENT_BROKER=redis://...), per process otherwise.
+TICKER_TTL = float(os.getenv("TICKER_CACHE_TTL", "1"))
+OHLCV_TTL = float(os.getenv("OHLCV_CACHE_TTL", "2"))
+
+# range queries on /ohlcv: most base candles read per request / exchange pages to fill a gap
+OHLCV_MAX_BASE = int(os.getenv("OHLCV_MAX_BASE_CANDLES", "200000"))
+OHLCV_MAX_PAGES = int(os.getenv("OHLCV_MAX_PAGES", "50"))
+
 
 # Serve static UI files (monitor.html, JS, CSS).
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -63,6 +102,123 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _ohlcv_rows(symbol: str, timeframe: str, limit: int) -> list:
+    """
+    Archive-first candle fetch: the exchange is asked only for what the archive lacks.
+    Candles are archived only when they continue the archived series (no gaps).
+    """
+    tf = timeframe_ms(timeframe)
+    now = int(time.time() * 1000)
+    cached = market_archive.tail(symbol, timeframe, limit)
+    last = int(cached["ts"][-1]) if len(cached) else None
+
+    if last is not None and (now - last) // tf <= OHLCV_MAX_PAGES * 1000:
+        # catch up from the archived tail, page by page (usually one request)
+        fresh, _ = _fetch_pages(symbol, timeframe, last + tf, now + 1)
+        market_archive.append_candles(symbol, timeframe, [r for r in fresh if r[0] + tf <= now])
+        rows = cached.tolist() + fresh
+        if len(rows) >= limit:
+            return rows[-limit:]
+
+    # no archive, a short one or one too far behind: plain fetch of the latest candles,
+    # archived only when it starts the series
+    fresh = ex.client.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+    if last is None:
+        market_archive.append_candles(symbol, timeframe, [r for r in fresh if r[0] + tf <= now])
+    return fresh[-limit:]
+
+
+def _fetch_pages(
+    symbol: str, timeframe: str, start_ms: int, end_ms: int, max_pages: Optional[int] = None
+) -> Tuple[list, int]:
+    """
+    Candles in [start_ms, end_ms) from the exchange, 1000 per request, at most `max_pages`
+    (default OHLCV_MAX_PAGES) requests. Returns (rows, requests made).
+    """
+    tf = timeframe_ms(timeframe)
+    rows: list = []
+    since = start_ms
+    made = 0
+    for _ in range(OHLCV_MAX_PAGES if max_pages is None else max_pages):
+        made += 1
+        page = ex.client.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=1000)
+        page = [r for r in page if since <= r[0] < end_ms]
+        if not page:
+            break
+        rows += page
+        since = page[-1][0] + tf
+        if since >= end_ms:
+            break
+    return rows, made
+
+
+def _gaps(ts: np.ndarray, tf: int) -> List[List[int]]:
+    """Missing stretches between consecutive candles: [[from_ms, to_ms), ...]."""
+    idx = np.flatnonzero(np.diff(ts) > tf)
+    return [[int(ts[i]) + tf, int(ts[i + 1])] for i in idx]
+
+
+def _ohlcv_range(symbol: str, timeframe: str, start_ms: int, end_ms: int) -> np.ndarray:
+    """
+    Base candles for [start_ms, end_ms) as a CANDLE_DTYPE array: archive first, the
+    exchange for a missing head / tail (incl. the live candle), then for holes inside
+    the archived range while OHLCV_MAX_PAGES requests last. Newly closed candles at
+    the archive tail are archived; holes can't be (append-only) and are fetched again.
+    """
+    tf = timeframe_ms(timeframe)
+    now = int(time.time() * 1000)
+    to_arr = lambda rows: np.array([tuple(r[:6]) for r in rows], dtype=CANDLE_DTYPE)  # noqa: E731
+    cached = market_archive.read_range(symbol, timeframe, start_ms, end_ms)
+    if not len(cached):
+        tail, _ = _fetch_pages(symbol, timeframe, start_ms, end_ms)
+        closed = [r for r in tail if r[0] + tf <= now]
+        # archived only when it starts the series or continues it without a gap
+        archived = market_archive.last_ts(symbol, timeframe)
+        if closed and (archived is None or closed[0][0] == archived + tf):
+            market_archive.append_candles(symbol, timeframe, closed)
+        return to_arr(tail)
+
+    budget = OHLCV_MAX_PAGES
+    parts = [cached]
+    first, last = int(cached["ts"][0]), int(cached["ts"][-1])
+    if end_ms - last > tf and last + tf <= now:
+        tail, made = _fetch_pages(symbol, timeframe, last + tf, end_ms, budget)
+        budget -= made
+        market_archive.append_candles(symbol, timeframe, [r for r in tail if r[0] + tf <= now])
+        parts.append(to_arr(tail))
+    if first - start_ms >= tf and budget > 0:
+        head, made = _fetch_pages(symbol, timeframe, start_ms, first, budget)
+        budget -= made
+        parts.append(to_arr(head))
+    for lo, hi in _gaps(cached["ts"], tf):
+        if budget <= 0:
+            break
+        hole, made = _fetch_pages(symbol, timeframe, lo, hi, budget)
+        budget -= made
+        parts.append(to_arr(hole))
+    if len(parts) == 1:
+        return cached
+    out = np.concatenate(parts)
+    return out[np.argsort(out["ts"], kind="stable")]
+
+
+def _range_markers(symbol: str, deal_id: Optional[str], start_ms: int, end_ms: int) -> list:
+    """Events of a range as plain dicts (ts in seconds) for bucket_markers."""
+    start = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
+    end = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc)
+    with Session(db_engine) as session:
+        stmt = select(TradeEvent.ts, TradeEvent.type, TradeEvent.price, TradeEvent.qty).where(
+            TradeEvent.ts >= start, TradeEvent.ts < end
+        )
+        stmt = stmt.where(TradeEvent.deal_id == deal_id) if deal_id else stmt.where(TradeEvent.symbol == symbol)
+        rows = session.exec(stmt.order_by(TradeEvent.ts)).all()
+    return [
+        {"ts": (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp(), "type": typ, "price": price,
+         "qty": qty}
+        for ts, typ, price, qty in rows
+    ]
+
+
 def _serialize_event(ev: TradeEvent) -> dict:
     """Convert SQLModel TradeEvent to a JSON-serializable dict."""
     data = ev.model_dump()  # SQLModel with Pydantic v2
@@ -95,15 +251,99 @@ def status(symbol: str = Query("BTC/USDT:USDT", description="Trading symbol")):
     except Exception as e:
         orders = {"error": str(e)}
 
-    return {"symbol": symbol, "positions": positions, "orders": orders}
+    guard = getattr(ex, "guard", None)
+    return {
+        "symbol": symbol,
+        "positions": positions,
+        "orders": orders,
+        # open circuit breakers / remaining retry budget of the exchange client
+        "exchange": guard.snapshot() if guard else None,
+    }
+
+
+def require_token(x_api_token: Optional[str] = Header(None, description="API_TOKEN of the server")):
+    """Endpoints that trade (kill-switch, deals): X-API-Token must match API_TOKEN; refused while it is unset."""
+    expected = os.getenv("API_TOKEN", "")
+    if not expected:
+        raise HTTPException(status_code=503, detail="Trading endpoints are disabled: API_TOKEN is not set")
+    if not x_api_token or not secrets.compare_digest(x_api_token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-API-Token")
+
+
+def require_json(request: Request):
+    """JSON bodies only: a plain HTML form or a no-preflight cross-site request can't reach the endpoint."""
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype != "application/json":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/json")
+
+
+@app.post("/flatten", dependencies=[Depends(require_token), Depends(require_json)])
+def flatten(req: FlattenRequest):
+    """
+    Kill-switch: cancel every open order and market-close every position on all venues, concurrently.
+    Body: {"confirm": true, "retries": 2}.
+    """
+    if not req.confirm:
+        raise HTTPException(status_code=400, detail='Pass {"confirm": true} to flatten all positions')
+    # deals managed by this process would re-place grid / TP orders: stop them first
+    stopped = runner.stop_all(timeout=10) if _ENGINE_AVAILABLE else []
+    return {**flatten_all(retries=req.retries), "stopped_deals": [d["deal_id"] for d in stopped]}
+
+
+def _runner():
+    if not _ENGINE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Deal engine is not available in this process")
+    return runner
+
+
+@app.post("/deals", status_code=201, dependencies=[Depends(require_token)])
+def start_deal(cfg: DealConfig):
+    """Start a deal in this process (shared worker pool, warm exchange clients); returns its state."""
+    try:
+        return _runner().start(cfg).state()
+    except DealExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/deals")
+def list_deals(active: bool = Query(False, description="Only queued / running deals")):
+    """Deals started through this process with their live state (sl_price, best_price, tp_ids, ...)."""
+    return _runner().list(active_only=active)
+
+
+@app.get("/deals/{deal_id}")
+def get_deal(deal_id: str):
+    eng = _runner().get(deal_id)
+    if eng is None:
+        raise HTTPException(status_code=404, detail=f"Unknown deal {deal_id}")
+    return eng.state()
+
+
+@app.post("/deals/{deal_id}/stop", dependencies=[Depends(require_token)])
+def stop_deal(
+    deal_id: str,
+    close: bool = Query(False, description="Also cancel TPs and close the position at market"),
+    wait: float = Query(5.0, ge=0, le=60, description="Seconds to wait for the deal to wind down"),
+):
+    """Stop a deal: resting grid orders are cancelled (TPs + position too with close=true)."""
+    state = _runner().stop(deal_id, close=close, timeout=wait)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown deal {deal_id}")
+    return state
 
 
 @app.get("/ticker")
 def ticker(symbol: str = Query("BTC/USDT:USDT", description="Trading symbol")):
     """Return last traded price for a symbol."""
+    key = f"ticker:{symbol}"
+    cached = bus.broker.cache_get(key)
+    if cached is not None:
+        return cached
     try:
         t = ex.client.fetch_ticker(symbol)
-        return {"symbol": symbol, "last": t.get("last")}
+        out = {"symbol": symbol, "last": t.get("last")}
+        bus.broker.cache_set(key, out, TICKER_TTL)
+        return out
     except Exception as e:
         return {"error": str(e)}
 
@@ -111,27 +351,79 @@ def ticker(symbol: str = Query("BTC/USDT:USDT", description="Trading symbol")):
 @app.get("/ohlcv")
 def ohlcv(
     symbol: str = Query("BTC/USDT:USDT", description="Trading symbol"),
-    timeframe: str = Query("1m", description="Candle timeframe"),
-    limit: int = Query(200, ge=10, le=2000, description="Number of candles"),
+    timeframe: str = Query("1m", description="Base candle timeframe"),
+    limit: int = Query(200, ge=10, le=2000, description="Number of candles (without from/to)"),
+    start: Optional[int] = Query(None, alias="from", description="Range start, unix seconds"),
+    end: Optional[int] = Query(None, alias="to", description="Range end, unix seconds (default now)"),
+    points: Optional[int] = Query(None, ge=10, le=5000, description="Target number of points"),
+    method: Literal["ohlc", "lttb"] = Query("ohlc", description="Downsampling: OHLC buckets or LTTB on close"),
+    markers: bool = Query(False, description="Also return event markers aggregated per returned bar"),
+    deal_id: Optional[str] = Query(None, description="Markers of one deal only"),
 ):
     """
-    Return OHLCV candles via ccxt.
+    Return OHLCV candles: closed candles from the local archive, only the missing
+    head / tail / holes (incl. the live candle) via ccxt; newly closed candles are archived.
+    Stretches neither could provide are listed in `gaps` ([from, to) in seconds).
+    With from/to the range is read from the archive; with `points` the base series is
+    downsampled on the server (method=ohlc: time buckets of a whole number of base
+    candles; method=lttb: the candles that keep the close line's shape).
     Response items: {time (sec), open, high, low, close, volume}
     """
+    key = f"ohlcv:{symbol}:{timeframe}:{limit}:{start}:{end}:{points}:{method}:{markers}:{deal_id}"
+    cached = bus.broker.cache_get(key)
+    if cached is not None:
+        return cached
     try:
-        data = ex.client.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        tf = timeframe_ms(timeframe)
+        if start is not None:
+            start_ms = start * 1000
+            end_ms = (end * 1000) if end is not None else int(time.time() * 1000) + tf
+            if end_ms <= start_ms:
+                raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+            if (end_ms - start_ms) // tf > OHLCV_MAX_BASE:
+                raise HTTPException(
+                    status_code=400, detail=f"Range exceeds {OHLCV_MAX_BASE} {timeframe} candles; use a larger timeframe"
+                )
+            base = _ohlcv_range(symbol, timeframe, start_ms - start_ms % tf, end_ms)
+        else:
+            rows = _ohlcv_rows(symbol, timeframe, limit)
+            base = np.array([tuple(r[:6]) for r in rows], dtype=CANDLE_DTYPE)
+
+        bucket = tf
+        data = base
+        if points and len(base) > points:
+            if method == "lttb":
+                data = base[lttb(base["ts"], base["close"], points)]
+            else:
+                first, last = int(base["ts"][0]), int(base["ts"][-1])
+                bucket = bucket_ms(first, last + tf, points, tf)
+                data = ohlc_buckets(base, bucket)
         out = [
             {
-                "time": int(c[0] / 1000),  # ms -> sec (Lightweight Charts expects seconds)
-                "open": c[1],
-                "high": c[2],
-                "low": c[3],
-                "close": c[4],
-                "volume": c[5],
+                "time": int(c[0] // 1000),  # ms -> sec (Lightweight Charts expects seconds)
+                "open": float(c[1]),
+                "high": float(c[2]),
+                "low": float(c[3]),
+                "close": float(c[4]),
+                "volume": float(c[5]),
             }
-            for c in data
+            for c in data.tolist()
         ]
-        return {"symbol": symbol, "timeframe": timeframe, "candles": out}
+        res = {
+            "symbol": symbol, "timeframe": timeframe, "base_count": len(base),
+            "bucket_seconds": bucket // 1000 if method == "ohlc" else None, "candles": out,
+            # base candles the archive and the exchange could not provide: [[from, to), ...] in seconds
+            "gaps": [[lo // 1000, hi // 1000] for lo, hi in _gaps(base["ts"], tf)],
+        }
+        if markers and out:
+            times = np.array([c["time"] for c in out], dtype=float)
+            lo_ms = int(base["ts"][0])
+            hi_ms = int(base["ts"][-1]) + tf
+            res["markers"] = bucket_markers(_range_markers(symbol, deal_id, lo_ms, hi_ms), times)
+        bus.broker.cache_set(key, res, OHLCV_TTL)
+        return res
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -139,25 +431,65 @@ def ohlcv(
 @app.get("/events")
 def events(
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
-    type: Optional[Literal["entry", "grid", "tp", "sl", "sl_move_be"]] = Query(
+    type: Optional[Literal["entry", "grid", "tp", "sl", "sl_move_be", "grid_fill", "tp_fill", "close"]] = Query(
         None, description="Filter by event type"
     ),
+    deal_id: Optional[str] = Query(None, description="Filter by deal id"),
     limit: int = Query(200, ge=1, le=2000, description="Number of events to return"),
 ):
-    """Return latest trade events from local SQLite DB."""
+    """Return latest trade events; filters run in SQL on the (deal_id, ts) / (symbol, ts) indexes."""
     with Session(db_engine) as session:
-        stmt = select(TradeEvent).order_by(TradeEvent.ts.desc()).limit(limit)
-        rows: List[TradeEvent] = session.exec(stmt).all()
-
-        # Apply filters in memory (dataset is small).
+        stmt = select(TradeEvent)
+        if deal_id:
+            stmt = stmt.where(TradeEvent.deal_id == deal_id)
         if symbol:
-            rows = [r for r in rows if r.symbol == symbol]
+            stmt = stmt.where(TradeEvent.symbol == symbol)
         if type:
-            rows = [r for r in rows if r.type == type]
-
+            stmt = stmt.where(TradeEvent.type == type)
+        rows: List[TradeEvent] = session.exec(stmt.order_by(TradeEvent.ts.desc()).limit(limit)).all()
         return [_serialize_event(r) for r in rows]
 
 
+@app.get("/events/export")
+def export_events(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv", description="Output format"),
+    symbol: Optional[str] = Query(None, description="Filter by symbol"),
+    type: Optional[str] = Query(None, description="Filter by event type"),
+    start: Optional[datetime] = Query(None, description="From (inclusive, UTC)"),
+    end: Optional[datetime] = Query(None, description="To (exclusive, UTC)"),
+):
+    """Stream the full (filtered) event history in chunks; memory use does not depend on export size."""
+    if format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    chunks = iter_event_chunks(db_engine, symbol=symbol, type=type, start=start, end=end)
+    body = {"csv": stream_csv, "ndjson": stream_ndjson, "parquet": stream_parquet}[format](chunks)
+    name = "events" + (f"_{symbol.replace('/', '_').replace(':', '_')}" if symbol else "")
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
+
+
+@app.get("/stats")
+def stats(
+    symbol: Optional[str] = Query(None, description="Filter by symbol"),
+    mark: bool = Query(False, description="Use live last price for unrealized PnL (needs symbol)"),
+):
+    """
+    Deal / symbol statistics: realized & unrealized PnL, average fill price, win rate, drawdown.
+    Aggregates are maintained incrementally; each call only applies events stored since the last one.
+    """
+    analytics.sync(db_engine)
+    mark_price = None
+    if mark and symbol:
+        try:
+            mark_price = ex.last_price(symbol)
+        except Exception:
+            mark_price = None
+    return analytics.summary(symbol, mark_price)
+
+
 @app.get("/monitor")
 def monitor_page():
     """Serve the monitoring HTML page with realtime chart and markers."""
@@ -169,14 +501,66 @@ def monitor_page():
 # ---------------------------------------------------------------------------
 
 @app.websocket("/ws/stream")
-async def stream(ws: WebSocket):
-    """Stream trade events to the frontend in realtime."""
+async def stream(
+    ws: WebSocket,
+    symbol: Optional[str] = None,
+    since: Optional[int] = None,
+    encoding: Literal["json", "msgpack"] = "json",
+    batch_ms: int = 100,
+    snapshot: int = 500,
+):
+    """
+    Stream trade events to the frontend in realtime (frame format: app/stream.py).
+    First frame: a snapshot of the last `snapshot` events, or, with ?since=<seq>,
+    every event missed since then. Live events are batched over `batch_ms`.
+    A client too slow to keep up is closed with 1013 and resumes with ?since=<seq>.
+    """
     await ws.accept()
+    # subscribe before reading the DB so nothing falls between replay and live
     q = bus.subscribe("events")
+    binary = encoding == "msgpack" and ev_stream.msgpack is not None
+    sent = ev_stream.SentIds()
+
+    async def send(kind: str, seq: int, events: list):
+        for e in events:
+            if e.get("id") is not None:
+                sent.add(e["id"])
+        frame = ev_stream.encode({"type": kind, "seq": seq, "events": events}, encoding)
+        await (ws.send_bytes(frame) if binary else ws.send_text(frame))
+
     try:
+        if since is None:
+            events, seq = await asyncio.to_thread(ev_stream.snapshot, db_engine, symbol, min(snapshot, 5000))
+            await send("snapshot", seq, events)
+        else:
+            seq = since
+            while True:
+                events, upto = await asyncio.to_thread(ev_stream.events_since, db_engine, seq, symbol, 1000)
+                if upto == seq:
+                    break
+                seq = upto
+                await send("replay", seq, events)
+
+        window = min(max(batch_ms, 0), 2000) / 1000
         while True:
-            event = await q.get()
-            await ws.send_json(event)
+            batch = await ev_stream.next_batch(q, window, 500)
+            # ids below seq are late commits (the db tail re-reads behind its cursor), not repeats
+            fresh = []
+            for e in batch:
+                if symbol is not None and e.get("symbol") != symbol:
+                    continue
+                if e.get("id") is not None:
+                    if e["id"] in sent:
+                        continue
+                    sent.add(e["id"])
+                fresh.append(e)
+            seq = max([seq] + [e["id"] for e in batch if e.get("id") is not None])
+            if fresh:
+                await send("batch", seq, fresh)
+    except SubscriberOverflow:
+        await ws.close(code=1013)
     except WebSocketDisconnect:
         # Client disconnected — just exit the handler.
         return
+    finally:
+        bus.unsubscribe("events", q)
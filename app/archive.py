@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl  # inter-process lock for several API workers / recorders on one archive
+except ImportError:  # Windows: single writer process assumed
+    fcntl = None
+from ccxt import Exchange as CcxtExchange
+
+from app.utils.logger import logger
+
+# Fixed-width little-endian records, one raw file per (symbol, stream, UTC day).
+# Files carry no header, so np.memmap maps them as-is and appends are plain writes.
+CANDLE_DTYPE = np.dtype([
+    ("ts", "<i8"),       # candle open time, ms
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+TRADE_DTYPE = np.dtype([
+    ("ts", "<i8"),       # ms
+    ("price", "<f8"),
+    ("amount", "<f8"),
+    ("side", "i1"),      # 1 = buy, -1 = sell, 0 = unknown
+])
+
+_DAY_MS = 86_400_000
+
+
+def timeframe_ms(timeframe: str) -> int:
+    return int(CcxtExchange.parse_timeframe(timeframe) * 1000)
+
+
+def _safe(symbol: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", symbol).strip("_")
+
+
+def _day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class MarketArchive:
+    """
+    Append-only columnar store for candles and trades.
+
+    Layout: <root>/<symbol>/<stream>/<YYYY-MM-DD>.bin where stream is the candle
+    timeframe ("1m", "1s", ...) or "trades". Reads memory-map the day files and
+    slice them by timestamp with a binary search, so ranges are zero-copy views.
+    """
+
+    def __init__(self, root: str = "logs/archive"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._last_ts: Dict[Tuple[str, str], int] = {}
+
+    def _dir(self, symbol: str, stream: str) -> Path:
+        return self.root / _safe(symbol) / stream
+
+    def _days(self, symbol: str, stream: str) -> List[Path]:
+        d = self._dir(symbol, stream)
+        return sorted(d.glob("*.bin")) if d.exists() else []
+
+    @staticmethod
+    def _map(path: Path, dtype: np.dtype) -> np.ndarray:
+        n = path.stat().st_size // dtype.itemsize
+        if n == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def last_ts(self, symbol: str, stream: str) -> Optional[int]:
+        key = (symbol, stream)
+        if key not in self._last_ts:
+            days = self._days(symbol, stream)
+            dtype = TRADE_DTYPE if stream == "trades" else CANDLE_DTYPE
+            for path in reversed(days):
+                arr = self._map(path, dtype)
+                if len(arr):
+                    self._last_ts[key] = int(arr["ts"][-1])
+                    break
+        return self._last_ts.get(key)
+
+    # ---------- writes ----------
+
+    @staticmethod
+    def _tail_ids(d: Path, last: Optional[int]) -> set:
+        """Ids of the stored records at the tail timestamp `last` (trades only)."""
+        try:
+            saved = json.loads((d / ".tail_ids.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return set()
+        return set(saved.get("ids", ())) if saved.get("ts") == last else set()
+
+    def _append(self, symbol: str, stream: str, records: np.ndarray, ids: Optional[Sequence[str]] = None) -> int:
+        """
+        Append records newer than the stored tail. With `ids` (trades), records at the tail
+        timestamp itself are kept unless their id is already stored: several trades share
+        a millisecond, and the next poll starts at that millisecond.
+        """
+        d = self._dir(symbol, stream)
+        d.mkdir(parents=True, exist_ok=True)
+        with self._lock, (d / ".lock").open("a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                # another process may have appended since our cached tail
+                self._last_ts.pop((symbol, stream), None)
+            last = self.last_ts(symbol, stream)
+            id_arr = np.asarray(ids, dtype=object) if ids is not None else None
+            seen: set = set()
+            if last is not None:
+                # append-only: anything not newer than the stored tail is a re-fetch
+                keep = records["ts"] > last
+                if id_arr is not None:
+                    seen = self._tail_ids(d, last)
+                    keep |= (records["ts"] == last) & np.array([i not in seen for i in id_arr], dtype=bool)
+                records = records[keep]
+                id_arr = id_arr[keep] if id_arr is not None else None
+            if not len(records):
+                return 0
+            order = np.argsort(records["ts"], kind="stable")
+            records = records[order]
+            days = records["ts"] // _DAY_MS
+            for day in np.unique(days):
+                chunk = records[days == day]
+                with (d / f"{_day(int(day) * _DAY_MS)}.bin").open("ab") as fh:
+                    fh.write(chunk.tobytes())
+            tail = int(records["ts"][-1])
+            self._last_ts[(symbol, stream)] = tail
+            if id_arr is not None:
+                at_tail = {str(i) for i in id_arr[order][records["ts"] == tail]}
+                if tail == last:
+                    at_tail |= seen
+                (d / ".tail_ids.json").write_text(json.dumps({"ts": tail, "ids": sorted(at_tail)}), encoding="utf-8")
+            return len(records)
+
+    def append_candles(self, symbol: str, timeframe: str, rows: Sequence[Sequence[float]]) -> int:
+        """rows in ccxt OHLCV form: [ts_ms, open, high, low, close, volume]; older/duplicate rows are ignored."""
+        if not rows:
+            return 0
+        arr = np.array([tuple(r[:6]) for r in rows], dtype=CANDLE_DTYPE)
+        return self._append(symbol, timeframe, arr)
+
+    def append_trades(self, symbol: str, trades: Sequence[Dict[str, Any]]) -> int:
+        """trades in ccxt form ({id, timestamp, price, amount, side}); already stored trades (by id) are ignored."""
+        if not trades:
+            return 0
+        side = {"buy": 1, "sell": -1}
+        arr = np.array(
+            [(t["timestamp"], t["price"], t["amount"], side.get(t.get("side"), 0)) for t in trades],
+            dtype=TRADE_DTYPE,
+        )
+        ids = [
+            str(t["id"]) if t.get("id") is not None else f"{t['timestamp']}:{t['price']}:{t['amount']}:{t.get('side')}"
+            for t in trades
+        ]
+        return self._append(symbol, "trades", arr, ids)
+
+    # ---------- reads ----------
+
+    def iter_range(
+        self, symbol: str, stream: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
+        """Yield memory-mapped per-day views with start_ms <= ts < end_ms (constant RAM for any range)."""
+        dtype = TRADE_DTYPE if stream == "trades" else CANDLE_DTYPE
+        first = _day(start_ms) if start_ms is not None else None
+        last = _day(end_ms) if end_ms is not None else None
+        for path in self._days(symbol, stream):
+            day = path.stem
+            if (first and day < first) or (last and day > last):
+                continue
+            arr = self._map(path, dtype)
+            lo = int(np.searchsorted(arr["ts"], start_ms, "left")) if start_ms is not None else 0
+            hi = int(np.searchsorted(arr["ts"], end_ms, "left")) if end_ms is not None else len(arr)
+            if hi > lo:
+                yield arr[lo:hi]
+
+    def read_range(
+        self, symbol: str, stream: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None
+    ) -> np.ndarray:
+        """Contiguous array for a range (single day: zero-copy view; several days: one concatenation)."""
+        parts = list(self.iter_range(symbol, stream, start_ms, end_ms))
+        dtype = TRADE_DTYPE if stream == "trades" else CANDLE_DTYPE
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def tail(self, symbol: str, stream: str, n: int) -> np.ndarray:
+        """Last n records, walking day files backwards."""
+        dtype = TRADE_DTYPE if stream == "trades" else CANDLE_DTYPE
+        if n <= 0:
+            return np.empty(0, dtype=dtype)
+        parts: List[np.ndarray] = []
+        have = 0
+        for path in reversed(self._days(symbol, stream)):
+            arr = self._map(path, dtype)
+            parts.append(arr[-(n - have):])
+            have += len(parts[-1])
+            if have >= n:
+                break
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        parts.reverse()
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+class MarketRecorder:
+    """Polls a ccxt client and appends closed candles and new trades to the archive."""
+
+    def __init__(self, client, archive: MarketArchive):
+        self.client = client
+        self.archive = archive
+
+    def poll_candles(self, symbol: str, timeframe: str, limit: int = 1000) -> int:
+        tf = timeframe_ms(timeframe)
+        last = self.archive.last_ts(symbol, timeframe)
+        since = last + tf if last is not None else None
+        rows = self.client.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+        now = int(time.time() * 1000)
+        closed = [r for r in rows if r[0] + tf <= now]
+        return self.archive.append_candles(symbol, timeframe, closed)
+
+    def poll_trades(self, symbol: str, limit: int = 1000) -> int:
+        # since is inclusive: trades sharing the last archived millisecond are deduped by id
+        last = self.archive.last_ts(symbol, "trades")
+        trades = self.client.fetch_trades(symbol, since=last, limit=limit)
+        return self.archive.append_trades(symbol, trades)
+
+    def run(self, symbols: List[str], timeframes: List[str], trades: bool = True, interval: float = 5.0):
+        while True:
+            for symbol in symbols:
+                try:
+                    for tf in timeframes:
+                        n = self.poll_candles(symbol, tf)
+                        if n:
+                            logger.info(f"🗄️ Archived {n} {tf} candles for {symbol}")
+                    if trades:
+                        self.poll_trades(symbol)
+                except Exception as e:
+                    logger.error(f"archive recorder error ({symbol}): {e}")
+            time.sleep(interval)
+
+
+archive = MarketArchive(os.getenv("ARCHIVE_DIR", "logs/archive"))
@@ -0,0 +1,97 @@
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import app.engine as engine_mod
+from app.engine import Engine
+from app.exchanges.recording import RecordingExchange, ReplayExchange
+from app.exchanges.simulated import SimulatedExchange
+from app.models import DealConfig
+
+
+class FakeClock:
+    """Stands in for the `time` module inside app.engine: sleep() advances instantly."""
+
+    def __init__(self, start: float = 1_700_000_000.0, on_sleep: Optional[Callable[[], None]] = None):
+        self.now = start
+        self.on_sleep = on_sleep
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+
+@contextmanager
+def offline_engine(clock: FakeClock, on_event: Callable[[Any], None]) -> Iterator[None]:
+    """Run app.engine on `clock` with events handed to `on_event` instead of the DB; restored on exit."""
+    saved = engine_mod.time, engine_mod.add_event
+    engine_mod.time, engine_mod.add_event = clock, on_event
+    try:
+        yield
+    finally:
+        engine_mod.time, engine_mod.add_event = saved
+
+
+def run_once(recording: str, config: Union[str, DealConfig], trace: bool = False) -> Dict[str, Any]:
+    """Replay one deal end-to-end and return its cost."""
+    ex = ReplayExchange(recording)
+    events: Counter = Counter()
+    clock = FakeClock()
+
+    with offline_engine(clock, lambda ev: events.update([ev.type])):
+        if trace:
+            tracemalloc.start()
+        cpu0 = time.process_time()
+        try:
+            Engine(ex=ex, sleep=clock.sleep).run(config)
+        finally:
+            cpu = time.process_time() - cpu0
+            peak = tracemalloc.get_traced_memory()[1] if trace else 0
+            if trace:
+                tracemalloc.stop()
+
+    return {
+        "cpu_ms": cpu * 1000.0,
+        "peak_kib": peak / 1024.0,
+        "calls": dict(sorted(ex.calls.items())),
+        "events": dict(sorted(events.items())),
+    }
+
+
+def check_regression(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    problems = []
+    for key in ("cpu_ms", "wall_ms", "peak_kib"):
+        base = baseline.get(key) or 0.0
+        if base and result.get(key) is not None and result[key] > base * (1 + tolerance):
+            problems.append(f"{key}: {result[key]:.2f} > {base:.2f} (+{tolerance:.0%})")
+    if baseline.get("calls") and result["calls"] != baseline["calls"]:
+        problems.append(f"calls changed: {baseline['calls']} -> {result['calls']}")
+    return problems
+
+
+def record_simulated(path: str, config: Union[str, DealConfig], prices: Sequence[float], **sim: Any):
+    """
+    Record a deal against SimulatedExchange (one price of `prices` per engine sleep), so a
+    benchmark recording can be regenerated without exchange keys. Pin `deal_id` in the
+    config: client order ids are derived from it and are part of every replayed call.
+    """
+    ex = SimulatedExchange(**sim)
+    path_left = list(prices)
+
+    def step():
+        if path_left:
+            ex.set_price(path_left.pop(0))
+
+    clock = FakeClock(on_sleep=step)
+    rec = RecordingExchange(ex, path)
+    try:
+        with offline_engine(clock, lambda ev: None):
+            Engine(ex=rec, sleep=clock.sleep).run(config)
+    finally:
+        rec.close()
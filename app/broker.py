@@ -0,0 +1,237 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.logger import logger
+
+
+def _encode(message: dict) -> str:
+    return json.dumps(message, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+class LocalBroker:
+    """
+    In-process stand-in: publish goes straight to this process's subscribers and
+    the cache is a dict. Right for a single worker (and the default).
+    """
+
+    shared = False
+    bus = None                      # set by the EventBus that owns the broker
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        # deals running in this process (app.runner) publish from worker threads
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        self._loop = None
+
+    async def publish(self, channel: str, message: dict):
+        await self.bus.deliver(channel, message)
+
+    def publish_sync(self, channel: str, message: dict) -> bool:
+        """Publish from a thread without an event loop (engine). False = not delivered."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            asyncio.run_coroutine_threadsafe(self.bus.deliver(channel, message), loop)
+        except RuntimeError:
+            # loop closed between the check and the hand-off (shutdown)
+            return False
+        return True
+
+    def cache_get(self, key: str) -> Optional[Any]:
+        hit = self._cache.get(key)
+        if hit is None or hit[0] < time.time():
+            return None
+        return hit[1]
+
+    def cache_set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._cache[key] = (time.time() + ttl, value)
+
+
+class IdCursor:
+    """
+    Primary-key cursor over TradeEvent for readers that tail the table.
+
+    Ids are assigned before commit, so a slower transaction can show up below
+    the cursor: ids skipped by the cursor stay "holes" for `hole_ttl` seconds and
+    are re-read from the lowest hole on; every id is accepted once.
+    """
+
+    def __init__(self, last_id: int = 0, hole_ttl: float = 5.0, max_holes: int = 1000):
+        self.last_id = last_id
+        self.hole_ttl = hole_ttl
+        self.max_holes = max_holes
+        self.holes: Dict[int, float] = {}       # skipped id -> monotonic deadline
+
+    def condition(self, column):
+        """WHERE clause for rows not seen yet: above the cursor or in a hole."""
+        from sqlalchemy import or_
+        cond = column > self.last_id
+        if self.holes:
+            cond = or_(cond, column.in_(list(self.holes)))
+        return cond
+
+    def accept(self, rows: list, key: Callable[[Any], int] = lambda r: r["id"]) -> list:
+        """Rows not accepted yet; tracks ids the cursor jumped over."""
+        now = time.monotonic()
+        self.holes = {i: d for i, d in self.holes.items() if d > now}
+        fresh = []
+        for row in rows:
+            rid = key(row)
+            if rid > self.last_id:
+                for missing in range(max(self.last_id + 1, rid - self.max_holes), rid):
+                    self.holes[missing] = now + self.hole_ttl
+                self.last_id = rid
+            elif self.holes.pop(rid, None) is None:
+                continue
+            fresh.append(row)
+        # many skipped ids at once (bulk import, sequence jump): keep only the newest holes
+        if len(self.holes) > self.max_holes:
+            for rid in sorted(self.holes)[:len(self.holes) - self.max_holes]:
+                del self.holes[rid]
+        return fresh
+
+    def restore(self, last_id: int, holes: List[int]):
+        """Resume from a stored cursor; stored holes get a fresh ttl."""
+        deadline = time.monotonic() + self.hole_ttl
+        self.last_id = last_id
+        self.holes = {i: deadline for i in holes if i < last_id}
+
+
+class DbTailBroker(LocalBroker):
+    """
+    Fan-out through the events table every process already writes to: each API
+    worker tails TradeEvent by primary key (IdCursor, so late commits are not
+    skipped) and delivers new rows to its own subscribers, so events from any
+    worker or engine process reach every WebSocket. Works for several nodes when
+    DATABASE_URL points to a shared Postgres. The cache stays per process.
+    """
+
+    shared = True
+
+    def __init__(self, engine, interval: float = 0.3, batch: int = 500, hole_ttl: float = 5.0, max_holes: int = 1000):
+        super().__init__()
+        self.engine = engine
+        self.interval = interval
+        self.batch = batch
+        self.cursor = IdCursor(hole_ttl=hole_ttl, max_holes=max_holes)
+        self._task: Optional[asyncio.Task] = None
+
+    def _max_id(self) -> int:
+        from sqlalchemy import func, select
+        from app.db import TradeEvent
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.max(TradeEvent.id))).scalar() or 0
+
+    def _fetch(self) -> list:
+        from sqlalchemy import select
+        from app.db import TradeEvent
+        t = TradeEvent.__table__
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(t).where(self.cursor.condition(t.c.id)).order_by(t.c.id).limit(self.batch)
+            ).mappings().all()
+        return [dict(r) for r in rows]
+
+    async def start(self):
+        self.cursor.last_id = await asyncio.to_thread(self._max_id)
+        self._task = asyncio.create_task(self._tail())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _tail(self):
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._fetch)
+                for row in self.cursor.accept(rows):
+                    await self.bus.deliver("events", json.loads(_encode(row)))
+                if len(rows) == self.batch:
+                    continue
+            except Exception as e:
+                logger.error(f"event tail error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def publish(self, channel: str, message: dict):
+        # stored events come back through the tail in every worker (this one included)
+        if channel != "events":
+            await self.bus.deliver(channel, message)
+
+    def publish_sync(self, channel: str, message: dict) -> bool:
+        return channel == "events"
+
+
+class RedisBroker(LocalBroker):
+    """Redis pub/sub fan-out and a shared TTL cache (needs the optional `redis` package)."""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "crypto-engine"):
+        super().__init__()
+        import redis
+        import redis.asyncio as aioredis
+
+        self.url = url
+        self.prefix = prefix
+        self.sync = redis.Redis.from_url(url)
+        self.aio = aioredis.Redis.from_url(url)
+        self._task: Optional[asyncio.Task] = None
+
+    def _ch(self, channel: str) -> str:
+        return f"{self.prefix}:{channel}"
+
+    async def start(self):
+        self._pubsub = self.aio.pubsub()
+        await self._pubsub.psubscribe(self._ch("*"))
+        self._task = asyncio.create_task(self._pump())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        await self.aio.aclose()
+
+    async def _pump(self):
+        skip = len(self._ch(""))
+        async for msg in self._pubsub.listen():
+            if msg.get("type") != "pmessage":
+                continue
+            channel = msg["channel"].decode()[skip:]
+            await self.bus.deliver(channel, json.loads(msg["data"]))
+
+    async def publish(self, channel: str, message: dict):
+        await self.aio.publish(self._ch(channel), _encode(message))
+
+    def publish_sync(self, channel: str, message: dict) -> bool:
+        self.sync.publish(self._ch(channel), _encode(message))
+        return True
+
+    def cache_get(self, key: str) -> Optional[Any]:
+        raw = self.sync.get(f"{self.prefix}:cache:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    def cache_set(self, key: str, value: Any, ttl: float):
+        self.sync.set(f"{self.prefix}:cache:{key}", json.dumps(value), px=max(int(ttl * 1000), 1))
+
+
+def broker_from_env():
+    """EVENT_BROKER=local (default) | db | redis://host:6379/0"""
+    kind = os.getenv("EVENT_BROKER", "local").strip()
+    if kind.startswith("redis://") or kind.startswith("rediss://"):
+        return RedisBroker(kind)
+    if kind == "db":
+        from app.db import engine
+        return DbTailBroker(engine, interval=float(os.getenv("EVENT_TAIL_INTERVAL", "0.3")))
+    return LocalBroker()
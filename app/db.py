@@ -1,26 +1,122 @@
-from sqlmodel import SQLModel, Field, create_engine, Session
+import os
 from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Index, inspect, text
+from sqlmodel import SQLModel, Field, create_engine, Session
 
-# SQLite file storage
-engine = create_engine("sqlite:///logs/events.db", echo=False)
+# SQLite file storage by default; DATABASE_URL=postgresql+psycopg://... for Postgres
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///logs/events.db")
+engine = create_engine(DATABASE_URL, echo=False)
 
 
 class TradeEvent(SQLModel, table=True):
+    __table_args__ = (
+        # one deal = one indexed range scan, whatever the table size
+        Index("ix_tradeevent_deal_ts", "deal_id", "ts"),
+        Index("ix_tradeevent_symbol_ts", "symbol", "ts"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    ts: datetime = Field(default_factory=datetime.utcnow)
+    ts: datetime = Field(default_factory=datetime.utcnow, index=True)
     type: str
     symbol: str
     side: str | None = None
     price: float | None = None
     qty: float | None = None
     extra: str | None = None
+    deal_id: str | None = None
+    run_id: str | None = None
+    account: str | None = None
+    venue: str | None = None
+
+
+# columns added after the first release; old databases get them via ALTER TABLE
+_EVENT_COLUMNS = {
+    "deal_id": "VARCHAR",
+    "run_id": "VARCHAR",
+    "account": "VARCHAR",
+    "venue": "VARCHAR",
+}
+
+
+def _migrate_events():
+    cols = {c["name"] for c in inspect(engine).get_columns("tradeevent")}
+    with engine.begin() as conn:
+        for name, sql_type in _EVENT_COLUMNS.items():
+            if name not in cols:
+                conn.execute(text(f"ALTER TABLE tradeevent ADD COLUMN {name} {sql_type}"))
+    for idx in TradeEvent.__table__.indexes:
+        idx.create(engine, checkfirst=True)
 
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    _migrate_events()
 
 
-def add_event(event: TradeEvent):
-    with Session(engine) as session:
+def add_event(event: TradeEvent) -> int | None:
+    """Store an event; returns its id (the stream sequence number)."""
+    with Session(engine, expire_on_commit=False) as session:
         session.add(event)
         session.commit()
+        return event.id
+
+
+def archive_events(before: datetime, archive_dir: str = "logs/events_archive") -> int:
+    """
+    Move events older than `before` out of the live table, one partition per month:
+    SQLite -> <archive_dir>/events_YYYY_MM.db files, Postgres -> tradeevent_YYYY_MM tables.
+    Returns the number of moved rows.
+    """
+    sqlite = engine.dialect.name == "sqlite"
+    moved = 0
+    with engine.connect() as conn:
+        months = conn.execute(
+            text("SELECT DISTINCT substr(CAST(ts AS VARCHAR), 1, 7) FROM tradeevent WHERE ts < :b"),
+            {"b": before},
+        ).scalars().all()
+        conn.commit()
+        for month in months:
+            suffix = month.replace("-", "_")
+            lo = datetime.strptime(month, "%Y-%m")
+            hi = datetime(lo.year + lo.month // 12, lo.month % 12 + 1, 1)
+            bounds = {"lo": lo, "hi": min(hi, before)}
+            if sqlite:
+                # ATTACH/DETACH are not allowed inside the copy transaction
+                Path(archive_dir).mkdir(parents=True, exist_ok=True)
+                conn.execute(text("ATTACH DATABASE :p AS arc"), {"p": str(Path(archive_dir) / f"events_{suffix}.db")})
+                conn.commit()
+                target = "arc.tradeevent"
+                create = f"CREATE TABLE IF NOT EXISTS {target} AS SELECT * FROM tradeevent WHERE 0"
+            else:
+                target = f"tradeevent_{suffix}"
+                create = f"CREATE TABLE IF NOT EXISTS {target} (LIKE tradeevent INCLUDING ALL)"
+            with conn.begin():
+                conn.execute(text(create))
+                conn.execute(text(f"INSERT INTO {target} SELECT * FROM tradeevent WHERE ts >= :lo AND ts < :hi"), bounds)
+                moved += conn.execute(text("DELETE FROM tradeevent WHERE ts >= :lo AND ts < :hi"), bounds).rowcount
+            if sqlite:
+                conn.execute(text("DETACH DATABASE arc"))
+                conn.commit()
+    return moved
+
+
+class RiskReservation(SQLModel, table=True):
+    """
+    Exposure held by one ref (order / position) of one process, per key (notional by
+    symbol/side, gross, margin). Rows expire unless their owner keeps heartbeating.
+    """
+    owner: str = Field(primary_key=True)
+    ref: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    account: str = Field(index=True)
+    value: float = 0.0
+    expires_at: float = Field(index=True)   # unix time
+
+
+class AnalyticsState(SQLModel, table=True):
+    """Persisted Analytics aggregates and the id of the last event folded into them."""
+    name: str = Field(primary_key=True)
+    last_id: int = 0
+    data: str = "{}"
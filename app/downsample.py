@@ -0,0 +1,91 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.archive import CANDLE_DTYPE
+
+
+def bucket_ms(start_ms: int, end_ms: int, points: int, tf_ms: int) -> int:
+    """Bucket width for ~`points` buckets over a range: a whole multiple of the base timeframe."""
+    span = max(end_ms - start_ms, tf_ms)
+    k = max(1, -(-span // (max(points, 1) * tf_ms)))
+    return int(k * tf_ms)
+
+
+def ohlc_buckets(candles: np.ndarray, width_ms: int) -> np.ndarray:
+    """
+    Aggregate candles into epoch-aligned buckets of `width_ms`: open = first, high = max,
+    low = min, close = last, volume = sum, ts = bucket start. Input sorted by ts.
+    """
+    if not len(candles) or width_ms <= 0:
+        return candles
+    keys = candles["ts"] - candles["ts"] % width_ms
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(candles)] - 1
+    out = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    out["ts"] = keys[starts]
+    out["open"] = candles["open"][starts]
+    out["high"] = np.maximum.reduceat(candles["high"], starts)
+    out["low"] = np.minimum.reduceat(candles["low"], starts)
+    out["close"] = candles["close"][ends]
+    out["volume"] = np.add.reduceat(candles["volume"], starts)
+    return out
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `points` samples keeping the visual shape
+    of the (x, y) line. First and last points are always kept.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    out = np.empty(points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        # average of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        cx, cy = x[nlo:max(nhi, nlo + 1)].mean(), y[nlo:max(nhi, nlo + 1)].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def bucket_markers(events: Sequence[Dict[str, Any]], times_s: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Events grouped per chart bar and type: each event goes to the last bar starting at or
+    before it (`times_s`, sorted bar times in seconds). One marker per (bar, type) with the
+    count, total qty and qty-weighted price (plain mean without qty).
+    """
+    if not events or not len(times_s):
+        return []
+    groups: Dict[tuple, List[float]] = {}
+    ts = np.array([e["ts"] for e in events], dtype=float)
+    idx = np.clip(np.searchsorted(times_s, ts, side="right") - 1, 0, len(times_s) - 1)
+    for i, ev in zip(idx, events):
+        g = groups.setdefault((int(times_s[i]), ev["type"]), [0, 0.0, 0.0, 0.0, 0])
+        g[0] += 1
+        price, qty = ev.get("price"), ev.get("qty")
+        if price is not None:
+            w = qty if qty else 1.0
+            g[1] += w
+            g[2] += price * w
+            g[4] += 1
+        if qty:
+            g[3] += qty
+    return [
+        {
+            "time": t,
+            "type": typ,
+            "count": n,
+            "price": (pw / w) if cnt else None,
+            "qty": qty or None,
+        }
+        for (t, typ), (n, w, pw, qty, cnt) in sorted(groups.items())
+    ]
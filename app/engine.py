@@ -3,20 +3,43 @@ from app.event_bus import bus
 import asyncio
 
 def emit_event(ev: dict):
-    add_event(TradeEvent(**ev))
+    row = TradeEvent(**ev)
+    payload = {**ev, "ts": row.ts.isoformat()}
+    payload["id"] = add_event(row)
     try:
-        asyncio.create_task(bus.publish("events", ev))
+        asyncio.get_running_loop()
     except RuntimeError:
-        # no running loop (e.g. sync context) — just skip async publish
-        pass
+        # no running loop (engine thread / script): shared brokers still fan it out
+        bus.publish_sync("events", payload)
+        return
+    asyncio.create_task(bus.publish("events", payload))
 
 import json
+import os
+import threading
 import time
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional, Union
 from ccxt.base.errors import InvalidOrder
+from app.execution import EntryExecutor
+from app.grid import GridLadder
+from app.indicators import VolatilityTracker, load_candles, scale_to_volatility, trailing_offset
 from app.models import DealConfig
-from app.exchanges.ccxt_client import CcxtClient
+from app.planner import PLAN_MAX_DRIFT_PERCENT, DealPlan, check_plan, compile_deal
+from app.scheduler import TickScheduler
+from app.triggers import Trigger, TriggerIndex, triggers
+from app.risk import RiskLimitExceeded, RiskService, risk as shared_risk
+from app.exchanges.base import Exchange
+from app.exchanges.ccxt_client import shared_client
+from app.exchanges.client_ids import client_order_id
+from app.exchanges.errors import FATAL, RATE_LIMITED, classify, is_benign, is_order_too_small
+from app.exchanges.guard import CircuitOpen
+from app.exchanges.market_rules import MarketFilters
+from app.exchanges.metered import MeteredExchange
+from app.exchanges.recording import RecordingExchange
+from app.exchanges.router import MultiVenueExchange, venues_from_env
 from app.utils.logger import logger
 
 
@@ -28,67 +51,199 @@ def exit_side(side: str) -> str:
     return "sell" if side == "long" else "buy"
 
 
+def order_ids(order: dict) -> List[str]:
+    """Exchange ids of an order; a multi-venue split carries one id per child."""
+    return [c["id"] for c in order.get("children") or [order]]
+
+
+def order_legs(order: dict, qty: float) -> List[Tuple[str, float]]:
+    """(id, qty) per exchange order; children carry their own base amount."""
+    legs = order.get("children")
+    if not legs:
+        return [(order["id"], qty)]
+    return [(c["id"], float(c.get("amount") or 0.0)) for c in legs]
+
+
+def route_extra(order: Optional[dict]) -> Optional[str]:
+    """Venue breakdown for TradeEvent.extra when the order went through the multi-venue router."""
+    if not order or "venue" not in order:
+        return None
+    legs = order.get("children") or [order]
+    return json.dumps({"venues": [{"venue": c["venue"], "amount": c.get("amount")} for c in legs]})
+
+
+def default_exchange() -> Exchange:
+    """EXCHANGE=bybit -> one CcxtClient; EXCHANGE=bybit,gate -> router over both (ROUTING=best|split)."""
+    venues = venues_from_env()
+    if len(venues) > 1:
+        return MultiVenueExchange(
+            {v: shared_client(v) for v in venues},
+            mode=os.getenv("ROUTING", "best").lower(),
+        )
+    return shared_client()
+
+
+# one id per process: groups the deals started by the same engine run
+RUN_ID = uuid.uuid4().hex[:12]
+
+
 class Engine:
-    def __init__(self):
-        self.ex = CcxtClient()
+    def __init__(self, ex: Optional[Exchange] = None, risk: Optional[RiskService] = None,
+                 sleep: Optional[Callable[[float], Any]] = None):
+        if ex is None:
+            ex = default_exchange()
+            # EXCHANGE_RECORD=path/to/log.ndjson captures traffic for offline replay
+            record_path = os.getenv("EXCHANGE_RECORD")
+            if record_path:
+                ex = RecordingExchange(ex, record_path)
+        # REST calls are counted so each monitor tick is charged what it sent
+        self.ex: Exchange = MeteredExchange(ex)
         self.tp_ids: List[str] = []
         self.grid_ids: List[str] = []
+        # resting orders we placed: id -> (price, qty), to report fills when they leave the book
+        self._placed: Dict[str, Tuple[float, float]] = {}
+
+        # portfolio risk: reservations held by this deal (entry + resting grid orders)
+        self.risk = risk or shared_risk
+        self.deal_id = uuid.uuid4().hex
+        self.account: Optional[str] = None
+        self._risk_ref = f"deal:{self.deal_id}"
+        self._grid_refs: Dict[str, str] = {}
+        # this deal's own filled position (from its own fills): its share of the exposure,
+        # never the account's net position, which other deals on the symbol also hold
+        self._own_qty = 0.0
+        self._own_avg = 0.0
+        # placements per leg, so every order gets its own deterministic client id
+        self._leg_seq: Dict[str, int] = {}
+
+        # grid-following mode: lattice + live levels (index -> order ids)
+        self._ladder: Optional[GridLadder] = None
+        self._grid_live: Dict[int, List[str]] = {}
 
         # SL / trailing / BE
         self.sl_active = False
         self.sl_price: Optional[float] = None
         self.first_tp_done = False
+        self._tp_filled = False               # a TP fill was confirmed by the exchange
         self.best_price: Optional[float] = None
-
-    def run(self, config_path: str):
-        logger.info(f"🚀 Starting engine with config: {config_path}")
+        # the SL lives in the per-symbol trigger index shared by all deals in the process
+        self._sl: Optional[Trigger] = None
+        self._sl_book: Optional[TriggerIndex] = None
+        # volatility-scaled grid / stops (cfg.volatility): ATR and realized vol, updated per tick
+        self._vol: Optional[VolatilityTracker] = None
+
+        # lifecycle (app.runner): queued -> running -> stopping -> done | failed
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.cfg: Optional[DealConfig] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._close_on_stop = False
+        # monitor-loop sleep: stop() cuts the default short; offline runs inject a fake clock
+        self._sleep = sleep or self._stop.wait
+
+    def run(self, config: Union[str, DealConfig], plan: Optional[DealPlan] = None):
+        """
+        Run a deal from a config path or a DealConfig; a precompiled `plan` (app.planner)
+        lets the entry go out without a price round-trip.
+        """
+        logger.info(f"🚀 Starting engine with config: {config if isinstance(config, str) else config.symbol}")
+        self.status, self.started_at = "running", datetime.now(timezone.utc)
         try:
-            cfg = self._load_config(config_path)
+            cfg = config if isinstance(config, DealConfig) else self._load_config(config)
+            self.cfg = cfg
+            if cfg.deal_id:
+                self.deal_id = cfg.deal_id
+                self._risk_ref = f"deal:{self.deal_id}"
+            self.account = cfg.account
+            if self._stop.is_set():
+                logger.info(f"⏹ Deal {self.deal_id} stopped before entry")
+                return
             logger.info(f"📌 Deal: {cfg.side.upper()} {cfg.symbol} @ leverage={cfg.leverage}")
 
+            # a precompiled plan must be this deal's and still near the market
+            ref = None
+            if plan is not None:
+                problems = check_plan(plan, cfg)
+                if problems:
+                    raise ValueError(f"Plan {plan.key} does not match the deal: {'; '.join(problems)}")
+                ref = self._last(cfg)
+                drift = abs(ref - plan.ref_price) / plan.ref_price * 100.0
+                if drift > PLAN_MAX_DRIFT_PERCENT:
+                    logger.warning(f"⚠️ Plan {plan.key} priced at {plan.ref_price}, market {ref} ({drift:.2f}%) — recompiling")
+                    plan = None
+
+            # volatility modes: grid spacing / SL / trailing offset from ATR and realized vol
+            if cfg.volatility:
+                ref = ref or self._last(cfg)
+                cfg = self._init_volatility(cfg, ref)
+                plan = None  # legs follow the scaled config
+
+            # pre-trade plan: every leg checked against market filters before anything is sent
+            if plan is None:
+                plan = compile_deal(cfg, self.ex, ref or self._last(cfg))
+            if not plan.ok:
+                raise ValueError(f"Deal plan rejected: {'; '.join(plan.errors)}")
+            if plan.skipped:
+                logger.warning(f"⚠️ Plan skips {len(plan.skipped)} legs below min tradable")
+
             # leverage
             try:
                 self.ex.set_leverage(cfg.symbol, cfg.leverage)
             except Exception as e:
-                msg = str(e)
-                if "110043" in msg or "leverage not modified" in msg.lower():
+                if is_benign(e):
                     logger.warning("ℹ️ Leverage already set, continue.")
                 else:
                     raise
 
-            # 1) Market entry (USDT -> qty)
-            entry_side = side_to_order(cfg.side)
-            last = self._last(cfg)
-            raw_qty = cfg.market_order_amount / last
-            step = self.ex.amount_step(cfg.symbol)
-            min_trade = self.ex.min_tradable_amount(cfg.symbol)
-            qty = self.ex.round_amount_down(cfg.symbol, raw_qty)
-
+            # 1) Market entry (USDT -> qty, from the plan)
+            entry_side = plan.entry.side
+            last = plan.ref_price
+            qty = plan.entry.qty
             logger.info(
-                f"➡️ Entry calc: last={last}, raw_qty={raw_qty}, step={step}, "
-                f"min_tradable={min_trade}, qty_rounded={qty}"
+                f"➡️ Entry plan {plan.key}: ref={last}, qty={qty}, "
+                f"grid={sum(1 for l in plan.grid if not l.skip)}/{len(plan.grid)}, margin={plan.required_margin:.2f}"
             )
-            if qty < min_trade:
-                raise ValueError(f"Calculated market qty {qty} < min tradable {min_trade}")
 
-            # Market order (with category=linear on client)
-            order = self.ex.place_market_order(cfg.symbol, entry_side, qty, reduce_only=False)
+            # portfolio limits across all deals on the account
+            entry_ref = f"{self._risk_ref}:entry"
+            self.risk.reserve(entry_ref, cfg.account, cfg.symbol, cfg.side, qty * last, cfg.leverage)
+
+            if cfg.execution and cfg.execution.algo != "market":
+                # sliced entry (TWAP/iceberg/depth-capped) against the live book
+                res = EntryExecutor(self.ex, cfg.execution, sleep=self._sleep).execute(
+                    cfg.symbol, entry_side, qty, client_id=self._client_id("e")
+                )
+                order = res["orders"][-1] if res["orders"] else None
+                entry_price, qty = res["avg_price"] or last, res["filled"]
+                if res["unconfirmed"]:
+                    logger.warning(f"⚠️ {len(res['unconfirmed'])} entry children with unknown fill are not counted")
+            else:
+                # Market order (with category=linear on client)
+                order = self.ex.place_market_order(
+                    cfg.symbol, entry_side, qty, reduce_only=False, client_id=self._client_id("e")
+                )
+                entry_price = last
             logger.info(f"✅ Market entry placed: {order}")
+            self._own_fill(cfg, qty, entry_price, opening=True)
 
             # emit entry event
-            emit_event({
+            self._emit({
                 "type": "entry",
                 "symbol": cfg.symbol,
                 "side": cfg.side,
-                "price": last,
+                "price": entry_price,
                 "qty": qty,
+                "extra": route_extra(order),
             })
 
-            # init SL/trailing
+            # init SL/trailing; the entry now counts through the deal's position, not the reservation
             self._init_sl_trailing(cfg)
+            self.risk.release(entry_ref)
 
             # 2) DCA grid
-            self._place_grid(cfg)
+            self._place_grid(cfg, plan)
 
             # 3) TP from avg
             self._replace_tp(cfg)
@@ -97,20 +252,82 @@ class Engine:
             self._monitor_loop(cfg)
 
         except Exception as e:
+            self.status, self.error = "failed", str(e)
             logger.error(f"❌ Engine failed: {e}", exc_info=True)
+        finally:
+            if self.status != "failed":
+                self.status = "done"
+            self.finished_at = datetime.now(timezone.utc)
+            self._release_risk()
+            if self._sl_book and self._sl:
+                self._sl_book.remove(self._sl)
+
+    def stop(self, close: bool = False):
+        """
+        Ask the monitor loop to finish: resting grid orders are cancelled; with `close`
+        the TP orders too and the position is closed at market. Without `close` the
+        position keeps its exchange-side TPs but loses the client-side SL / trailing.
+        """
+        self._close_on_stop = close
+        if self.status in ("queued", "running"):
+            self.status = "stopping" if self.status == "running" else self.status
+        self._stop.set()
+
+    def state(self) -> Dict[str, Any]:
+        cfg = self.cfg
+        return {
+            "deal_id": self.deal_id,
+            "status": self.status,
+            "error": self.error,
+            "account": self.account,
+            "symbol": cfg.symbol if cfg else None,
+            "side": cfg.side if cfg else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "sl_active": self.sl_active,
+            "sl_price": self.sl_price,
+            "best_price": self.best_price,
+            "first_tp_done": self.first_tp_done,
+            "tp_ids": list(self.tp_ids),
+            "grid_ids": list(self.grid_ids),
+        }
 
     # ---- helpers ----
+    def _emit(self, ev: dict):
+        """emit_event with the deal / run / account / venue dimensions filled in."""
+        emit_event({
+            **ev,
+            "deal_id": self.deal_id,
+            "run_id": RUN_ID,
+            "account": self.account,
+            "venue": getattr(self.ex, "venue", None),
+        })
+
     def _load_config(self, path: str) -> DealConfig:
         data = json.loads(Path(path).read_text(encoding="utf-8"))
         cfg = DealConfig(**data)
         logger.info("⚙️ Config loaded successfully")
         return cfg
 
+    def _client_id(self, leg: str) -> str:
+        """Client order id of the next placement of `leg` ("e", "g3", "t1", "sl")."""
+        n = self._leg_seq[leg] = self._leg_seq.get(leg, 0) + 1
+        return client_order_id(self.deal_id, f"{leg}_{n}")
+
     def _last(self, cfg: DealConfig) -> float:
         return self.ex.last_price(cfg.symbol)
 
+    def _release_risk(self):
+        # the deal is no longer managed — drop everything it holds in the shared risk book
+        self.risk.release(f"{self._risk_ref}:entry")
+        for ref in self._grid_refs.values():
+            self.risk.release(ref)
+        self._grid_refs.clear()
+        self.risk.release(self._risk_ref)
+
     # ---------- safe order wrapper ----------
-    def _safe_limit_order(self, symbol: str, side: str, qty: float, price: float, reduce_only: bool, post_only: bool):
+    def _safe_limit_order(self, symbol: str, side: str, qty: float, price: float, reduce_only: bool, post_only: bool,
+                          client_id: Optional[str] = None):
         """
         Place a limit order, but if Bybit returns 110017 (qty truncated to zero),
         skip gracefully and return None.
@@ -119,75 +336,108 @@ class Engine:
             # round & clamp price defensively
             price = self.ex.round_price_to_tick(symbol, price)
             price = self.ex.clamp_price_to_limits(symbol, price)
-            return self.ex.place_limit_order(symbol, side, qty, price, reduce_only=reduce_only, post_only=post_only)
+            return self.ex.place_limit_order(
+                symbol, side, qty, price, reduce_only=reduce_only, post_only=post_only, client_id=client_id
+            )
         except InvalidOrder as e:
-            msg = str(e)
-            if "110017" in msg or "truncated to zero" in msg.lower():
+            if is_order_too_small(e):
                 logger.warning(
                     f"⚠️ Skipped limit order by exchange filter (110017): side={side}, qty={qty}, price={price}"
                 )
                 return None
             raise
 
-    def _place_grid(self, cfg: DealConfig):
+    def _place_grid(self, cfg: DealConfig, plan: DealPlan):
         """
-        Place averaging (DCA) grid across a percent range from current price.
+        Place averaging (DCA) grid legs of the plan (percent range from the entry reference price).
+        In follow mode only the `live_levels` nearest legs go out; the rest is placed as price moves.
         """
-        last = self._last(cfg)
-        n = cfg.limit_orders.orders_count
-        if n <= 0:
+        if not plan.grid:
             logger.info("⏭ Grid disabled: orders_count=0")
             return
 
-        usdt_total = cfg.limit_orders_amount
-        usdt_per = usdt_total / max(n, 1)
-        r = cfg.limit_orders.range_percent / 100.0
-
-        if cfg.side == "long":
-            # grid below last
-            raw_levels = [last * (1 - r * i / n) for i in range(1, n + 1)]
-            side = "buy"
-        else:
-            # grid above last
-            raw_levels = [last * (1 + r * i / n) for i in range(1, n + 1)]
-            side = "sell"
-
         self.grid_ids.clear()
-        min_trade = self.ex.min_tradable_amount(cfg.symbol)
-        step = self.ex.amount_step(cfg.symbol)
+        legs = list(enumerate(plan.grid, start=1))
+        lo = cfg.limit_orders
+        if lo.follow:
+            n = len(plan.grid)
+            self._ladder = GridLadder(
+                plan.ref_price, lo.range_percent / 100.0 / n, cfg.side,
+                live_levels=lo.live_levels or n, max_levels=n, threshold=lo.follow_threshold_levels,
+            )
+            legs = legs[:self._ladder.live_levels]
         placed = 0
 
-        for raw_price in raw_levels:
-            price = self.ex.round_price_to_tick(cfg.symbol, raw_price)
-            price = self.ex.clamp_price_to_limits(cfg.symbol, price)
+        for i, leg in legs:
+            if leg.skip:
+                logger.warning(f"⚠️ Grid skip: {leg.skip} @ {leg.price}")
+                continue
+            if self._place_grid_level(cfg, i, leg.side, leg.price, leg.qty):
+                placed += 1
 
-            raw_qty = usdt_per / price
-            qty = self.ex.round_amount_down(cfg.symbol, raw_qty)
+        logger.info(f"🧱 Placed grid orders: {placed}")
 
-            logger.info(
-                f"🧩 Grid level: price_raw={raw_price}, price={price}, "
-                f"qty_raw={raw_qty}, step={step}, min_tradable={min_trade}, qty_rounded={qty}"
+    def _place_grid_level(self, cfg: DealConfig, index: int, side: str, price: float, qty: float) -> bool:
+        ref = f"{self._risk_ref}:grid:{price}"
+        try:
+            self.risk.reserve(ref, cfg.account, cfg.symbol, cfg.side, qty * price, cfg.leverage)
+        except RiskLimitExceeded as e:
+            logger.warning(f"⚠️ Grid skip by risk limit @ {price}: {e}")
+            return False
+
+        o = self._safe_limit_order(cfg.symbol, side, qty, price, reduce_only=False, post_only=True,
+                                   client_id=self._client_id(f"g{index}"))
+        if not o:
+            self.risk.release(ref)
+            return False
+        for oid, leg_qty in order_legs(o, qty):
+            self.grid_ids.append(oid)
+            self._grid_refs[oid] = ref
+            self._placed[oid] = (price, leg_qty)
+            self._grid_live.setdefault(index, []).append(oid)
+
+        # emit grid order event (per each successfully placed order)
+        self._emit({
+            "type": "grid",
+            "symbol": cfg.symbol,
+            "side": side,
+            "price": price,
+            "qty": qty,
+            "extra": route_extra(o),
+        })
+        return True
+
+    def _follow_grid(self, cfg: DealConfig, last: float):
+        """Move the live grid window with the market: cancel levels that left it, place the new ones."""
+        cancel, place = self._ladder.diff(last, self._grid_live)
+        if not cancel and not place:
+            return
+        ids = [oid for i in cancel for oid in self._grid_live[i]]
+        if ids:
+            self.ex.cancel_orders(cfg.symbol, ids)
+            for i in cancel:
+                del self._grid_live[i]
+            for oid in ids:
+                self.grid_ids.remove(oid)
+                self._placed.pop(oid, None)
+                ref = self._grid_refs.pop(oid, None)
+                if ref:
+                    self.risk.release(ref)
+
+        side = side_to_order(cfg.side)
+        usdt_per = cfg.limit_orders_amount / max(cfg.limit_orders.orders_count, 1)
+        min_trade = self.ex.min_tradable_amount(cfg.symbol)
+        placed = 0
+        for i in place:
+            price = self.ex.clamp_price_to_limits(
+                cfg.symbol, self.ex.round_price_to_tick(cfg.symbol, self._ladder.price(i))
             )
-
+            qty = self.ex.round_amount_down(cfg.symbol, usdt_per / price)
             if qty < min_trade:
-                logger.warning(f"⚠️ Grid skip: qty {qty} < min tradable {min_trade} @ {price}")
+                logger.warning(f"⚠️ Grid skip: level {i} qty {qty} < min tradable {min_trade} @ {price}")
                 continue
-
-            o = self._safe_limit_order(cfg.symbol, side, qty, price, reduce_only=False, post_only=True)
-            if o:
-                self.grid_ids.append(o["id"])
-                placed += 1
-
-                # emit grid order event (per each successfully placed order)
-                emit_event({
-                    "type": "grid",
-                    "symbol": cfg.symbol,
-                    "side": side,
-                    "price": price,
-                    "qty": qty,
-                })
-
-        logger.info(f"🧱 Placed grid orders: {placed}")
+            placed += self._place_grid_level(cfg, i, side, price, qty)
+        logger.info(f"🧭 Grid follow @ {last}: cancelled {len(cancel)} levels, placed {placed}")
 
     def _position_avg_and_size(self, cfg: DealConfig) -> Tuple[float, float]:
         for p in self.ex.fetch_positions(cfg.symbol):
@@ -197,6 +447,20 @@ class Engine:
                 return avg, size
         return 0.0, 0.0
 
+    def _own_fill(self, cfg: DealConfig, qty: float, price: Optional[float], opening: bool):
+        """Apply one of this deal's fills to its own position and sync that into the risk book."""
+        if opening and qty > 0 and price:
+            total = self._own_qty + qty
+            self._own_avg = (self._own_avg * self._own_qty + price * qty) / total
+            self._own_qty = total
+        elif not opening:
+            self._own_qty = max(0.0, self._own_qty - qty)
+            if self._own_qty <= 0:
+                self._own_avg = 0.0
+        self.risk.sync_position(
+            self._risk_ref, cfg.account, cfg.symbol, cfg.side, self._own_qty, self._own_avg, cfg.leverage
+        )
+
     def _replace_tp(self, cfg: DealConfig):
         """
         Replace TP orders based on current average price.
@@ -208,6 +472,8 @@ class Engine:
 
         # cancel old
         if self.tp_ids:
+            for oid in self.tp_ids:
+                self._placed.pop(oid, None)
             self.ex.cancel_orders(cfg.symbol, self.tp_ids)
             self.tp_ids.clear()
 
@@ -244,18 +510,22 @@ class Engine:
                     logger.warning(f"⚠️ TP adjusted skip: qty {qty} < min tradable {min_trade}")
                     continue
 
-            o = self._safe_limit_order(cfg.symbol, out_side, qty, price, reduce_only=True, post_only=True)
+            o = self._safe_limit_order(cfg.symbol, out_side, qty, price, reduce_only=True, post_only=True,
+                                       client_id=self._client_id(f"t{i}"))
             if o:
-                new_ids.append(o["id"])
+                for oid, leg_qty in order_legs(o, qty):
+                    new_ids.append(oid)
+                    self._placed[oid] = (price, leg_qty)
                 remaining = max(0.0, remaining - qty)
 
                 # emit TP placement event (per each TP leg)
-                emit_event({
+                self._emit({
                     "type": "tp",
                     "symbol": cfg.symbol,
                     "side": out_side,
                     "price": price,
                     "qty": qty,
+                    "extra": route_extra(o),
                 })
 
         self.tp_ids = new_ids
@@ -271,99 +541,247 @@ class Engine:
             sl_raw = avg * (1 + cfg.stop_loss_percent / 100.0)
         self.sl_price = self.ex.clamp_price_to_limits(cfg.symbol, self.ex.round_price_to_tick(cfg.symbol, sl_raw))
         self.best_price = avg
+        rules = MarketFilters(self.ex.market(cfg.symbol))
+        self._sl_book = triggers.book(
+            getattr(self.ex, "venue", None), cfg.account, cfg.symbol,
+            lambda p, s=cfg.symbol: rules.clamp_price_to_limits(s, rules.round_price_to_tick(s, p)),
+        )
+        self._sl = self._sl_book.add(Trigger(
+            self.deal_id, cfg.side, stop=self.sl_price, best=avg, offset=cfg.trailing_sl_offset_percent / 100.0,
+        ))
         self.sl_active = True
         logger.info(f"🛡️  SL initialized at {self.sl_price}, trailing base={self.best_price}")
 
+    def _init_volatility(self, cfg: DealConfig, price: float) -> DealConfig:
+        vc = cfg.volatility
+        self._vol = VolatilityTracker.for_config(vc)
+        try:
+            self._vol.backfill(load_candles(self.ex, cfg.symbol, vc.timeframe, vc.lookback))
+        except Exception as e:
+            logger.warning(f"⚠️ No candles for volatility scaling ({e}) — indicators warm up from ticks")
+        return scale_to_volatility(cfg, self._vol, price)
+
+    def _rescale_trailing(self, cfg: DealConfig):
+        """Trailing offset = k·σ from the live tracker; re-keyed only when it moved more than the threshold."""
+        off = trailing_offset(cfg.volatility, self._vol)
+        if off is None or self._sl is None:
+            return
+        cur = self._sl.offset
+        if cur and abs(off - cur) / cur <= cfg.volatility.rescale_threshold:
+            return
+        self._sl_book.set_offset(self._sl, off)
+        logger.info(f"📐 Trailing offset {(cur or 0) * 100:.3f}% -> {off * 100:.3f}% (vol={self._vol.vol:.5f})")
+
     def _maybe_move_sl_to_be(self, cfg: DealConfig, avg: float):
         if not cfg.move_sl_to_breakeven or self.first_tp_done:
             return
-        open_ids = {o["id"] for o in self.ex.fetch_open_orders(cfg.symbol)}
-        if any(oid not in open_ids for oid in self.tp_ids):
+        if self._tp_filled:
             self.first_tp_done = True
             self.sl_price = self.ex.round_price_to_tick(cfg.symbol, avg)
             self.sl_price = self.ex.clamp_price_to_limits(cfg.symbol, self.sl_price)
+            self._sl_book.set_stop(self._sl, self.sl_price)
             logger.info(f"🔁 Move SL to breakeven: sl={self.sl_price}")
 
             # emit BE move event (first TP filled -> SL moved to avg price)
-            emit_event({
+            self._emit({
                 "type": "sl_move_be",
                 "symbol": cfg.symbol,
                 "price": avg,
             })
 
-    def _close_market_reduce_only(self, cfg: DealConfig, size: float):
+    def _fill_of(self, symbol: str, oid: str) -> Optional[Tuple[float, Optional[float]]]:
+        """
+        (filled qty, average price) of an order that left the book, (0, None) if it left
+        unfilled (cancelled, rejected, expired). None: status unknown, ask again later.
+        """
+        try:
+            o = self.ex.fetch_order(symbol, oid)
+        except NotImplementedError:
+            # exchange can't report orders: leaving the book is taken as a fill at the placed values
+            price, qty = self._placed.get(oid, (None, 0.0))
+            return qty, price
+        except Exception as e:
+            logger.warning(f"⚠️ Order {oid} left the book, status unknown: {e}")
+            return None
+        filled = float(o.get("filled") or 0.0)
+        if o.get("status") == "closed" and not filled:
+            filled = float(o.get("amount") or 0.0)
+        if filled <= 0:
+            logger.info(f"🚫 Order {oid} left the book unfilled ({o.get('status')})")
+            return 0.0, None
+        return filled, o.get("average") or o.get("price") or self._placed.get(oid, (None,))[0]
+
+    def _detect_fills(self, cfg: DealConfig, open_ids: set) -> bool:
+        """
+        Resting orders we placed that left the book (and we didn't cancel) are checked with
+        the exchange: only real fills emit grid_fill / tp_fill, with the filled qty and
+        average price. Returns True if any grid order filled.
+        """
+        grid_filled = False
+        for oid in [oid for oid in self.grid_ids if oid not in open_ids]:
+            fill = self._fill_of(cfg.symbol, oid)
+            if fill is None:
+                continue
+            qty, price = fill
+            self.grid_ids.remove(oid)
+            for i, ids in list(self._grid_live.items()):
+                if oid in ids:
+                    ids.remove(oid)
+                    if self._ladder and qty > 0:
+                        self._ladder.filled.add(i)
+                    if not ids:
+                        del self._grid_live[i]
+            # filled grid orders now count through the position, not the reservation
+            ref = self._grid_refs.pop(oid, None)
+            if ref:
+                self.risk.release(ref)
+            self._placed.pop(oid, None)
+            if qty <= 0:
+                continue
+            grid_filled = True
+            self._own_fill(cfg, qty, price, opening=True)
+            self._emit({
+                "type": "grid_fill",
+                "symbol": cfg.symbol,
+                "side": side_to_order(cfg.side),
+                "price": price,
+                "qty": qty,
+            })
+
+        for oid in self.tp_ids:
+            if oid in open_ids or oid not in self._placed:
+                continue
+            fill = self._fill_of(cfg.symbol, oid)
+            if fill is None:
+                continue
+            qty, price = fill
+            self._placed.pop(oid)
+            if qty <= 0:
+                continue
+            self._tp_filled = True
+            self._own_fill(cfg, qty, price, opening=False)
+            self._emit({
+                "type": "tp_fill",
+                "symbol": cfg.symbol,
+                "side": exit_side(cfg.side),
+                "price": price,
+                "qty": qty,
+            })
+        return grid_filled
+
+    def _close_market_reduce_only(self, cfg: DealConfig, size: float, leg: str = "sl"):
         side = exit_side(cfg.side)
         try:
-            self.ex.place_market_order(cfg.symbol, side, round(size, 6), reduce_only=True)
+            self.ex.place_market_order(
+                cfg.symbol, side, self.ex.round_amount_down(cfg.symbol, size), reduce_only=True,
+                client_id=self._client_id(leg),
+            )
         except Exception as e:
-            logger.error(f"Close by SL failed: {e}", exc_info=True)
+            logger.error(f"Close by {leg.upper()} failed: {e}", exc_info=True)
+
+    def _cancel_resting(self, cfg: DealConfig, ids: List[str]):
+        open_ids_now = {o["id"] for o in self.ex.fetch_open_orders(cfg.symbol)}
+        still_open = [oid for oid in ids if oid in open_ids_now]
+        if still_open:
+            self.ex.cancel_orders(cfg.symbol, still_open)
+
+    def _wind_down(self, cfg: DealConfig):
+        """stop(): cancel the grid (and TPs + close the position with close=True)."""
+        self._cancel_resting(cfg, self.grid_ids + (self.tp_ids if self._close_on_stop else []))
+        if self._close_on_stop:
+            _, size = self._position_avg_and_size(cfg)
+            if size > 0:
+                self._close_market_reduce_only(cfg, size, leg="x")
+                self._own_fill(cfg, self._own_qty, None, opening=False)
+                self._emit({
+                    "type": "close",
+                    "symbol": cfg.symbol,
+                    "side": exit_side(cfg.side),
+                    "price": self._last(cfg),
+                    "qty": size,
+                })
+        logger.info(f"⏹ Deal {self.deal_id} stopped (close={self._close_on_stop})")
+
+    def _resting_prices(self) -> List[float]:
+        return [self._placed[oid][0] for oid in self.grid_ids + self.tp_ids if oid in self._placed]
 
     def _monitor_loop(self, cfg: DealConfig):
         deadline = time.time() + cfg.limit_orders.engine_deal_duration_minutes * 60
-        offset = cfg.trailing_sl_offset_percent / 100.0
+        sched = TickScheduler(cfg.monitor)
+        avg, size, last = 0.0, 0.0, None
 
         while True:
+            if self._stop.is_set():
+                self._wind_down(cfg)
+                break
+            calls0 = self.ex.calls
             try:
-                open_ids_now = {o["id"] for o in self.ex.fetch_open_orders(cfg.symbol)}
-                # if any grid order got filled, re-place TP from new average
-                if any(oid not in open_ids_now for oid in self.grid_ids):
-                    self._replace_tp(cfg)
+                last = self._last(cfg)
+                now = time.time()
+                sched.observe(now, last)
+                if self._vol:
+                    self._vol.on_price(int(now * 1000), last)
+
+                # positions / orders can only have changed if price came near a resting order
+                if sched.needs_refresh(now, self._resting_prices()):
+                    open_ids_now = {o["id"] for o in self.ex.fetch_open_orders(cfg.symbol)}
+                    # if any grid order got filled, re-place TP from new average
+                    if self._detect_fills(cfg, open_ids_now):
+                        self._replace_tp(cfg)
+                    avg, size = self._position_avg_and_size(cfg)
+                    sched.refreshed(now, last)
+
+                if self._ladder and size > 0:
+                    self._follow_grid(cfg, last)
 
-                avg, size = self._position_avg_and_size(cfg)
                 if avg > 0 and size > 0 and self.sl_active:
                     self._maybe_move_sl_to_be(cfg, avg)
-                    last = self._last(cfg)
-
-                    if cfg.side == "long":
-                        if self.best_price is None or last > self.best_price:
-                            self.best_price = last
-                            sl = self.best_price * (1 - offset)
-                            self.sl_price = self.ex.clamp_price_to_limits(
-                                cfg.symbol, self.ex.round_price_to_tick(cfg.symbol, sl)
-                            )
-                        if self.sl_price is not None and last <= self.sl_price:
-                            self._close_market_reduce_only(cfg, size)
-                            logger.info(f"🛑 SL hit (long): last={last} <= sl={self.sl_price}")
-
-                            # emit SL event
-                            emit_event({
-                                "type": "sl",
-                                "symbol": cfg.symbol,
-                                "side": exit_side(cfg.side),
-                                "price": last,
-                                "qty": size,
-                            })
-                            break
-                    else:
-                        if self.best_price is None or last < self.best_price:
-                            self.best_price = last
-                            sl = self.best_price * (1 + offset)
-                            self.sl_price = self.ex.clamp_price_to_limits(
-                                cfg.symbol, self.ex.round_price_to_tick(cfg.symbol, sl)
-                            )
-                        if self.sl_price is not None and last >= self.sl_price:
-                            self._close_market_reduce_only(cfg, size)
-                            logger.info(f"🛑 SL hit (short): last={last} >= sl={self.sl_price}")
-
-                            # emit SL event
-                            emit_event({
-                                "type": "sl",
-                                "symbol": cfg.symbol,
-                                "side": exit_side(cfg.side),
-                                "price": last,
-                                "qty": size,
-                            })
-                            break
+
+                    if self._vol and cfg.volatility.trailing_vol_mult is not None:
+                        self._rescale_trailing(cfg)
+
+                    # fires every stop crossed by this price, for all deals on the symbol
+                    self._sl_book.on_price(last)
+                    self.sl_price, self.best_price = self._sl.stop, self._sl.best
+                    if self._sl.fired:
+                        _, size = self._position_avg_and_size(cfg)  # cached size may be stale
+                        self._close_market_reduce_only(cfg, size)
+                        self._own_fill(cfg, self._own_qty, last, opening=False)
+                        logger.info(f"🛑 SL hit ({cfg.side}): last={last}, sl={self.sl_price}")
+
+                        # emit SL event
+                        self._emit({
+                            "type": "sl",
+                            "symbol": cfg.symbol,
+                            "side": exit_side(cfg.side),
+                            "price": last,
+                            "qty": size,
+                        })
+                        break
 
                 # lifetime guard for the deal
                 if time.time() > deadline:
-                    still_open = [oid for oid in self.grid_ids if oid in open_ids_now]
-                    if still_open:
-                        self.ex.cancel_orders(cfg.symbol, still_open)
+                    self._cancel_resting(cfg, self.grid_ids)
                     logger.info("⏹ Deal duration elapsed — stopping monitor loop")
                     break
 
+            except CircuitOpen as e:
+                # exchange degraded: wait for the breaker instead of hammering it
+                logger.warning(f"⏸ {e}")
+                self._sleep(max(e.retry_in, 1.0))
+                continue
             except Exception as e:
-                logger.error(f"monitor error: {e}", exc_info=True)
+                kind = classify(e)
+                if kind == FATAL:
+                    logger.error(f"monitor error: {e}", exc_info=True)
+                else:
+                    logger.warning(f"monitor {kind} error: {e}")
+                if kind == RATE_LIMITED:
+                    self._sleep(5)
+                    continue
 
-            time.sleep(3)
+            if last is None:
+                self._sleep(3)
+                continue
+            levels = self._resting_prices() + ([self.sl_price] if self.sl_active and self.sl_price else [])
+            self._sleep(sched.next_interval(last, levels, self.ex.calls - calls0))
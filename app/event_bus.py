@@ -1,20 +1,69 @@
 import asyncio
+import os
 from typing import Dict, List
 
+from app.broker import broker_from_env
+
+# messages a subscriber may lag behind before it is cut off
+QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+# last item of an overflowed subscriber's queue
+OVERFLOW = object()
+
+
+class SubscriberOverflow(Exception):
+    """The subscriber fell more than its queue size behind and was unsubscribed."""
+
 
 class EventBus:
-    def __init__(self):
+    """
+    Local asyncio fan-out in front of a broker (app.broker): with the default
+    in-process broker it behaves like a plain pub/sub; with EVENT_BROKER=db or
+    redis://... every API worker delivers events published by any process.
+
+    Subscriber queues are bounded: a subscriber that falls `queue_size` messages
+    behind is dropped, its queue cleared and ended with OVERFLOW, so one slow
+    client can not grow memory (WebSocket clients resume with ?since=<seq>).
+    """
+
+    def __init__(self, broker=None, queue_size: int = QUEUE_SIZE):
         self.channels: Dict[str, List[asyncio.Queue]] = {}
+        self.queue_size = queue_size
+        self.broker = broker if broker is not None else broker_from_env()
+        self.broker.bus = self
 
     def subscribe(self, channel: str) -> asyncio.Queue:
-        q = asyncio.Queue()
+        # one slot above the limit is kept for the OVERFLOW marker
+        q = asyncio.Queue(self.queue_size + 1)
         self.channels.setdefault(channel, []).append(q)
         return q
 
+    def unsubscribe(self, channel: str, q: asyncio.Queue):
+        subs = self.channels.get(channel, [])
+        if q in subs:
+            subs.remove(q)
+
+    async def deliver(self, channel: str, message: dict):
+        """Hand a message to this process's subscribers."""
+        for q in list(self.channels.get(channel, ())):
+            if q.qsize() < self.queue_size:
+                q.put_nowait(message)
+                continue
+            self.unsubscribe(channel, q)
+            while not q.empty():
+                q.get_nowait()
+            q.put_nowait(OVERFLOW)
+
     async def publish(self, channel: str, message: dict):
-        if channel in self.channels:
-            for q in self.channels[channel]:
-                await q.put(message)
+        await self.broker.publish(channel, message)
+
+    def publish_sync(self, channel: str, message: dict) -> bool:
+        return self.broker.publish_sync(channel, message)
+
+    async def start(self):
+        await self.broker.start()
+
+    async def stop(self):
+        await self.broker.stop()
 
 
 bus = EventBus()
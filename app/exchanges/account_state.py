@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+
+class AccountStateCache:
+    """
+    Last known per-symbol account settings (margin mode, position mode, leverage)
+    per venue, persisted as JSON so restarts skip mode/leverage calls that would
+    change nothing. Entries older than `ttl` seconds count as unknown, which bounds
+    how long a change made outside the bot (web UI, another tool) goes unnoticed.
+    Inside `batch()` updates only mark the file dirty; it is written once on exit.
+    """
+
+    def __init__(self, path: str = "logs/account_state.json", ttl: float = 3600.0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._dirty = False
+        self._state: Dict[str, Dict[str, Any]] = (
+            json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        )
+
+    @staticmethod
+    def _key(venue: str, symbol: str) -> str:
+        return f"{venue}:{symbol}"
+
+    def get(self, venue: str, symbol: str) -> Dict[str, Any]:
+        st = self._state.get(self._key(venue, symbol))
+        if not st or st.get("ts", 0) + self.ttl < time.time():
+            return {}
+        return st
+
+    def update(self, venue: str, symbol: str, **fields):
+        """Merge known fields (None = unknown, skipped) and persist."""
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if not fields:
+            return
+        with self._lock:
+            st = dict(self.get(venue, symbol))
+            st.update(fields, ts=time.time())
+            self._state[self._key(venue, symbol)] = st
+            self._save()
+
+    def forget(self, venue: str, symbol: str):
+        with self._lock:
+            if self._state.pop(self._key(venue, symbol), None) is not None:
+                self._save()
+
+    @contextmanager
+    def batch(self) -> Iterator["AccountStateCache"]:
+        """Defer writes until the outermost batch exits (warm-up, positions seeding)."""
+        with self._lock:
+            self._batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches -= 1
+                if not self._batches and self._dirty:
+                    self._write()
+
+    def _save(self):
+        if self._batches:
+            self._dirty = True
+        else:
+            self._write()
+
+    def _write(self):
+        self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._state, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+account_state = AccountStateCache(
+    os.getenv("ACCOUNT_STATE_PATH", "logs/account_state.json"),
+    ttl=float(os.getenv("ACCOUNT_STATE_TTL", "3600")),
+)
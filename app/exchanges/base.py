@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
 
 
 class Exchange(ABC):
+    # venue label stamped on trade events ("bybit", "bybit+gate", ...)
+    venue: Optional[str] = None
+
     # --- core trading ---
     @abstractmethod
     def set_leverage(self, symbol: str, leverage: int) -> Any:
@@ -13,7 +16,10 @@ class Exchange(ABC):
         ...
 
     @abstractmethod
-    def place_market_order(self, symbol: str, side: str, qty: float, reduce_only: bool = False) -> Any:
+    def place_market_order(
+        self, symbol: str, side: str, qty: float, reduce_only: bool = False, client_id: Optional[str] = None
+    ) -> Any:
+        """`client_id` is an idempotency key: placing the same id twice yields one order."""
         ...
 
     @abstractmethod
@@ -25,6 +31,7 @@ class Exchange(ABC):
         price: float,
         reduce_only: bool = False,
         post_only: bool = True,
+        client_id: Optional[str] = None,
     ) -> Any:
         ...
 
@@ -40,6 +47,28 @@ class Exchange(ABC):
     def fetch_positions(self, symbol: str) -> Any:
         ...
 
+    def warm_account_state(self, targets: Dict[str, int]) -> Dict[str, Any]:
+        """Apply margin/position mode and leverage for many symbols up front ({symbol: leverage})."""
+        out: Dict[str, Any] = {}
+        for symbol, leverage in targets.items():
+            try:
+                out[symbol] = self.set_leverage(symbol, leverage)
+            except Exception as e:
+                out[symbol] = e
+        return out
+
+    def fetch_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        """ccxt-style order by id, also after it left the book: status, filled, average."""
+        raise NotImplementedError
+
+    def fetch_order_book(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
+        """ccxt-style order book: {"bids": [[price, amount], ...], "asks": [...]}."""
+        raise NotImplementedError
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", limit: int = 200) -> List[List[float]]:
+        """ccxt-style candles, oldest first: [[ts_ms, open, high, low, close, volume], ...]."""
+        raise NotImplementedError
+
     # --- market helpers (precision/limits) ---
     @abstractmethod
     def market(self, symbol: str) -> Dict[str, Any]:
@@ -1,43 +1,34 @@
 import os
-import math
-import ccxt
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Any, Dict, Optional
-from ccxt.base.errors import BadRequest
+from ccxt.base.errors import DuplicateOrderId, NetworkError
+from app.utils.logger import logger
+from .account_state import AccountStateCache, account_state
 from .base import Exchange
+from .client_ids import ClientOrderIndex, matches
+from .errors import BENIGN, classify, is_benign, is_unsupported
+from .guard import CircuitOpen, ExchangeGuard
+from .market_rules import MarketRules
+from .session import _EX_MAP, build_exchange, default_venue
 
-_EX_MAP = {"bybit": "bybit", "gate": "gateio", "gateio": "gateio"}
 
-
-class CcxtClient(Exchange):
+class CcxtClient(MarketRules, Exchange):
     """
     CCXT wrapper configured for Bybit/Gate USDT perpetuals.
     Robust symbol normalization + leverage + precise qty/price rounding.
     """
 
-    def __init__(self):
-        ex_name = (os.getenv("EXCHANGE") or "bybit").lower()
-        ccxt_id = _EX_MAP.get(ex_name)
-        if not ccxt_id:
-            raise ValueError(f"Unknown exchange: {ex_name}")
-
-        api_key = os.getenv("API_KEY") or os.getenv("BYBIT_API_KEY")
-        api_secret = os.getenv("API_SECRET") or os.getenv("BYBIT_API_SECRET")
-        testnet = (os.getenv("TESTNET", "true").lower() == "true")
-
-        self.client = getattr(ccxt, ccxt_id)(
-            {
-                "apiKey": api_key,
-                "secret": api_secret,
-                "enableRateLimit": True,
-                "options": {
-                    "defaultType": "swap",   # USDT Perpetual
-                    "defaultSettle": "USDT",
-                },
-            }
-        )
-        if hasattr(self.client, "set_sandbox_mode"):
-            self.client.set_sandbox_mode(testnet)
-        self.client.load_markets()
+    def __init__(self, ex_name: Optional[str] = None, state: Optional[AccountStateCache] = None):
+        self.client = build_exchange(ex_name)
+        self.venue = self.client.id
+        # known margin/position mode + leverage per symbol: skips no-op settings calls
+        self.account_state = state or account_state
+        # client order id -> order: a resubmitted leg returns the order it already has
+        self.orders = ClientOrderIndex()
+        self.order_retries = int(os.getenv("ORDER_RETRIES", "2"))
+        # error classification, per-endpoint circuit breakers, retry budget
+        self.guard = ExchangeGuard.from_env(self.venue)
 
         # Cache to avoid re-loading
         self._market_cache: Dict[str, Dict[str, Any]] = {}
@@ -78,39 +69,198 @@ class CcxtClient(Exchange):
         if mk.get("type") != "swap" or not mk.get("linear"):
             raise ValueError(f"{symbol} is not linear USDT perpetual (expected like 'BTC/USDT:USDT').")
 
-    def _set_modes_if_supported(self, symbol: str):
+    def _apply_account_state(self, symbol: str, leverage: int) -> Any:
+        """
+        Isolated margin, one-way mode and `leverage` for a (normalized) symbol; only the
+        settings that differ from the cached account state are sent, and a setting is
+        cached only once the venue applied it (or answered "not modified"); a call the venue
+        does not support is skipped and not cached. Mode calls stay best-effort (a failure
+        is logged and retried on the next call). Returns the set_leverage response, None
+        when leverage was already in place or can't be set.
+        """
+        st = self.account_state.get(self.venue, symbol)
         params = {"category": "linear"}
+        updates: Dict[str, Any] = {}
+        if st.get("margin_mode") != "isolated" and hasattr(self.client, "set_margin_mode"):
+            try:
+                self.guard.call("set_margin_mode", self.client.set_margin_mode, "isolated", symbol, params)
+                updates["margin_mode"] = "isolated"
+            except Exception as e:
+                if is_benign(e):
+                    updates["margin_mode"] = "isolated"
+                elif is_unsupported(e):
+                    logger.info(f"ℹ️ set_margin_mode not supported on {self.venue}: {e}")
+                else:
+                    logger.warning(f"⚠️ set_margin_mode({symbol}) failed, margin mode unknown: {e}")
+        if st.get("position_mode") != "oneway" and hasattr(self.client, "set_position_mode"):
+            try:
+                self.guard.call("set_position_mode", self.client.set_position_mode, False, symbol, params)
+                updates["position_mode"] = "oneway"
+            except Exception as e:
+                if is_benign(e):
+                    updates["position_mode"] = "oneway"
+                elif is_unsupported(e):
+                    logger.info(f"ℹ️ set_position_mode not supported on {self.venue}: {e}")
+                else:
+                    logger.warning(f"⚠️ set_position_mode({symbol}) failed, position mode unknown: {e}")
+
+        res: Any = None
         try:
-            if hasattr(self.client, "set_margin_mode"):
-                self.client.set_margin_mode("isolated", symbol, params)
-        except Exception:
-            pass
+            if st.get("leverage") != leverage:
+                try:
+                    res = self.guard.call("set_leverage", self.client.set_leverage, leverage, symbol, params)
+                    updates["leverage"] = leverage
+                except Exception as e:
+                    # Bybit often returns "leverage not modified" – not an error for us
+                    if is_benign(e):
+                        updates["leverage"] = leverage
+                    elif is_unsupported(e):
+                        logger.warning(f"⚠️ set_leverage not supported on {self.venue}, leverage unknown: {e}")
+                    else:
+                        raise
+        finally:
+            if updates:
+                self.account_state.update(self.venue, symbol, **updates)
+        return res
+
+    def _seed_account_state(self, symbols: List[str]):
+        """One positions request for all symbols: record the modes/leverage it reports."""
         try:
-            if hasattr(self.client, "set_position_mode"):
-                self.client.set_position_mode(False, symbol, params)  # one-way
+            positions = self.guard.call("fetch_positions", self.client.fetch_positions, symbols, {"category": "linear"})
         except Exception:
-            pass
+            return
+        self._record_positions(positions, symbols)
+
+    def _record_positions(self, positions: List[Dict[str, Any]], symbols: List[str]):
+        """
+        Cache the modes/leverage the venue reports for `symbols`. A reported value that
+        differs from the cached one replaces it, so the next set_leverage re-applies the
+        deal's setting instead of trusting a cache the venue contradicts (changed in the
+        web UI, reset after liquidation). Nothing is written when the report matches.
+        """
+        with self.account_state.batch():
+            for p in positions:
+                symbol = p.get("symbol")
+                if symbol not in symbols:
+                    continue
+                lev = p.get("leverage")
+                hedged = p.get("hedged")
+                reported = {
+                    "margin_mode": p.get("marginMode"),
+                    "position_mode": None if hedged is None else ("hedge" if hedged else "oneway"),
+                    "leverage": int(float(lev)) if lev else None,
+                }
+                st = self.account_state.get(self.venue, symbol)
+                changed = {k: v for k, v in reported.items() if v is not None and st.get(k) != v}
+                if not changed:
+                    continue
+                if st.get("leverage") is not None and "leverage" in changed:
+                    logger.warning(
+                        f"⚠️ {symbol}: {self.venue} reports leverage {changed['leverage']}, "
+                        f"cached {st['leverage']}; it will be re-applied"
+                    )
+                self.account_state.update(self.venue, symbol, **changed)
+
+    def _find_by_client_id(self, symbol: str, cid: str) -> Optional[Dict[str, Any]]:
+        """Look an order up by client id among open, then recently closed orders."""
+        params = {"category": "linear"}
+        for o in self.guard.call("fetch_open_orders", self.client.fetch_open_orders, symbol, None, None, params,
+                                 retry=False):
+            if matches(o, cid):
+                return o
+        if self.client.has.get("fetchClosedOrders"):
+            for o in self.guard.call("fetch_closed_orders", self.client.fetch_closed_orders, symbol, None, 50, params,
+                                     retry=False):
+                if matches(o, cid):
+                    return o
+        return None
+
+    def _create_order(
+        self, symbol: str, order_type: str, side: str, qty: float, price: Optional[float],
+        params: Dict[str, Any], client_id: Optional[str],
+    ) -> Any:
+        """
+        create_order with an idempotency key. On a network error/timeout the order may
+        or may not exist: it is looked up by client id and only resubmitted when the
+        lookup says it is not there, so short timeouts can't double a leg.
+        """
+        create = self.client.create_order
+        if client_id is None:
+            # without an idempotency key a timed-out order must not be resent
+            return self.guard.call("create_order", create, symbol, order_type, side, qty, price, params, retry=False)
+        known = self.orders.get(client_id)
+        if known is not None:
+            return known
+
+        params = {**params, "clientOrderId": client_id}
+        error: Optional[Exception] = None
+        for _ in range(self.order_retries + 1):
+            if error is not None:
+                try:
+                    found = self._find_by_client_id(symbol, client_id)
+                except NetworkError as e:
+                    error = e               # still unknown: never resubmit blind
+                    continue
+                if found:
+                    logger.info(f"🔎 Order {client_id} found after {type(error).__name__}, not resubmitting")
+                    return self.orders.put(client_id, found)
+                if not self.guard.budget.withdraw():
+                    break
+                logger.warning(f"🔁 Resubmitting {client_id} after {type(error).__name__}: {error}")
+            try:
+                return self.orders.put(client_id, self.guard.call(
+                    "create_order", create, symbol, order_type, side, qty, price, params, retry=False
+                ))
+            except CircuitOpen:
+                raise                       # refused locally: nothing was sent
+            except DuplicateOrderId:
+                found = self._find_by_client_id(symbol, client_id)
+                if found:
+                    return self.orders.put(client_id, found)
+                raise
+            except NetworkError as e:
+                error = e
+        try:
+            found = self._find_by_client_id(symbol, client_id)
+        except NetworkError:
+            found = None
+        if found:
+            return self.orders.put(client_id, found)
+        raise error
 
     # ---------- Exchange interface ----------
 
     def set_leverage(self, symbol: str, leverage: int) -> Any:
         symbol = self._normalize_symbol(symbol)
         self._ensure_linear_swap(symbol)
-        self._set_modes_if_supported(symbol)
-        try:
-            return self.client.set_leverage(leverage, symbol, {"category": "linear"})
-        except BadRequest as e:
-            msg = str(e)
-            # Bybit often returns "leverage not modified" – not an error for us
-            if "110043" in msg or "leverage not modified" in msg.lower():
-                return {"info": {"retCode": 110043, "retMsg": "leverage not modified"}}
-            raise
+        return self._apply_account_state(symbol, leverage)
+
+    def warm_account_state(self, targets: Dict[str, int], workers: int = 8) -> Dict[str, Any]:
+        symbols = {self._normalize_symbol(s): lev for s, lev in targets.items()}
+        for s in symbols:
+            self._ensure_linear_swap(s)
+        out: Dict[str, Any] = {}
+        # the whole warm-up writes the account state file once
+        with self.account_state.batch():
+            stale = [s for s in symbols if not self.account_state.get(self.venue, s)]
+            if stale:
+                self._seed_account_state(stale)
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols))), thread_name_prefix="warm") as pool:
+                futs = {s: pool.submit(self._apply_account_state, s, lev) for s, lev in symbols.items()}
+                for s, f in futs.items():
+                    try:
+                        out[s] = f.result()
+                    except Exception as e:
+                        out[s] = e
+        return out
 
     def last_price(self, symbol: str) -> float:
         symbol = self._normalize_symbol(symbol)
-        return float(self.client.fetch_ticker(symbol)["last"])
+        return float(self.guard.call("fetch_ticker", self.client.fetch_ticker, symbol)["last"])
 
-    def place_market_order(self, symbol: str, side: str, qty: float, reduce_only: bool = False) -> Any:
+    def place_market_order(
+        self, symbol: str, side: str, qty: float, reduce_only: bool = False, client_id: Optional[str] = None
+    ) -> Any:
         """
         Create market order. Always passes {"category":"linear"} for Bybit v5.
         """
@@ -120,7 +270,7 @@ class CcxtClient(Exchange):
         if reduce_only:
             params["reduceOnly"] = True
         # Ensure no price is sent for market orders
-        return self.client.create_order(symbol, "market", side, qty, None, params)
+        return self._create_order(symbol, "market", side, qty, None, params, client_id)
 
     def place_limit_order(
         self,
@@ -130,6 +280,7 @@ class CcxtClient(Exchange):
         price: float,
         reduce_only: bool = False,
         post_only: bool = True,
+        client_id: Optional[str] = None,
     ) -> Any:
         """
         Create limit order. Caller must round qty/price prior to call.
@@ -142,26 +293,48 @@ class CcxtClient(Exchange):
         if post_only:
             # Bybit uses "PostOnly" in timeInForce
             params["timeInForce"] = "PostOnly"
-        return self.client.create_order(symbol, "limit", side, qty, price, params)
+        return self._create_order(symbol, "limit", side, qty, price, params, client_id)
 
     def cancel_orders(self, symbol: str, order_ids: List[str]) -> Any:
         symbol = self._normalize_symbol(symbol)
         out = []
         for oid in order_ids:
             try:
-                out.append(self.client.cancel_order(oid, symbol, {"category": "linear"}))
-            except Exception:
-                pass
+                out.append(self.guard.call("cancel_order", self.client.cancel_order, oid, symbol, {"category": "linear"}))
+            except Exception as e:
+                # already filled / cancelled is fine; anything else is logged, callers re-check open orders
+                if classify(e) != BENIGN:
+                    logger.warning(f"⚠️ cancel {oid} failed: {e}")
         return out
 
     def fetch_open_orders(self, symbol: str) -> Any:
         symbol = self._normalize_symbol(symbol)
-        return self.client.fetch_open_orders(symbol, params={"category": "linear"})
+        return self.guard.call("fetch_open_orders", self.client.fetch_open_orders, symbol, params={"category": "linear"})
 
     def fetch_positions(self, symbol: str) -> Any:
         symbol = self._normalize_symbol(symbol)
-        positions = self.client.fetch_positions([symbol], params={"category": "linear"})
-        return [p for p in positions if p.get("symbol") == symbol]
+        positions = self.guard.call("fetch_positions", self.client.fetch_positions, [symbol], params={"category": "linear"})
+        positions = [p for p in positions if p.get("symbol") == symbol]
+        self._record_positions(positions, [symbol])
+        return positions
+
+    def fetch_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        symbol = self._normalize_symbol(symbol)
+        # Bybit UTA: only the last 500 orders are reachable by id, which covers resting legs of a deal
+        params = {"category": "linear", "acknowledged": True}
+        return self.guard.call("fetch_order", self.client.fetch_order, order_id, symbol, params)
+
+    def fetch_order_book(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
+        symbol = self._normalize_symbol(symbol)
+        return self.guard.call(
+            "fetch_order_book", self.client.fetch_order_book, symbol, limit, params={"category": "linear"}
+        )
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", limit: int = 200) -> List[List[float]]:
+        symbol = self._normalize_symbol(symbol)
+        return self.guard.call(
+            "fetch_ohlcv", self.client.fetch_ohlcv, symbol, timeframe, None, limit, params={"category": "linear"}
+        )
 
     # ---------- market helpers ----------
 
@@ -175,60 +348,19 @@ class CcxtClient(Exchange):
         self._market_cache[symbol] = mk
         return mk
 
-    def amount_step(self, symbol: str) -> float:
-        m = self.market(symbol)
-        # preferred from precision
-        prec = (m.get("precision") or {}).get("amount")
-        if isinstance(prec, int):
-            return 10 ** (-prec) if prec >= 0 else 1e-6
-        if isinstance(prec, float) and prec > 0:
-            return float(prec)
-        # fallback from limits
-        step = (m.get("limits", {}).get("amount", {}).get("step")
-                or m.get("limits", {}).get("amount", {}).get("min")
-                or 1e-6)
-        return float(step)
-
-    def min_amount(self, symbol: str) -> float:
-        m = self.market(symbol)
-        return float(m.get("limits", {}).get("amount", {}).get("min") or 0.0)
-
-    def min_tradable_amount(self, symbol: str) -> float:
-        return max(self.amount_step(symbol), self.min_amount(symbol))
-
-    def round_amount_down(self, symbol: str, amount: float) -> float:
-        step = self.amount_step(symbol)
-        if step <= 0:
-            return max(amount, 0.0)
-        return math.floor(amount / step) * step
-
-    def price_step(self, symbol: str) -> float:
-        m = self.market(symbol)
-        prec = (m.get("precision") or {}).get("price")
-        if isinstance(prec, int):
-            return 10 ** (-prec) if prec >= 0 else 1e-2
-        if isinstance(prec, float) and prec > 0:
-            return float(prec)
-        tick = (m.get("limits", {}).get("price", {}).get("step")
-                or m.get("limits", {}).get("price", {}).get("min")
-                or 0.1)
-        return float(tick)
-
-    def round_price_to_tick(self, symbol: str, price: float) -> float:
-        tick = self.price_step(symbol)
-        if tick <= 0:
-            return price
-        # floor to tick
-        return math.floor(price / tick) * tick
-
-    # Optional: within price limits helper
-    def clamp_price_to_limits(self, symbol: str, price: float) -> float:
-        m = self.market(symbol)
-        lims = (m.get("limits") or {}).get("price") or {}
-        pmin: Optional[float] = lims.get("min")
-        pmax: Optional[float] = lims.get("max")
-        if pmin is not None and price < pmin:
-            price = pmin
-        if pmax is not None and price > pmax:
-            price = pmax
-        return price
+
+_shared_clients: Dict[str, CcxtClient] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_client(ex_name: Optional[str] = None) -> CcxtClient:
+    """
+    Process-wide CcxtClient per exchange: markets are loaded once and all callers
+    (API, engines) reuse the same warm pooled connections.
+    """
+    ex_name = (ex_name or default_venue()).lower()
+    ccxt_id = _EX_MAP.get(ex_name, ex_name)
+    with _shared_lock:
+        if ccxt_id not in _shared_clients:
+            _shared_clients[ccxt_id] = CcxtClient(ex_name)
+        return _shared_clients[ccxt_id]
@@ -0,0 +1,49 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Gate "text" allows 28 chars after its "t-" prefix, Bybit orderLinkId 36 of [A-Za-z0-9_-]
+MAX_LEN = 28
+
+
+def client_order_id(deal_id: str, leg: str) -> str:
+    """
+    Deterministic client order id for one leg of a deal, e.g. "3f9a1c0b7e-g4_1".
+    The same (deal, leg) always maps to the same id, so a resubmitted order is
+    recognised by the exchange and by the local index instead of doubling up.
+    """
+    cid = f"{hashlib.sha1(deal_id.encode()).hexdigest()[:10]}-{leg}"
+    if len(cid) > MAX_LEN - 3:          # leave room for the router's "-<venue>" suffix
+        raise ValueError(f"client order id too long: {cid}")
+    return cid
+
+
+def matches(order: Dict[str, Any], cid: str) -> bool:
+    """ccxt order carries our client id (Gate reports it with its "t-" prefix)."""
+    got = order.get("clientOrderId")
+    return got == cid or got == f"t-{cid}"
+
+
+class ClientOrderIndex:
+    """Client order id -> last known order (bounded LRU, thread-safe)."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._orders: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            order = self._orders.get(cid)
+            if order is not None:
+                self._orders.move_to_end(cid)
+            return order
+
+    def put(self, cid: str, order: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._orders[cid] = order
+            self._orders.move_to_end(cid)
+            while len(self._orders) > self.maxsize:
+                self._orders.popitem(last=False)
+        return order
@@ -0,0 +1,107 @@
+import re
+from typing import Optional
+
+from ccxt.base import errors as ce
+
+# error classes
+BENIGN = "benign"              # nothing to do / already in the wanted state
+UNSUPPORTED = "unsupported"    # the venue has no such call: skipped, but nothing was applied either
+RETRYABLE = "retryable"        # transient: network, timeouts, exchange overloaded
+RATE_LIMITED = "rate_limited"  # back off before the next call
+FATAL = "fatal"                # the request itself is wrong: retrying can't help
+
+# Bybit v5 retCode -> class
+BYBIT_CODES = {
+    "10002": RETRYABLE,        # request time outside recv window
+    "10006": RATE_LIMITED,     # too many visits
+    "10016": RETRYABLE,        # internal server error
+    "10018": RATE_LIMITED,     # IP rate limit
+    "10429": RATE_LIMITED,     # system-level frequency protection
+    "10001": FATAL,            # params error
+    "10003": FATAL,            # invalid api key
+    "10004": FATAL,            # signature error
+    "10005": FATAL,            # permission denied
+    "110001": BENIGN,          # order does not exist (cancel)
+    "110007": FATAL,           # insufficient balance
+    "110017": FATAL,           # qty truncated to zero / below lot
+    "110025": BENIGN,          # position mode not modified
+    "110026": BENIGN,          # cross/isolated margin mode not modified
+    "110043": BENIGN,          # leverage not modified
+    "34036": BENIGN,           # leverage not modified (v3)
+}
+
+# Gate v4 label -> class
+GATE_LABELS = {
+    "TOO_MANY_REQUESTS": RATE_LIMITED,
+    "SERVER_ERROR": RETRYABLE,
+    "TOO_BUSY": RETRYABLE,
+    "ORDER_NOT_FOUND": BENIGN,
+    "INVALID_KEY": FATAL,
+    "INVALID_SIGNATURE": FATAL,
+    "FORBIDDEN": FATAL,
+    "INSUFFICIENT_AVAILABLE": FATAL,
+    "INVALID_PARAM_VALUE": FATAL,
+}
+
+# order rejected because the amount rounds below one lot (skip the leg, don't fail the deal)
+ORDER_TOO_SMALL = {"110017"}
+
+# ccxt class -> class; most specific first (OrderNotFound is an InvalidOrder, ...)
+_CCXT_CLASSES = (
+    (ce.OrderNotFound, BENIGN),
+    (ce.NotSupported, UNSUPPORTED),
+    (ce.RateLimitExceeded, RATE_LIMITED),
+    (ce.DDoSProtection, RATE_LIMITED),
+    (ce.RequestTimeout, RETRYABLE),
+    (ce.ExchangeNotAvailable, RETRYABLE),
+    (ce.OnMaintenance, RETRYABLE),
+    (ce.NetworkError, RETRYABLE),
+    (ce.ExchangeError, FATAL),
+)
+
+_RET_CODE = re.compile(r'"ret_?[cC]ode"\s*:\s*"?(\d+)')
+_LABEL = re.compile(r'"label"\s*:\s*"([A-Z_]+)"')
+
+
+def exchange_code(exc: BaseException) -> Optional[str]:
+    """Venue error code from a ccxt error message: Bybit retCode or Gate label."""
+    msg = str(exc)
+    m = _RET_CODE.search(msg) or _LABEL.search(msg)
+    if m:
+        return m.group(1)
+    # ccxt sometimes only keeps "bybit 110043 leverage not modified"
+    if msg.startswith("bybit"):
+        for code in re.findall(r"\b\d{5,6}\b", msg):
+            if code in BYBIT_CODES:
+                return code
+    return None
+
+
+def classify(exc: BaseException) -> str:
+    """One of BENIGN / UNSUPPORTED / RETRYABLE / RATE_LIMITED / FATAL for any exception from an exchange call."""
+    code = exchange_code(exc)
+    if code is not None:
+        kind = BYBIT_CODES.get(code) or GATE_LABELS.get(code)
+        if kind:
+            return kind
+    msg = str(exc).lower()
+    if "not modified" in msg:
+        return BENIGN
+    for cls, kind in _CCXT_CLASSES:
+        if isinstance(exc, cls):
+            return kind
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return RETRYABLE
+    return FATAL
+
+
+def is_benign(exc: BaseException) -> bool:
+    return classify(exc) == BENIGN
+
+
+def is_unsupported(exc: BaseException) -> bool:
+    return classify(exc) == UNSUPPORTED
+
+
+def is_order_too_small(exc: BaseException) -> bool:
+    return exchange_code(exc) in ORDER_TOO_SMALL or "truncated to zero" in str(exc).lower()
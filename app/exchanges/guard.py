@@ -0,0 +1,176 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from ccxt.base.errors import ExchangeNotAvailable
+
+from app.utils.logger import logger
+from .errors import BENIGN, FATAL, RATE_LIMITED, RETRYABLE, UNSUPPORTED, classify
+
+
+class CircuitOpen(ExchangeNotAvailable):
+    """Endpoint is failing: calls are refused until the breaker lets a probe through."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit open for {name}, retry in {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive transient failures (retryable /
+    rate-limited); open refuses calls for `reset_timeout` seconds, then half-open
+    lets one probe through: success closes, failure re-opens with a doubled timeout
+    (up to `max_timeout`). Fatal and benign errors mean the endpoint answered, so
+    they count as successes.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, reset_timeout: float = 10.0, max_timeout: float = 120.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.base_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            wait = self.opened_at + self.timeout - self.clock()
+            if self.state == "open" and wait <= 0:
+                self.state = "half_open"
+                logger.info(f"🟡 Circuit {self.name}: half-open, probing")
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpen(self.name, max(wait, 0.0))
+
+    def success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"🟢 Circuit {self.name}: closed")
+            self.state, self.failures, self.timeout, self._probing = "closed", 0, self.base_timeout, False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open":
+                self.timeout = min(self.timeout * 2, self.max_timeout)
+            elif self.failures < self.threshold:
+                return
+            if self.state != "open":
+                logger.warning(f"🔴 Circuit {self.name}: open for {self.timeout:.0f}s after {self.failures} failures")
+            self.state, self.opened_at, self._probing = "open", self.clock(), False
+
+
+class RetryBudget:
+    """
+    Retries as a fraction of calls: every call deposits `ratio` tokens, every retry
+    spends one, plus `min_per_second` of refill so a quiet client can still retry.
+    A degraded exchange drains the bucket and retry storms stop by themselves.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, cap: float = 20.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.cap = cap
+        self.clock = clock
+        self.tokens = cap
+        self.last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.cap, self.tokens + (now - self.last) * self.min_per_second)
+        self.last = now
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class ExchangeGuard:
+    """Per-venue circuit breakers (one per endpoint) and a shared retry budget."""
+
+    def __init__(self, venue: str, retries: int = 2, backoff: float = 0.2, threshold: int = 5,
+                 reset_timeout: float = 10.0, budget: Optional[RetryBudget] = None):
+        self.venue = venue
+        self.retries = retries
+        self.backoff = backoff
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.budget = budget or RetryBudget()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, venue: str) -> "ExchangeGuard":
+        return cls(
+            venue,
+            retries=int(os.getenv("EXCHANGE_RETRIES", "2")),
+            threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", "10")),
+            budget=RetryBudget(ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))),
+        )
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(
+                    f"{self.venue}.{endpoint}", self.threshold, self.reset_timeout
+                )
+            return self.breakers[endpoint]
+
+    def call(self, endpoint: str, fn: Callable[..., Any], *args, retry: bool = True, **kwargs) -> Any:
+        """
+        fn(*args, **kwargs) through the endpoint's breaker. Transient errors are retried
+        (retry=True, budget permitting) with jittered backoff; fatal, benign and unsupported
+        errors are raised at once for the caller to handle (see errors.classify).
+        """
+        br = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            br.before()
+            try:
+                res = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify(e)
+                if kind in (RETRYABLE, RATE_LIMITED):
+                    br.failure()
+                else:
+                    br.success()
+                if kind in (FATAL, BENIGN, UNSUPPORTED) or not retry or attempt >= self.retries or not self.budget.withdraw():
+                    raise
+                attempt += 1
+                delay = self.backoff * (2 ** attempt) * (4 if kind == RATE_LIMITED else 1)
+                logger.warning(f"🔁 {self.venue}.{endpoint} {kind}: {e} — retry {attempt} in {delay:.2f}s")
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+            br.success()
+            self.budget.deposit()
+            return res
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "venue": self.venue,
+            "retry_tokens": round(self.budget.tokens, 2),
+            "breakers": {k: b.state for k, b in self.breakers.items() if b.state != "closed"},
+        }
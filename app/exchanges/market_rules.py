@@ -0,0 +1,126 @@
+import json
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_EVEN
+from typing import Any, Dict, Optional, Tuple
+
+
+def to_decimal(x: float) -> Decimal:
+    """Exact decimal of the shortest float repr (0.1 -> Decimal("0.1"), not 0.1000000000000000055...)."""
+    return Decimal(repr(float(x)))
+
+
+_ROUNDING = {"down": ROUND_FLOOR, "up": ROUND_CEILING, "nearest": ROUND_HALF_EVEN}
+
+
+class MarketRules:
+    """
+    Precision/limits helpers derived purely from a ccxt-style market dict.
+    Mixed into exchange implementations that provide `market(symbol)`.
+
+    Quantities and prices are snapped in fixed point: amount -> integer lots of
+    amount_step, price -> integer ticks of price_step, computed in Decimal so
+    0.3 / 0.1 is exactly 3 lots. Back to float through the decimal string, so
+    results are the shortest exact values (0.3, never 0.30000000000000004).
+    """
+
+    def _steps(self, symbol: str) -> Tuple[Decimal, Decimal]:
+        cache: Dict[str, Tuple[Decimal, Decimal]] = self.__dict__.setdefault("_step_cache", {})
+        steps = cache.get(symbol)
+        if steps is None:
+            steps = cache[symbol] = (to_decimal(self.amount_step(symbol)), to_decimal(self.price_step(symbol)))
+        return steps
+
+    # ---------- integer lots / ticks ----------
+
+    def to_lots(self, symbol: str, amount: float, rounding: str = "down") -> int:
+        step = self._steps(symbol)[0]
+        return int((to_decimal(amount) / step).to_integral_value(_ROUNDING[rounding]))
+
+    def from_lots(self, symbol: str, lots: int) -> float:
+        return float(lots * self._steps(symbol)[0])
+
+    def to_ticks(self, symbol: str, price: float, rounding: str = "down") -> int:
+        tick = self._steps(symbol)[1]
+        return int((to_decimal(price) / tick).to_integral_value(_ROUNDING[rounding]))
+
+    def from_ticks(self, symbol: str, ticks: int) -> float:
+        return float(ticks * self._steps(symbol)[1])
+
+    def amount_to_precision(self, symbol: str, amount: float) -> str:
+        """Amount rounded down to the lot step, formatted as the exchange expects ("0.123")."""
+        return format(self.to_lots(symbol, amount) * self._steps(symbol)[0], "f")
+
+    def price_to_precision(self, symbol: str, price: float) -> str:
+        return format(self.to_ticks(symbol, price) * self._steps(symbol)[1], "f")
+
+    def amount_step(self, symbol: str) -> float:
+        m = self.market(symbol)
+        # preferred from precision
+        prec = (m.get("precision") or {}).get("amount")
+        if isinstance(prec, int):
+            return 10 ** (-prec) if prec >= 0 else 1e-6
+        if isinstance(prec, float) and prec > 0:
+            return float(prec)
+        # fallback from limits
+        step = (m.get("limits", {}).get("amount", {}).get("step")
+                or m.get("limits", {}).get("amount", {}).get("min")
+                or 1e-6)
+        return float(step)
+
+    def min_amount(self, symbol: str) -> float:
+        m = self.market(symbol)
+        return float(m.get("limits", {}).get("amount", {}).get("min") or 0.0)
+
+    def min_tradable_amount(self, symbol: str) -> float:
+        return max(self.amount_step(symbol), self.min_amount(symbol))
+
+    def round_amount_down(self, symbol: str, amount: float) -> float:
+        if self.amount_step(symbol) <= 0:
+            return max(amount, 0.0)
+        return self.from_lots(symbol, self.to_lots(symbol, amount))
+
+    def price_step(self, symbol: str) -> float:
+        m = self.market(symbol)
+        prec = (m.get("precision") or {}).get("price")
+        if isinstance(prec, int):
+            return 10 ** (-prec) if prec >= 0 else 1e-2
+        if isinstance(prec, float) and prec > 0:
+            return float(prec)
+        tick = (m.get("limits", {}).get("price", {}).get("step")
+                or m.get("limits", {}).get("price", {}).get("min")
+                or 0.1)
+        return float(tick)
+
+    def round_price_to_tick(self, symbol: str, price: float) -> float:
+        if self.price_step(symbol) <= 0:
+            return price
+        # floor to tick
+        return self.from_ticks(symbol, self.to_ticks(symbol, price))
+
+    # Optional: within price limits helper
+    def clamp_price_to_limits(self, symbol: str, price: float) -> float:
+        m = self.market(symbol)
+        lims = (m.get("limits") or {}).get("price") or {}
+        pmin: Optional[float] = lims.get("min")
+        pmax: Optional[float] = lims.get("max")
+        if pmin is not None and price < pmin:
+            price = pmin
+        if pmax is not None and price > pmax:
+            price = pmax
+        return price
+
+
+# market dict keys the precision helpers need; the rest of ccxt's market (info, fees, ...) is not kept
+FILTER_KEYS = ("symbol", "type", "linear", "contractSize", "precision", "limits")
+
+
+class MarketFilters(MarketRules):
+    """MarketRules over a plain market dict (cached filters, raw ccxt clients, offline tools)."""
+
+    def __init__(self, market: Dict[str, Any]):
+        self._m = {k: market.get(k) for k in FILTER_KEYS if k in market}
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        return self._m
+
+    def fingerprint(self) -> str:
+        return json.dumps(self._m, sort_keys=True, default=str)
@@ -0,0 +1,31 @@
+from typing import Any
+
+from .base import Exchange
+
+# Exchange methods that are REST requests; the rest (market, precision helpers) are local
+REST_METHODS = frozenset({
+    "set_leverage", "last_price", "place_market_order", "place_limit_order", "cancel_orders",
+    "fetch_open_orders", "fetch_positions", "fetch_order", "fetch_order_book", "fetch_ohlcv",
+})
+
+
+class MeteredExchange:
+    """
+    Pass-through wrapper counting the REST requests made through an Exchange, so the
+    monitor loop charges each tick what it actually sent against its REST budget
+    (fill checks, grid follow, TP re-placement, SL close) instead of an estimate.
+    """
+
+    def __init__(self, inner: Exchange):
+        self.inner = inner
+        self.calls = 0
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.inner, name)
+        if name not in REST_METHODS:
+            return attr
+
+        def metered(*args: Any, **kwargs: Any) -> Any:
+            self.calls += 1
+            return attr(*args, **kwargs)
+        return metered
@@ -0,0 +1,222 @@
+import json
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from ccxt.base import errors as ccxt_errors
+
+from .base import Exchange
+from .market_rules import MarketRules
+
+# Polling reads keep returning the last recorded answer once the log runs dry,
+# so a replayed monitor loop can run until its deadline.
+_REPEATABLE = {"last_price", "fetch_open_orders", "fetch_positions", "fetch_order_book"}
+
+
+class ReplayExhausted(RuntimeError):
+    """Replay log has no more recorded responses for the requested call."""
+
+
+def _strip_info(value: Any) -> Any:
+    # ccxt keeps the raw exchange payload under "info" — bulky and unused by the engine
+    if isinstance(value, dict):
+        return {k: _strip_info(v) for k, v in value.items() if k != "info"}
+    if isinstance(value, list):
+        return [_strip_info(v) for v in value]
+    return value
+
+
+def _error_from_record(name: str, msg: str) -> Exception:
+    cls = getattr(ccxt_errors, name, None)
+    if not (isinstance(cls, type) and issubclass(cls, Exception)):
+        cls = ccxt_errors.ExchangeError
+    return cls(msg)
+
+
+class RecordingExchange(MarketRules, Exchange):
+    """
+    Wraps a live Exchange (usually CcxtClient) and appends every request/response
+    to an NDJSON log: one compact line per call, errors included (110017, 110043, ...).
+    Market dicts are recorded once per symbol; precision helpers are derived from them.
+    """
+
+    def __init__(self, inner: Exchange, path: str, keep_info: bool = False):
+        self.inner = inner
+        self.venue = inner.venue
+        self.keep_info = keep_info
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+        self._markets: Dict[str, Dict[str, Any]] = {}
+
+    def close(self):
+        self._fh.close()
+
+    def _write(self, rec: Dict[str, Any]):
+        self._fh.write(json.dumps(rec, separators=(",", ":"), default=str) + "\n")
+        self._fh.flush()
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        rec: Dict[str, Any] = {"m": method, "a": list(args)}
+        if kwargs:
+            rec["k"] = kwargs
+        try:
+            res = getattr(self.inner, method)(*args, **kwargs)
+        except Exception as e:
+            rec["x"] = type(e).__name__
+            rec["e"] = str(e)
+            self._write(rec)
+            raise
+        rec["r"] = res if self.keep_info else _strip_info(res)
+        self._write(rec)
+        return res
+
+    # ---------- Exchange interface ----------
+
+    def set_leverage(self, symbol: str, leverage: int) -> Any:
+        return self._call("set_leverage", symbol, leverage)
+
+    def last_price(self, symbol: str) -> float:
+        return self._call("last_price", symbol)
+
+    def place_market_order(
+        self, symbol: str, side: str, qty: float, reduce_only: bool = False, client_id: Optional[str] = None
+    ) -> Any:
+        return self._call("place_market_order", symbol, side, qty, reduce_only=reduce_only, client_id=client_id)
+
+    def place_limit_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        price: float,
+        reduce_only: bool = False,
+        post_only: bool = True,
+        client_id: Optional[str] = None,
+    ) -> Any:
+        return self._call(
+            "place_limit_order", symbol, side, qty, price,
+            reduce_only=reduce_only, post_only=post_only, client_id=client_id,
+        )
+
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> Any:
+        return self._call("cancel_orders", symbol, list(order_ids))
+
+    def fetch_open_orders(self, symbol: str) -> Any:
+        return self._call("fetch_open_orders", symbol)
+
+    def fetch_positions(self, symbol: str) -> Any:
+        return self._call("fetch_positions", symbol)
+
+    def fetch_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        return self._call("fetch_order", symbol, order_id)
+
+    def fetch_order_book(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
+        return self._call("fetch_order_book", symbol, limit)
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", limit: int = 200) -> List[List[float]]:
+        return self._call("fetch_ohlcv", symbol, timeframe, limit)
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        if symbol not in self._markets:
+            self._markets[symbol] = self._call("market", symbol)
+        return self._markets[symbol]
+
+
+class ReplayExchange(MarketRules, Exchange):
+    """
+    Serves a RecordingExchange log back deterministically, without network.
+    Responses are consumed in order per call (method and every argument, so a qty,
+    price or client id that differs from the recording is not served a wrong answer);
+    `calls` counts every request.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.calls: Counter = Counter()
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._markets: Dict[str, Dict[str, Any]] = {}
+
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if rec["m"] == "market" and "r" in rec:
+                    self._markets[rec["a"][0]] = rec["r"]
+                    continue
+                self._queues.setdefault(self._key(rec["m"], rec["a"], rec.get("k")), deque()).append(rec)
+
+    @staticmethod
+    def _key(method: str, args: List[Any], kwargs: Optional[Dict[str, Any]] = None) -> str:
+        # same JSON round trip as the log, so 0.1 == 0.1 and tuples == lists
+        return json.dumps([method, args, kwargs or {}], sort_keys=True, separators=(",", ":"), default=str)
+
+    def _next(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        self.calls[method] += 1
+        key = self._key(method, json.loads(json.dumps(list(args), default=str)),
+                        json.loads(json.dumps(kwargs, default=str)))
+        q = self._queues.get(key)
+        if q:
+            rec = q.popleft()
+            self._last[key] = rec
+        elif method in _REPEATABLE and key in self._last:
+            rec = self._last[key]
+        else:
+            raise ReplayExhausted(f"No recorded response left for {method}{args}{kwargs or ''}")
+        if "x" in rec:
+            raise _error_from_record(rec["x"], rec.get("e", ""))
+        return rec.get("r")
+
+    # ---------- Exchange interface ----------
+
+    def set_leverage(self, symbol: str, leverage: int) -> Any:
+        return self._next("set_leverage", symbol, leverage)
+
+    def last_price(self, symbol: str) -> float:
+        return float(self._next("last_price", symbol))
+
+    def place_market_order(
+        self, symbol: str, side: str, qty: float, reduce_only: bool = False, client_id: Optional[str] = None
+    ) -> Any:
+        return self._next("place_market_order", symbol, side, qty, reduce_only=reduce_only, client_id=client_id)
+
+    def place_limit_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        price: float,
+        reduce_only: bool = False,
+        post_only: bool = True,
+        client_id: Optional[str] = None,
+    ) -> Any:
+        return self._next(
+            "place_limit_order", symbol, side, qty, price,
+            reduce_only=reduce_only, post_only=post_only, client_id=client_id,
+        )
+
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> Any:
+        return self._next("cancel_orders", symbol, list(order_ids))
+
+    def fetch_open_orders(self, symbol: str) -> Any:
+        return self._next("fetch_open_orders", symbol)
+
+    def fetch_positions(self, symbol: str) -> Any:
+        return self._next("fetch_positions", symbol)
+
+    def fetch_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        return self._next("fetch_order", symbol, order_id)
+
+    def fetch_order_book(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
+        return self._next("fetch_order_book", symbol, limit)
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", limit: int = 200) -> List[List[float]]:
+        return self._next("fetch_ohlcv", symbol, timeframe, limit)
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        mk: Optional[Dict[str, Any]] = self._markets.get(symbol)
+        if mk is None:
+            raise ReplayExhausted(f"No recorded market for {symbol}")
+        return mk
@@ -0,0 +1,329 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .base import Exchange
+from .market_rules import MarketRules
+
+# order ids are namespaced as "<venue>:<exchange id>" so cancels/fetches can be routed back
+_SEP = ":"
+
+
+def _split_id(oid: str) -> Tuple[str, str]:
+    venue, _, raw = oid.partition(_SEP)
+    return venue, raw
+
+
+def _child_id(client_id: Optional[str], venue: str) -> Optional[str]:
+    """Per-venue client order id of a routed order (same leg -> same child ids)."""
+    return f"{client_id}-{venue[:2]}" if client_id else None
+
+
+def _common_step(steps: Iterable[float]) -> float:
+    """
+    Least common multiple of per-venue increments (0.01 and 0.025 -> 0.05): a value on
+    it is valid on every venue, which the largest increment alone is not.
+    """
+    fracs = [Fraction(str(round(s, 12))) for s in steps if s]
+    if not fracs:
+        return 0.0
+    num = math.lcm(*(f.numerator for f in fracs))
+    den = math.gcd(*(f.denominator for f in fracs))
+    return float(Fraction(num, den))
+
+
+class MultiVenueExchange(MarketRules, Exchange):
+    """
+    One Exchange facade over several venues (e.g. Bybit + Gate) trading the same symbol.
+
+    - market orders go to the venue with the best fee-adjusted top of book, or are split
+      across venues by walking the merged, fee-adjusted depth (mode="split"); the
+      consolidated order book itself keeps the venues' raw prices;
+    - resting (maker) orders go to the venue with the lowest maker fee;
+    - reduce-only orders are spread over the venues that hold the position;
+    - positions and open orders are aggregated; amounts are always in base units
+      (per-venue contractSize is applied on the way in and out).
+    """
+
+    def __init__(self, venues: Dict[str, Exchange], mode: str = "best", depth: int = 20):
+        if not venues:
+            raise ValueError("MultiVenueExchange needs at least one venue")
+        self.venues = venues
+        self.primary = next(iter(venues))
+        self.venue = "+".join(venues)
+        self.mode = mode
+        self.depth = depth
+        self._pool = ThreadPoolExecutor(max_workers=len(venues), thread_name_prefix="venue")
+        self._markets: Dict[str, Dict[str, Any]] = {}
+
+    # ---------- internal helpers ----------
+
+    def _each(self, fn) -> Dict[str, Any]:
+        """Run fn(venue, exchange) on all venues concurrently; failures map to the exception."""
+        futs = {v: self._pool.submit(fn, v, ex) for v, ex in self.venues.items()}
+        out: Dict[str, Any] = {}
+        for v, f in futs.items():
+            try:
+                out[v] = f.result()
+            except Exception as e:
+                out[v] = e
+        return out
+
+    def _contract_size(self, venue: str, symbol: str) -> float:
+        return float(self.venues[venue].market(symbol).get("contractSize") or 1.0)
+
+    def _fee(self, venue: str, symbol: str, kind: str) -> float:
+        return float(self.venues[venue].market(symbol).get(kind) or 0.0)
+
+    def _to_venue_qty(self, venue: str, symbol: str, qty: float) -> float:
+        ex = self.venues[venue]
+        return ex.round_amount_down(symbol, qty / self._contract_size(venue, symbol))
+
+    def _venue_positions(self, symbol: str) -> Dict[str, Tuple[str, float, float]]:
+        """venue -> (side, size in base units, entry price) for venues holding a position."""
+        out: Dict[str, Tuple[str, float, float]] = {}
+        for venue, res in self._each(lambda v, ex: ex.fetch_positions(symbol)).items():
+            if isinstance(res, Exception):
+                raise res
+            for p in res:
+                size = float(p.get("contracts") or p.get("size") or 0.0) * self._contract_size(venue, symbol)
+                if p.get("side") in ("long", "short") and size > 0:
+                    out[venue] = (p["side"], size, float(p.get("entryPrice") or 0.0))
+        return out
+
+    def _tag(self, venue: str, order: Dict[str, Any]) -> Dict[str, Any]:
+        order = dict(order)
+        order["id"] = f"{venue}{_SEP}{order['id']}"
+        order["venue"] = venue
+        return order
+
+    def _combine(self, children: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not children:
+            return None
+        if len(children) == 1:
+            return children[0]
+        return {"id": children[0]["id"], "venue": children[0]["venue"], "children": children}
+
+    def _levels(self, symbol: str, side: str) -> List[Tuple[float, float, str]]:
+        """Raw depth of all venues: [(price, base_amount, venue)]; asks for "buy", bids for "sell"."""
+        books = self._each(lambda v, ex: ex.fetch_order_book(symbol, self.depth))
+        levels: List[Tuple[float, float, str]] = []
+        for venue, book in books.items():
+            if isinstance(book, Exception):
+                continue
+            cs = self._contract_size(venue, symbol)
+            for price, amount, *_ in book["asks" if side == "buy" else "bids"]:
+                levels.append((price, amount * cs, venue))
+        return levels
+
+    def quote(self, symbol: str, side: str) -> List[Tuple[float, float, str]]:
+        """
+        Fee-adjusted depth merged across venues: [(effective_price, base_amount, venue)],
+        best first. Buy side walks asks (price * (1 + taker)), sell side walks bids.
+        Used for routing only; fetch_order_book keeps the venues' own prices.
+        """
+        levels: List[Tuple[float, float, str]] = []
+        for price, amount, venue in self._levels(symbol, side):
+            taker = self._fee(venue, symbol, "taker")
+            levels.append((price * (1 + taker) if side == "buy" else price * (1 - taker), amount, venue))
+        levels.sort(key=lambda lv: lv[0], reverse=(side == "sell"))
+        return levels
+
+    def _allocate(self, symbol: str, side: str, qty: float) -> Dict[str, float]:
+        levels = self.quote(symbol, side)
+        if not levels:
+            return {self.primary: qty}
+        if self.mode != "split":
+            return {levels[0][2]: qty}
+
+        alloc: Dict[str, float] = {}
+        remaining = qty
+        for _, amount, venue in levels:
+            take = min(remaining, amount)
+            alloc[venue] = alloc.get(venue, 0.0) + take
+            remaining -= take
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            # deeper than the fetched book: rest goes to the best venue
+            best = levels[0][2]
+            alloc[best] = alloc.get(best, 0.0) + remaining
+        return alloc
+
+    def _place_alloc(self, symbol: str, alloc: Dict[str, float], place) -> List[Dict[str, Any]]:
+        children: List[Dict[str, Any]] = []
+        dust = 0.0
+        for venue, base_qty in sorted(alloc.items(), key=lambda kv: -kv[1]):
+            vq = self._to_venue_qty(venue, symbol, base_qty + dust)
+            if vq < self.venues[venue].min_tradable_amount(symbol):
+                dust += base_qty
+                continue
+            base = vq * self._contract_size(venue, symbol)
+            dust = base_qty + dust - base
+            o = place(venue, self.venues[venue], vq)
+            if o:
+                o = self._tag(venue, o)
+                o["amount"] = base
+                children.append(o)
+        return children
+
+    # ---------- Exchange interface ----------
+
+    def set_leverage(self, symbol: str, leverage: int) -> Any:
+        res = self._each(lambda v, ex: ex.set_leverage(symbol, leverage))
+        for r in res.values():
+            if isinstance(r, Exception):
+                raise r
+        return res
+
+    def warm_account_state(self, targets: Dict[str, int]) -> Dict[str, Any]:
+        return self._each(lambda v, ex: ex.warm_account_state(targets))
+
+    def last_price(self, symbol: str) -> float:
+        return self.venues[self.primary].last_price(symbol)
+
+    def place_market_order(
+        self, symbol: str, side: str, qty: float, reduce_only: bool = False, client_id: Optional[str] = None
+    ) -> Any:
+        if reduce_only:
+            alloc = self._reduce_alloc(symbol, qty)
+        else:
+            alloc = self._allocate(symbol, side, qty)
+        children = self._place_alloc(
+            symbol, alloc, lambda v, ex, q: ex.place_market_order(
+                symbol, side, q, reduce_only=reduce_only, client_id=_child_id(client_id, v)
+            )
+        )
+        return self._combine(children)
+
+    def place_limit_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        price: float,
+        reduce_only: bool = False,
+        post_only: bool = True,
+        client_id: Optional[str] = None,
+    ) -> Any:
+        if reduce_only:
+            alloc = self._reduce_alloc(symbol, qty)
+        else:
+            # resting order: cheapest maker venue (stable order on ties)
+            venue = min(self.venues, key=lambda v: self._fee(v, symbol, "maker"))
+            alloc = {venue: qty}
+        children = self._place_alloc(
+            symbol,
+            alloc,
+            lambda v, ex, q: ex.place_limit_order(
+                symbol, side, q, price, reduce_only=reduce_only, post_only=post_only,
+                client_id=_child_id(client_id, v),
+            ),
+        )
+        return self._combine(children)
+
+    def _reduce_alloc(self, symbol: str, qty: float) -> Dict[str, float]:
+        alloc: Dict[str, float] = {}
+        remaining = qty
+        for venue, (_, size, _) in sorted(self._venue_positions(symbol).items(), key=lambda kv: -kv[1][1]):
+            take = min(remaining, size)
+            alloc[venue] = take
+            remaining -= take
+            if remaining <= 0:
+                break
+        return alloc
+
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> Any:
+        by_venue: Dict[str, List[str]] = {}
+        for oid in order_ids:
+            venue, raw = _split_id(oid)
+            if venue in self.venues:
+                by_venue.setdefault(venue, []).append(raw)
+        return self._each(lambda v, ex: ex.cancel_orders(symbol, by_venue[v]) if v in by_venue else [])
+
+    def fetch_open_orders(self, symbol: str) -> Any:
+        out: List[Dict[str, Any]] = []
+        for venue, res in self._each(lambda v, ex: ex.fetch_open_orders(symbol)).items():
+            if isinstance(res, Exception):
+                raise res
+            cs = self._contract_size(venue, symbol)
+            for o in res:
+                o = self._tag(venue, o)
+                if o.get("amount") is not None:
+                    o["amount"] = float(o["amount"]) * cs
+                out.append(o)
+        return out
+
+    def fetch_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        venue, raw = _split_id(order_id)
+        if venue not in self.venues:
+            raise ValueError(f"Unknown venue in order id {order_id}")
+        o = self._tag(venue, self.venues[venue].fetch_order(symbol, raw))
+        cs = self._contract_size(venue, symbol)
+        for k in ("amount", "filled"):
+            if o.get(k) is not None:
+                o[k] = float(o[k]) * cs
+        return o
+
+    def fetch_positions(self, symbol: str) -> Any:
+        """One aggregated position: summed base size and size-weighted entry price."""
+        per_venue = self._venue_positions(symbol)
+        if not per_venue:
+            return []
+        sides = {side for side, _, _ in per_venue.values()}
+        if len(sides) > 1:
+            raise ValueError(f"Opposite positions across venues for {symbol}: {per_venue}")
+        size = sum(s for _, s, _ in per_venue.values())
+        avg = sum(s * px for _, s, px in per_venue.values()) / size
+        return [{
+            "symbol": symbol,
+            "side": sides.pop(),
+            "contracts": size,
+            "entryPrice": avg,
+            "venues": {v: {"size": s, "entryPrice": px} for v, (_, s, px) in per_venue.items()},
+        }]
+
+    def fetch_order_book(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
+        """Consolidated book at the venues' quoted prices (base amounts summed per price)."""
+        book: Dict[str, Any] = {}
+        for key, side in (("bids", "sell"), ("asks", "buy")):
+            merged: Dict[float, float] = {}
+            for price, amount, _ in self._levels(symbol, side):
+                merged[price] = merged.get(price, 0.0) + amount
+            book[key] = [[p, a] for p, a in sorted(merged.items(), reverse=(key == "bids"))[:limit]]
+        return book
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", limit: int = 200) -> List[List[float]]:
+        return self.venues[self.primary].fetch_ohlcv(symbol, timeframe, limit)
+
+    # ---------- market helpers (rules valid on every venue, in base units) ----------
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        if symbol in self._markets:
+            return self._markets[symbol]
+        steps, mins, ticks, pmins, pmaxs = [], [], [], [], []
+        for venue, ex in self.venues.items():
+            cs = self._contract_size(venue, symbol)
+            steps.append(ex.amount_step(symbol) * cs)
+            mins.append(ex.min_tradable_amount(symbol) * cs)
+            ticks.append(ex.price_step(symbol))
+            lims = (ex.market(symbol).get("limits") or {}).get("price") or {}
+            if lims.get("min") is not None:
+                pmins.append(lims["min"])
+            if lims.get("max") is not None:
+                pmaxs.append(lims["max"])
+        mk = dict(self.venues[self.primary].market(symbol))
+        mk["contractSize"] = 1.0
+        mk["precision"] = {"amount": _common_step(steps), "price": _common_step(ticks)}
+        mk["limits"] = {
+            "amount": {"min": max(mins)},
+            "price": {"min": max(pmins) if pmins else None, "max": min(pmaxs) if pmaxs else None},
+        }
+        self._markets[symbol] = mk
+        return mk
+
+
+def venues_from_env() -> List[str]:
+    return [v.strip().lower() for v in (os.getenv("EXCHANGE") or "bybit").split(",") if v.strip()]
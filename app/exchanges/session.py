@@ -0,0 +1,207 @@
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import create_connection
+from urllib3.util.retry import Retry
+
+# ccxt renamed "gateio" to "gate"; "gate" exists in every supported ccxt version
+_EX_MAP = {"bybit": "bybit", "gate": "gate", "gateio": "gate"}
+
+
+def _env_int(name: str, default: int) -> int:
+    v = os.getenv(name)
+    return int(v) if v else default
+
+
+def _env_float(name: str, default: float) -> float:
+    v = os.getenv(name)
+    return float(v) if v else default
+
+
+# ---------- DNS cache ----------
+
+class DnsCache:
+    """
+    getaddrinfo results per (host, port) for `ttl` seconds. Used only by the
+    connections of the session that owns it; socket.getaddrinfo is left alone.
+    """
+
+    def __init__(self, ttl: float, resolve: Callable[..., Any] = socket.getaddrinfo):
+        self.ttl = ttl
+        self._resolve = resolve
+        self._cache: Dict[Tuple[str, int], Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> str:
+        """Address to connect to for host:port (cached)."""
+        key = (host, port)
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+        addr = self._resolve(host, port, 0, socket.SOCK_STREAM)[0][4][0]
+        with self._lock:
+            self._cache[key] = (now + self.ttl, addr)
+        return addr
+
+    def forget(self, host: str, port: int):
+        """Drop an address that failed to connect: the next connect resolves again."""
+        with self._lock:
+            self._cache.pop((host, port), None)
+
+
+class _DnsCachedConnection:
+    """Connection mixin: connects to the DnsCache address; TLS still verifies `host`."""
+
+    dns: Optional[DnsCache] = None
+
+    def _new_conn(self) -> socket.socket:
+        if self.dns is None:
+            return super()._new_conn()
+        try:
+            addr = self.dns.resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        try:
+            return create_connection(
+                (addr, self.port), self.timeout,
+                source_address=self.source_address, socket_options=self.socket_options,
+            )
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            self.dns.forget(self._dns_host, self.port)
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+
+def _pool_classes(dns: DnsCache) -> Dict[str, type]:
+    """urllib3 pool classes whose connections resolve through `dns`."""
+    return {
+        scheme: type(pool.__name__, (pool,), {
+            "ConnectionCls": type(pool.ConnectionCls.__name__, (_DnsCachedConnection, pool.ConnectionCls), {"dns": dns}),
+        })
+        for scheme, pool in (("http", HTTPConnectionPool), ("https", HTTPSConnectionPool))
+    }
+
+
+# ---------- pooled HTTP session ----------
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with TCP keep-alive on pooled sockets, so idle connections stay warm,
+    and (with `dns`) a DNS cache for the connections it opens.
+    """
+
+    def __init__(self, *args, dns: Optional[DnsCache] = None, **kwargs):
+        self.dns = dns
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        opts = list(HTTPConnection.default_socket_options)
+        opts.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            opts.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, _env_int("HTTP_KEEPALIVE_IDLE", 30)))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            opts.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10))
+        kwargs["socket_options"] = opts
+        super().init_poolmanager(*args, **kwargs)
+        if self.dns is not None:
+            self.poolmanager.pool_classes_by_scheme = _pool_classes(self.dns)
+
+
+def create_session(dns: Optional[DnsCache] = None) -> requests.Session:
+    """
+    requests.Session tuned from env:
+      HTTP_POOL_SIZE (connections kept per host), HTTP_RETRIES, HTTP_BACKOFF (seconds),
+      HTTP_BACKOFF_JITTER (seconds), HTTP_KEEPALIVE_IDLE (seconds), HTTP_DNS_TTL (seconds
+      new connections reuse a resolved address, 0 = off; `dns` overrides it).
+
+    Only failed connects are retried here (the request never left): read errors and
+    5xx go back to ExchangeGuard, which owns retries, the retry budget and breakers.
+    """
+    pool = _env_int("HTTP_POOL_SIZE", 20)
+    retries = _env_int("HTTP_RETRIES", 1)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=_env_float("HTTP_BACKOFF", 0.2),
+        backoff_jitter=_env_float("HTTP_BACKOFF_JITTER", 0.2),
+        raise_on_status=False,
+    )
+    dns_ttl = _env_float("HTTP_DNS_TTL", 300.0)
+    if dns is None and dns_ttl > 0:
+        dns = DnsCache(dns_ttl)
+    adapter = _KeepAliveAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=retry, dns=dns)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """One pooled session per process, shared by every ccxt instance."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def default_venue() -> str:
+    """First venue from EXCHANGE (which may list several, e.g. "bybit,gate")."""
+    return (os.getenv("EXCHANGE") or "bybit").split(",")[0].strip().lower()
+
+
+def build_exchange(ex_name: Optional[str] = None, load_markets: bool = True) -> ccxt.Exchange:
+    """
+    Create a ccxt exchange for USDT perpetuals from env (EXCHANGE, API_KEY, API_SECRET, TESTNET),
+    wired to the shared pooled session. HTTP_TIMEOUT_MS sets the per-request timeout.
+    """
+    ex_name = (ex_name or default_venue()).lower()
+    ccxt_id = _EX_MAP.get(ex_name)
+    if not ccxt_id:
+        raise ValueError(f"Unknown exchange: {ex_name}")
+
+    # per-venue keys (BYBIT_API_KEY, GATE_API_KEY, ...) win over the generic ones
+    prefix = ex_name.upper()
+    api_key = os.getenv(f"{prefix}_API_KEY") or os.getenv("API_KEY") or os.getenv("BYBIT_API_KEY")
+    api_secret = os.getenv(f"{prefix}_API_SECRET") or os.getenv("API_SECRET") or os.getenv("BYBIT_API_SECRET")
+    testnet = (os.getenv("TESTNET", "true").lower() == "true")
+
+    client = getattr(ccxt, ccxt_id)(
+        {
+            "apiKey": api_key,
+            "secret": api_secret,
+            "enableRateLimit": True,
+            "timeout": _env_int("HTTP_TIMEOUT_MS", 10000),
+            "session": shared_session(),
+            "options": {
+                "defaultType": "swap",   # USDT Perpetual
+                "defaultSettle": "USDT",
+            },
+        }
+    )
+    if hasattr(client, "set_sandbox_mode"):
+        client.set_sandbox_mode(testnet)
+    if load_markets:
+        client.load_markets()
+    return client
@@ -0,0 +1,238 @@
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ccxt.base.errors import InvalidOrder, OrderNotFound
+
+from app.archive import timeframe_ms
+from .base import Exchange
+from .market_rules import MarketRules
+
+
+class CcxtView:
+    """
+    ccxt-style facade over a SimulatedExchange (`sim.client`), for code written against
+    a raw ccxt client: API endpoints, the kill-switch, load tests.
+    """
+
+    def __init__(self, sim: "SimulatedExchange"):
+        self.sim = sim
+
+    def fetch_ticker(self, symbol: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {"symbol": symbol, "last": self.sim.mid, "timestamp": int(time.time() * 1000)}
+
+    def fetch_positions(self, symbols: Optional[List[str]] = None, params: Optional[Dict[str, Any]] = None):
+        with self.sim._lock:
+            return [dict(p) for s, p in self.sim.positions.items() if not symbols or s in symbols]
+
+    def fetch_open_orders(self, symbol: Optional[str] = None, since=None, limit=None, params=None):
+        with self.sim._lock:
+            return [dict(o) for o in self.sim.orders.values() if symbol is None or o["symbol"] == symbol]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None, limit: int = 200,
+                    params: Optional[Dict[str, Any]] = None) -> List[List[float]]:
+        """Flat candles at the current mid (the simulator keeps no history)."""
+        tf = timeframe_ms(timeframe)
+        now = int(time.time() * 1000)
+        start = since if since is not None else now - now % tf - (limit - 1) * tf
+        mid = self.sim.mid
+        return [[t, mid, mid, mid, mid, 0.0] for t in range(start - start % tf, now + 1, tf)][:limit]
+
+
+class SimulatedExchange(MarketRules, Exchange):
+    """
+    In-memory linear perpetual with a synthetic order book, for offline runs and load tests.
+
+    Market orders walk the book and consume liquidity (it refills by `replenish` of the
+    original level size on every price move), resting limit orders fill when `set_price`
+    crosses them, and one net position per symbol tracks a size-weighted entry price.
+    """
+
+    def __init__(
+        self,
+        mid: float = 100.0,
+        tick: float = 0.1,
+        step: float = 0.001,
+        depth: int = 50,
+        level_size: float = 1.0,
+        taker: float = 0.00055,
+        maker: float = 0.0002,
+        replenish: float = 1.0,
+    ):
+        self.venue = "sim"
+        self.mid = mid
+        self.tick = tick
+        self.step = step
+        self.depth = depth
+        self.level_size = level_size
+        self.taker = taker
+        self.maker = maker
+        self.replenish = replenish
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.done: Dict[str, Dict[str, Any]] = {}      # filled / cancelled orders, for fetch_order
+        self.by_client_id: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.bids: List[List[float]] = []
+        self.asks: List[List[float]] = []
+        self._build_book()
+        self.client = CcxtView(self)
+
+    # ---------- simulation controls ----------
+
+    def _build_book(self):
+        best_bid = self.mid - self.tick / 2
+        best_ask = self.mid + self.tick / 2
+        self.bids = [[best_bid - i * self.tick, self.level_size] for i in range(self.depth)]
+        self.asks = [[best_ask + i * self.tick, self.level_size] for i in range(self.depth)]
+
+    def set_price(self, mid: float):
+        """Move the market: book re-centres/refills and crossed resting orders fill."""
+        with self._lock:
+            self.mid = mid
+            old = {round(p, 10): s for p, s in self.bids + self.asks}
+            self._build_book()
+            for lv in self.bids + self.asks:
+                left = old.get(round(lv[0], 10), self.level_size)
+                lv[1] = min(self.level_size, left + self.replenish * self.level_size)
+            for oid, o in list(self.orders.items()):
+                crossed = (o["side"] == "buy" and mid <= o["price"]) or (o["side"] == "sell" and mid >= o["price"])
+                if crossed:
+                    self._close(oid, "closed")
+                    self._apply_fill(o["symbol"], o["side"], o["amount"], o["price"], o["reduceOnly"])
+
+    def _close(self, oid: str, status: str) -> Dict[str, Any]:
+        o = self.orders.pop(oid)
+        o["status"] = status
+        if status == "closed":
+            o["filled"], o["average"] = o["amount"], o["price"]
+        else:
+            o["filled"] = 0.0
+        self.done[oid] = o
+        return o
+
+    def _apply_fill(self, symbol: str, side: str, qty: float, price: float, reduce_only: bool):
+        signed = qty if side == "buy" else -qty
+        pos = self.positions.get(symbol)
+        cur = 0.0 if pos is None else (pos["contracts"] if pos["side"] == "long" else -pos["contracts"])
+        if reduce_only and (cur == 0 or (cur > 0) == (signed > 0)):
+            return
+        new = cur + signed
+        if reduce_only and (new > 0) != (cur > 0):
+            new = 0.0
+        if abs(new) < self.step / 2:
+            self.positions.pop(symbol, None)
+            return
+        if cur == 0 or (cur > 0) != (new > 0):
+            entry = price
+        elif abs(new) > abs(cur):
+            entry = (abs(cur) * pos["entryPrice"] + qty * price) / abs(new)
+        else:
+            entry = pos["entryPrice"]
+        self.positions[symbol] = {
+            "symbol": symbol,
+            "side": "long" if new > 0 else "short",
+            "contracts": abs(new),
+            "entryPrice": entry,
+        }
+
+    # ---------- Exchange interface ----------
+
+    def set_leverage(self, symbol: str, leverage: int) -> Any:
+        return {"info": {"retCode": 0}}
+
+    def last_price(self, symbol: str) -> float:
+        return self.mid
+
+    def place_market_order(
+        self, symbol: str, side: str, qty: float, reduce_only: bool = False, client_id: Optional[str] = None
+    ) -> Any:
+        if client_id in self.by_client_id:
+            return dict(self.by_client_id[client_id])
+        with self._lock:
+            levels = self.asks if side == "buy" else self.bids
+            remaining, notional = qty, 0.0
+            for lv in levels:
+                take = min(remaining, lv[1])
+                lv[1] -= take
+                notional += take * lv[0]
+                remaining -= take
+                if remaining <= 1e-12:
+                    break
+            if remaining > 1e-12:
+                # book exhausted: the rest fills one tick beyond the last level
+                notional += remaining * (levels[-1][0] + (self.tick if side == "buy" else -self.tick))
+            avg = notional / qty
+            self._apply_fill(symbol, side, qty, avg, reduce_only)
+            oid = str(next(self._ids))
+        order = {"id": oid, "clientOrderId": client_id, "symbol": symbol, "type": "market", "side": side,
+                 "amount": qty, "filled": qty, "average": avg, "status": "closed"}
+        self.done[oid] = order
+        if client_id:
+            self.by_client_id[client_id] = order
+        return dict(order)
+
+    def place_limit_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        price: float,
+        reduce_only: bool = False,
+        post_only: bool = True,
+        client_id: Optional[str] = None,
+    ) -> Any:
+        if client_id in self.by_client_id:
+            return dict(self.by_client_id[client_id])
+        with self._lock:
+            crosses = (side == "buy" and price >= self.asks[0][0]) or (side == "sell" and price <= self.bids[0][0])
+            if post_only and crosses:
+                raise InvalidOrder(f"PostOnly order would cross the book: {side} @ {price}")
+            oid = str(next(self._ids))
+            order = {"id": oid, "clientOrderId": client_id, "symbol": symbol, "type": "limit", "side": side,
+                     "price": price, "amount": qty, "reduceOnly": reduce_only, "status": "open"}
+            self.orders[oid] = order
+            if client_id:
+                self.by_client_id[client_id] = order
+        return dict(order)
+
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> Any:
+        with self._lock:
+            return [dict(self._close(oid, "canceled")) for oid in order_ids if oid in self.orders]
+
+    def fetch_open_orders(self, symbol: str) -> Any:
+        with self._lock:
+            return [dict(o) for o in self.orders.values() if o["symbol"] == symbol]
+
+    def fetch_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        with self._lock:
+            o = self.orders.get(order_id) or self.done.get(order_id)
+            if o is None:
+                raise OrderNotFound(f"Order {order_id} not found")
+            return dict(o)
+
+    def fetch_positions(self, symbol: str) -> Any:
+        with self._lock:
+            pos: Optional[Dict[str, Any]] = self.positions.get(symbol)
+            return [dict(pos)] if pos else []
+
+    def fetch_order_book(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bids": [[p, s] for p, s in self.bids if s > 0][:limit],
+                "asks": [[p, s] for p, s in self.asks if s > 0][:limit],
+            }
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        return {
+            "symbol": symbol,
+            "type": "swap",
+            "linear": True,
+            "contractSize": 1.0,
+            "taker": self.taker,
+            "maker": self.maker,
+            "precision": {"amount": self.step, "price": self.tick},
+            "limits": {"amount": {"min": self.step}, "price": {"min": self.tick, "max": None}},
+        }
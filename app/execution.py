@@ -0,0 +1,213 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.exchanges.base import Exchange
+from app.models import ExecutionConfig
+from app.utils.logger import logger
+
+
+def walk_book(levels: Sequence[Sequence[float]], qty: float) -> Tuple[float, float]:
+    """Fill qty against book levels best-first; returns (filled qty, notional)."""
+    filled, notional = 0.0, 0.0
+    for price, amount, *_ in levels:
+        take = min(qty - filled, amount)
+        filled += take
+        notional += take * price
+        if filled >= qty:
+            break
+    return filled, notional
+
+
+def estimate_impact(book: Dict[str, Any], side: str, qty: float) -> Dict[str, float]:
+    """Expected average price and slippage (percent from best) of a market order of qty."""
+    levels = book["asks"] if side == "buy" else book["bids"]
+    if not levels:
+        return {"best": 0.0, "avg": 0.0, "filled": 0.0, "slippage_percent": 0.0}
+    best = float(levels[0][0])
+    filled, notional = walk_book(levels, qty)
+    avg = notional / filled if filled else best
+    return {
+        "best": best,
+        "avg": avg,
+        "filled": filled,
+        "slippage_percent": abs(avg - best) / best * 100.0,
+    }
+
+
+def band_liquidity(book: Dict[str, Any], side: str, max_slippage_percent: float) -> float:
+    """Quantity available within max_slippage_percent of the best price."""
+    levels = book["asks"] if side == "buy" else book["bids"]
+    if not levels:
+        return 0.0
+    best = float(levels[0][0])
+    limit = best * (1 + max_slippage_percent / 100.0) if side == "buy" else best * (1 - max_slippage_percent / 100.0)
+    total = 0.0
+    for price, amount, *_ in levels:
+        if (side == "buy" and price > limit) or (side == "sell" and price < limit):
+            break
+        total += amount
+    return total
+
+
+class EntryExecutor:
+    """
+    Splits an entry into child orders using the live order book.
+
+    - twap:    `slices` equal market children every `interval_seconds`;
+    - depth:   each market child takes `participation_rate` of the liquidity within
+               `max_slippage_percent` of the best price;
+    - iceberg: one post-only limit slice of `display_amount` USDT (qty / `slices`
+               without it) rests at the touch; it is refilled when it fills and
+               re-pegged when the touch moves away, polled every `interval_seconds`.
+    Every market child is also capped by participation_rate x band liquidity, so no
+    child walks the book further than the configured band.
+
+    A child whose filled amount the venue does not report (not even on re-fetch)
+    stops the entry: it is returned under "unconfirmed" instead of being counted,
+    so an unknown fill is never taken for a full one and nothing is over-bought.
+    """
+
+    def __init__(self, ex: Exchange, cfg: ExecutionConfig, sleep=time.sleep):
+        self.ex = ex
+        self.cfg = cfg
+        self.sleep = sleep
+
+    def _target(self, remaining: float, slices_left: int) -> float:
+        if self.cfg.algo == "twap":
+            return remaining / max(slices_left, 1)
+        return remaining
+
+    def _wait(self) -> bool:
+        """Pause between children; True when the deal is stopping (the engine passes its stop event's wait())."""
+        return bool(self.sleep(self.cfg.interval_seconds))
+
+    def _state(self, symbol: str, o: Any) -> Dict[str, Any]:
+        """The order with its fill known if the venue can tell: create responses often lack it."""
+        o = o or {}
+        if o.get("filled") is not None or not o.get("id"):
+            return o
+        try:
+            return self.ex.fetch_order(symbol, o["id"]) or o
+        except Exception as e:
+            logger.warning(f"⚠️ Can't re-fetch entry child {o['id']}: {e}")
+            return o
+
+    def execute(self, symbol: str, side: str, qty: float, client_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns {"filled", "avg_price", "orders", "unconfirmed"}; avg_price is size-weighted
+        over child fills. With `client_id`, child n is sent as "<client_id>s<n>".
+        """
+        if self.cfg.algo == "iceberg":
+            return self._iceberg(symbol, side, qty, client_id)
+
+        step = self.ex.amount_step(symbol)
+        min_trade = self.ex.min_tradable_amount(symbol)
+        filled, notional = 0.0, 0.0
+        orders: List[Any] = []
+        unconfirmed: List[Any] = []
+        slices_left = max(self.cfg.slices, 1)
+        # hard stop so a dry book can't keep us here forever
+        max_children = max(self.cfg.slices, 1) * 20
+
+        while qty - filled >= min_trade and len(orders) < max_children:
+            remaining = self.ex.round_amount_down(symbol, qty - filled)
+            book = self.ex.fetch_order_book(symbol, self.cfg.depth_levels)
+            impact = estimate_impact(book, side, remaining)
+            band = band_liquidity(book, side, self.cfg.max_slippage_percent)
+
+            child = min(remaining, self._target(remaining, slices_left))
+            if band > 0:
+                child = min(child, band * self.cfg.participation_rate)
+            child = self.ex.round_amount_down(symbol, max(child, min_trade))
+            # don't leave an untradable tail behind
+            if remaining - child < min_trade:
+                child = remaining
+
+            est = estimate_impact(book, side, child)
+            logger.info(
+                f"🪓 Entry slice {len(orders) + 1}: algo={self.cfg.algo}, child={child}, remaining={remaining}, "
+                f"band_liq={band}, est_avg={est['avg']}, est_slippage={est['slippage_percent']:.4f}%, step={step}"
+            )
+            cid = f"{client_id}s{len(orders) + 1}" if client_id else None
+            o = self._state(symbol, self.ex.place_market_order(symbol, side, child, reduce_only=False, client_id=cid))
+            orders.append(o)
+            if o.get("filled") is None:
+                logger.warning(f"⚠️ Entry slice {len(orders)}: fill unknown — stopping the entry at {filled}/{qty}")
+                unconfirmed.append(o)
+                break
+
+            got = float(o["filled"])
+            px = float(o.get("average") or est["avg"] or impact["best"])
+            filled += got
+            notional += got * px
+            slices_left -= 1
+
+            if qty - filled >= min_trade and self._wait():
+                logger.info(f"⏹ Entry interrupted after {len(orders)} children: filled={filled}/{qty}")
+                break
+
+        return self._result(qty, filled, notional, orders, unconfirmed)
+
+    def _iceberg(self, symbol: str, side: str, qty: float, client_id: Optional[str]) -> Dict[str, Any]:
+        min_trade = self.ex.min_tradable_amount(symbol)
+        filled, notional = 0.0, 0.0
+        orders: List[Any] = []
+        unconfirmed: List[Any] = []
+        max_children = max(self.cfg.slices, 1) * 20
+        polls = max_children * 10
+
+        while qty - filled >= min_trade and len(orders) < max_children and polls > 0:
+            remaining = self.ex.round_amount_down(symbol, qty - filled)
+            book = self.ex.fetch_order_book(symbol, 1)
+            touch_levels = book["bids"] if side == "buy" else book["asks"]
+            if not touch_levels:
+                logger.warning("⚠️ Iceberg: empty book side, waiting")
+                polls -= 1
+                if self._wait():
+                    break
+                continue
+            touch = float(touch_levels[0][0])
+            display = self.cfg.display_amount / touch if self.cfg.display_amount else qty / max(self.cfg.slices, 1)
+            child = self.ex.round_amount_down(symbol, max(min(display, remaining), min_trade))
+            if remaining - child < min_trade:
+                child = remaining
+
+            cid = f"{client_id}s{len(orders) + 1}" if client_id else None
+            logger.info(f"🧊 Iceberg slice {len(orders) + 1}: {side} {child} @ {touch}, remaining={remaining}")
+            o = self.ex.place_limit_order(symbol, side, child, touch, reduce_only=False, post_only=True, client_id=cid)
+            orders.append(o)
+
+            # rest until the slice fills, the touch moves away from it or the deal stops
+            st, stopping = o, False
+            while polls > 0:
+                polls -= 1
+                stopping = self._wait()
+                st = self._state(symbol, self.ex.fetch_order(symbol, o["id"]))
+                if st.get("status") == "closed" or stopping:
+                    break
+                top = self.ex.fetch_order_book(symbol, 1)["bids" if side == "buy" else "asks"]
+                if top and (float(top[0][0]) > touch if side == "buy" else float(top[0][0]) < touch):
+                    logger.info(f"🧊 Touch moved {touch} -> {top[0][0]}: re-pegging")
+                    break
+            if st.get("status") != "closed":
+                self.ex.cancel_orders(symbol, [o["id"]])
+                st = self._state(symbol, self.ex.fetch_order(symbol, o["id"]))
+            orders[-1] = st
+            if st.get("filled") is None:
+                logger.warning(f"⚠️ Iceberg slice {len(orders)}: fill unknown — stopping the entry at {filled}/{qty}")
+                unconfirmed.append(st)
+                break
+            got = float(st["filled"])
+            filled += got
+            notional += got * float(st.get("average") or touch)
+            if stopping:
+                logger.info(f"⏹ Entry interrupted after {len(orders)} slices: filled={filled}/{qty}")
+                break
+
+        return self._result(qty, filled, notional, orders, unconfirmed)
+
+    @staticmethod
+    def _result(qty: float, filled: float, notional: float, orders: List[Any], unconfirmed: List[Any]) -> Dict[str, Any]:
+        avg = notional / filled if filled else 0.0
+        logger.info(f"✅ Entry executed: filled={filled}/{qty}, avg={avg}, children={len(orders)}")
+        return {"filled": filled, "avg_price": avg, "orders": orders, "unconfirmed": unconfirmed}
@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from app.db import TradeEvent
+
+COLUMNS = [c.name for c in TradeEvent.__table__.columns]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def iter_event_chunks(
+    engine,
+    symbol: Optional[str] = None,
+    type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = 5000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield events as lists of row dicts, oldest first, `chunk_size` rows at a time.
+    Rows come from a server-side cursor (stream_results), so nothing beyond one
+    chunk is held in memory regardless of how many rows match.
+    """
+    table = TradeEvent.__table__
+    stmt = select(table)
+    if symbol:
+        stmt = stmt.where(table.c.symbol == symbol)
+    if type:
+        stmt = stmt.where(table.c.type == type)
+    if start:
+        stmt = stmt.where(table.c.ts >= start)
+    if end:
+        stmt = stmt.where(table.c.ts < end)
+    stmt = stmt.order_by(table.c.ts, table.c.id)
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for part in result.mappings().partitions():
+            yield [dict(r) for r in part]
+
+
+def _iso(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+
+def stream_csv(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows([_iso(r[c]) for c in COLUMNS] for r in rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def stream_ndjson(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    for rows in chunks:
+        yield "".join(json.dumps({c: _iso(r[c]) for c in COLUMNS}) + "\n" for r in rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the caller between row groups."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def stream_parquet(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """One Parquet row group per chunk; needs pyarrow (optional dependency)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("ts", pa.timestamp("us")),
+        ("type", pa.string()),
+        ("symbol", pa.string()),
+        ("side", pa.string()),
+        ("price", pa.float64()),
+        ("qty", pa.float64()),
+        ("extra", pa.string()),
+        ("deal_id", pa.string()),
+        ("run_id", pa.string()),
+        ("account", pa.string()),
+        ("venue", pa.string()),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
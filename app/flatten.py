@@ -0,0 +1,142 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.utils.logger import logger
+
+# Bybit v5 linear; other venues ignore what they don't know
+_PARAMS = {"category": "linear", "settleCoin": "USDT"}
+_BATCH = 10          # createOrders batch size (Bybit v5 / Gate limit)
+
+
+def _open_positions(client) -> List[Dict[str, Any]]:
+    return [p for p in client.fetch_positions(None, params=dict(_PARAMS)) if float(p.get("contracts") or 0) > 0]
+
+
+def _close_order(p: Dict[str, Any]) -> Dict[str, Any]:
+    side = "sell" if (p.get("side") or "").lower() == "long" else "buy"
+    return {
+        "symbol": p["symbol"],
+        "type": "market",
+        "side": side,
+        "amount": float(p["contracts"]),
+        "price": None,
+        "params": {"category": "linear", "reduceOnly": True},
+    }
+
+
+class Flattener:
+    """
+    Kill-switch: cancel every open order and close every position on all venues.
+
+    Per venue, the cancel-all and the position fetch run in parallel. Then all
+    reduce-only market closes go out at once, batched through createOrders where
+    the venue supports it. Venues run concurrently, so time-to-flat is a few
+    round-trips whatever the number of symbols. Whatever is still open after a
+    pass is retried up to `retries` times.
+    """
+
+    def __init__(self, clients: Dict[str, Any], retries: int = 2, workers: int = 16):
+        self.clients = clients            # venue -> raw ccxt client
+        self.retries = retries
+        # nested waits (venue -> cancel -> per-symbol) block at most 2 workers per venue
+        self.workers = max(workers, 2 * len(clients) + 4)
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    # ---------- orders ----------
+
+    def _cancel_all(self, client) -> Dict[str, Any]:
+        try:
+            # one request for the whole account where the venue allows it
+            client.cancel_all_orders(None, dict(_PARAMS))
+            return {"ok": True, "symbols": "all"}
+        except Exception as first:
+            try:
+                symbols = sorted({o["symbol"] for o in client.fetch_open_orders(None, None, None, dict(_PARAMS))})
+            except Exception:
+                return {"ok": False, "error": str(first)}
+            futs = {s: self._pool.submit(client.cancel_all_orders, s, {"category": "linear"}) for s in symbols}
+            errors = {}
+            for s, f in futs.items():
+                try:
+                    f.result()
+                except Exception as e:
+                    errors[s] = str(e)
+            return {"ok": not errors, "symbols": symbols, "errors": errors}
+
+    # ---------- positions ----------
+
+    def _close(self, client, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        orders = [_close_order(p) for p in positions]
+        if client.has.get("createOrders") and len(orders) > 1:
+            chunks = [orders[i:i + _BATCH] for i in range(0, len(orders), _BATCH)]
+            futs = [(c, self._pool.submit(client.create_orders, c)) for c in chunks]
+        else:
+            futs = [([o], self._pool.submit(
+                client.create_order, o["symbol"], "market", o["side"], o["amount"], None, o["params"]
+            )) for o in orders]
+
+        out = []
+        for chunk, f in futs:
+            try:
+                res = f.result()
+                res = res if isinstance(res, list) else [res]
+                for o, r in zip(chunk, res):
+                    out.append({"symbol": o["symbol"], "side": o["side"], "amount": o["amount"],
+                                "id": (r or {}).get("id"), "ok": True})
+            except Exception as e:
+                out.extend({"symbol": o["symbol"], "side": o["side"], "amount": o["amount"],
+                            "ok": False, "error": str(e)} for o in chunk)
+        return out
+
+    def _flatten_venue(self, venue: str, client) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        cancel_f = self._pool.submit(self._cancel_all, client)
+        report: Dict[str, Any] = {"venue": venue, "closes": [], "passes": 0}
+        try:
+            positions = _open_positions(client)
+        except Exception as e:
+            positions = []
+            report["error"] = f"fetch_positions: {e}"
+
+        for attempt in range(self.retries + 1):
+            if not positions:
+                break
+            report["passes"] += 1
+            report["closes"] += self._close(client, positions)
+            try:
+                positions = _open_positions(client)
+            except Exception as e:
+                report["error"] = f"fetch_positions: {e}"
+                break
+
+        report["cancel"] = cancel_f.result()
+        report["remaining"] = [
+            {"symbol": p["symbol"], "side": p.get("side"), "contracts": p.get("contracts")} for p in positions
+        ]
+        report["flat"] = not positions and report["cancel"].get("ok", False) and "error" not in report
+        report["elapsed_ms"] = round((time.perf_counter() - t0) * 1000)
+        return report
+
+    def run(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        logger.warning(f"🧯 Flatten-all on {', '.join(self.clients)}")
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="flatten") as self._pool:
+            futs = [self._pool.submit(self._flatten_venue, v, c) for v, c in self.clients.items()]
+            venues = [f.result() for f in futs]
+        report = {
+            "flat": all(v["flat"] for v in venues),
+            "venues": venues,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000),
+        }
+        logger.warning(f"🧯 Flatten-all done: flat={report['flat']} in {report['elapsed_ms']} ms")
+        return report
+
+
+def flatten_all(venues: Optional[List[str]] = None, retries: int = 2) -> Dict[str, Any]:
+    """Flatten every configured venue (EXCHANGE=bybit,gate) using the shared clients."""
+    from app.exchanges.ccxt_client import shared_client
+    from app.exchanges.router import venues_from_env
+
+    names = venues or venues_from_env()
+    return Flattener({v: shared_client(v).client for v in names}, retries=retries).run()
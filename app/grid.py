@@ -0,0 +1,57 @@
+import math
+from typing import Dict, List, Set, Tuple
+
+
+class GridLadder:
+    """
+    Fixed price lattice for a grid-following DCA ladder.
+
+    Level i sits at anchor * (1 - spacing * i) for a long (below the market) and
+    anchor * (1 + spacing * i) for a short, so a level keeps the same price however
+    often the window moves. The lattice extends past the anchor (i <= 0), so the
+    window follows the market both ways. The window is the `live_levels` lattice
+    levels nearest to the market on the averaging side; `diff` returns only the
+    levels that left or entered it. Filled + live levels never exceed `max_levels`
+    (the grid budget).
+    """
+
+    def __init__(self, anchor: float, spacing: float, side: str, live_levels: int, max_levels: int,
+                 threshold: int = 1):
+        self.anchor = anchor
+        self.spacing = spacing
+        self.long = side == "long"
+        self.live_levels = live_levels
+        self.max_levels = max_levels
+        self.threshold = max(threshold, 1)
+        self.filled: Set[int] = set()
+        self.first = 1                       # lowest index of the current window (may be <= 0)
+
+    def price(self, i: int) -> float:
+        return self.anchor * (1 - self.spacing * i) if self.long else self.anchor * (1 + self.spacing * i)
+
+    def nearest(self, last: float) -> int:
+        """First lattice index strictly on the averaging side of `last`."""
+        x = (1 - last / self.anchor) if self.long else (last / self.anchor - 1)
+        return math.floor(x / self.spacing + 1e-9) + 1
+
+    def window(self, last: float) -> List[int]:
+        """Unfilled levels to keep live: a filled level is never placed again."""
+        i0 = self.nearest(last)
+        # adverse moves (levels filled) always follow; favourable ones wait for `threshold` levels
+        if i0 > self.first or self.first - i0 >= self.threshold:
+            self.first = i0
+        n = min(self.live_levels, max(self.max_levels - len(self.filled), 0))
+        out: List[int] = []
+        i = self.first
+        while len(out) < n:
+            if i not in self.filled:
+                out.append(i)
+            i += 1
+        return out
+
+    def diff(self, last: float, live: Dict[int, List[str]]) -> Tuple[List[int], List[int]]:
+        """(indices to cancel, indices to place) to move the live set onto the current window."""
+        want = self.window(last)
+        cancel = [i for i in live if i not in want]
+        place = [i for i in want if i not in live]
+        return cancel, place
@@ -0,0 +1,253 @@
+import math
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.archive import archive as market_archive, timeframe_ms
+from app.models import DealConfig, VolatilityConfig
+from app.utils.logger import logger
+
+
+def ema_series(x: Sequence[float], alpha: float, y0: Optional[float] = None) -> np.ndarray:
+    """
+    y[i] = (1 - alpha) * y[i-1] + alpha * x[i], vectorized.
+
+    Within a block y[j] = b^(j+1) * (y_prev + alpha * cumsum(x / b^(k+1))[j]) with
+    b = 1 - alpha; blocks are sized so b^-len stays below e^20 (no overflow, full
+    float precision), so the cost is a few numpy passes instead of a Python loop.
+    """
+    x = np.asarray(x, dtype=float)
+    out = np.empty_like(x)
+    if not len(x):
+        return out
+    if alpha >= 1.0:
+        out[:] = x
+        return out
+    b = 1.0 - alpha
+    prev = x[0] if y0 is None else y0
+    block = max(1, min(4096, int(20.0 / -math.log(b))))
+    for s in range(0, len(x), block):
+        xs = x[s:s + block]
+        p = b ** np.arange(1, len(xs) + 1)
+        out[s:s + len(xs)] = p * (prev + alpha * np.cumsum(xs / p))
+        prev = out[s + len(xs) - 1]
+    return out
+
+
+class EMA:
+    """Exponential moving average; O(1) per update, `peek` = value with one more input, uncommitted."""
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def peek(self, x: float) -> float:
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def update(self, x: float) -> float:
+        self.value = self.peek(x)
+        self.count += 1
+        return self.value
+
+    def backfill(self, xs: Sequence[float]) -> Optional[float]:
+        if len(xs):
+            self.value = float(ema_series(xs, self.alpha, self.value)[-1])
+            self.count += len(xs)
+        return self.value
+
+
+class ATR:
+    """Average true range, Wilder smoothing (alpha = 1/period)."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._rma = EMA(period, alpha=1.0 / period)
+        self.prev_close: Optional[float] = None
+
+    def _tr(self, high: float, low: float) -> float:
+        if self.prev_close is None:
+            return high - low
+        return max(high, self.prev_close) - min(low, self.prev_close)
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._rma.value
+
+    @property
+    def ready(self) -> bool:
+        return self._rma.count >= self.period
+
+    def peek(self, high: float, low: float) -> float:
+        return self._rma.peek(self._tr(high, low))
+
+    def update(self, high: float, low: float, close: float) -> float:
+        v = self._rma.update(self._tr(high, low))
+        self.prev_close = close
+        return v
+
+    def backfill(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Optional[float]:
+        if not len(close):
+            return self.value
+        prev = np.concatenate(([close[0] if self.prev_close is None else self.prev_close], close[:-1]))
+        tr = np.maximum(high, prev) - np.minimum(low, prev)
+        if self.prev_close is None:
+            tr[0] = high[0] - low[0]
+        self.prev_close = float(close[-1])
+        return self._rma.backfill(tr)
+
+
+class RealizedVol:
+    """EWMA realized volatility of log returns (per bar, as a fraction: 0.002 = 0.2%)."""
+
+    def __init__(self, period: int = 30):
+        self.period = period
+        self._var = EMA(period)
+        self.prev_close: Optional[float] = None
+
+    @property
+    def value(self) -> Optional[float]:
+        return None if self._var.value is None else math.sqrt(self._var.value)
+
+    @property
+    def ready(self) -> bool:
+        return self._var.count >= self.period
+
+    def peek(self, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return self.value
+        r = math.log(close / self.prev_close)
+        return math.sqrt(self._var.peek(r * r))
+
+    def update(self, close: float) -> Optional[float]:
+        if self.prev_close is not None:
+            r = math.log(close / self.prev_close)
+            self._var.update(r * r)
+        self.prev_close = close
+        return self.value
+
+    def backfill(self, close: np.ndarray) -> Optional[float]:
+        if not len(close):
+            return self.value
+        closes = close if self.prev_close is None else np.concatenate(([self.prev_close], close))
+        r = np.diff(np.log(closes))
+        self._var.backfill(r * r)
+        self.prev_close = float(close[-1])
+        return self.value
+
+
+class VolatilityTracker:
+    """
+    ATR / EMA / realized vol over `timeframe` bars, fed from closed candles (vectorized
+    backfill) and then from every price tick: ticks build the current bar, a new bar
+    commits the previous one. Reads include the bar in progress, so values move each
+    tick at O(1) cost instead of a recompute over the candle window.
+    """
+
+    def __init__(self, timeframe: str = "1m", atr_period: int = 14, vol_period: int = 30, ema_period: int = 20):
+        self.timeframe = timeframe
+        self.tf_ms = timeframe_ms(timeframe)
+        self.atr_ind = ATR(atr_period)
+        self.vol_ind = RealizedVol(vol_period)
+        self.ema_ind = EMA(ema_period)
+        self._bar: Optional[list] = None          # [start_ms, high, low, close] of the bar in progress
+
+    @classmethod
+    def for_config(cls, vc: VolatilityConfig) -> "VolatilityTracker":
+        return cls(vc.timeframe, vc.atr_period, vc.vol_period)
+
+    def backfill(self, candles: np.ndarray):
+        """Closed candles: ccxt rows [[ts, o, h, l, c, v], ...] or an archive CANDLE_DTYPE array."""
+        if candles.dtype.names:
+            high, low, close = candles["high"], candles["low"], candles["close"]
+        else:
+            candles = np.asarray(candles, dtype=float).reshape(-1, 6)
+            high, low, close = candles[:, 2], candles[:, 3], candles[:, 4]
+        high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+        self.atr_ind.backfill(high, low, close)
+        self.vol_ind.backfill(close)
+        self.ema_ind.backfill(close)
+
+    def _commit(self):
+        _, high, low, close = self._bar
+        self.atr_ind.update(high, low, close)
+        self.vol_ind.update(close)
+        self.ema_ind.update(close)
+
+    def on_price(self, ts_ms: int, price: float):
+        start = ts_ms - ts_ms % self.tf_ms
+        bar = self._bar
+        if bar is not None and start > bar[0]:
+            self._commit()
+            bar = None
+        if bar is None:
+            self._bar = [start, price, price, price]
+            return
+        bar[1] = max(bar[1], price)
+        bar[2] = min(bar[2], price)
+        bar[3] = price
+
+    @property
+    def ready(self) -> bool:
+        return self.atr_ind.ready and self.vol_ind.ready
+
+    @property
+    def atr(self) -> Optional[float]:
+        return self.atr_ind.peek(self._bar[1], self._bar[2]) if self._bar else self.atr_ind.value
+
+    @property
+    def vol(self) -> Optional[float]:
+        return self.vol_ind.peek(self._bar[3]) if self._bar else self.vol_ind.value
+
+    @property
+    def ema(self) -> Optional[float]:
+        return self.ema_ind.peek(self._bar[3]) if self._bar else self.ema_ind.value
+
+
+def load_candles(ex, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+    """Closed candles, archive first (same source as /ohlcv), the exchange only when the archive is short."""
+    tf = timeframe_ms(timeframe)
+    cached = market_archive.tail(symbol, timeframe, limit)
+    now = int(time.time() * 1000)
+    if len(cached) >= limit and cached["ts"][-1] + 2 * tf > now:
+        return cached
+    rows = [r for r in ex.fetch_ohlcv(symbol, timeframe, limit) if r[0] + tf <= now]
+    market_archive.append_candles(symbol, timeframe, rows)
+    return np.asarray(rows, dtype=float).reshape(-1, 6)
+
+
+def _clamp_pct(vc: VolatilityConfig, pct: float) -> float:
+    return min(max(pct, vc.min_percent), vc.max_percent)
+
+
+def trailing_offset(vc: VolatilityConfig, tracker: VolatilityTracker) -> Optional[float]:
+    """Trailing offset (fraction) = trailing_vol_mult * realized vol, clamped; None until the tracker is ready."""
+    if vc.trailing_vol_mult is None or not tracker.ready or not tracker.vol:
+        return None
+    return _clamp_pct(vc, vc.trailing_vol_mult * tracker.vol * 100.0) / 100.0
+
+
+def scale_to_volatility(cfg: DealConfig, tracker: VolatilityTracker, price: float) -> DealConfig:
+    """Copy of cfg with the volatility-scaled percentages filled in (static values kept when not ready)."""
+    vc = cfg.volatility
+    if vc is None or not tracker.ready or not tracker.atr:
+        if vc is not None:
+            logger.warning("⚠️ Not enough candles for volatility scaling — using static percentages")
+        return cfg
+    atr_pct = tracker.atr / price * 100.0
+    update = {}
+    lo = cfg.limit_orders
+    if vc.grid_atr_mult is not None:
+        spacing = _clamp_pct(vc, vc.grid_atr_mult * atr_pct)
+        update["limit_orders"] = lo.model_copy(update={"range_percent": spacing * max(lo.orders_count, 1)})
+    if vc.sl_atr_mult is not None:
+        update["stop_loss_percent"] = _clamp_pct(vc, vc.sl_atr_mult * atr_pct)
+    offset = trailing_offset(vc, tracker)
+    if offset is not None:
+        update["trailing_sl_offset_percent"] = offset * 100.0
+    logger.info(
+        f"📐 Volatility scaling: ATR={tracker.atr:.6g} ({atr_pct:.3f}%), vol={tracker.vol:.5f} -> "
+        + ", ".join(f"{k}={v.range_percent if k == 'limit_orders' else v:.3f}" for k, v in update.items())
+    )
+    return cfg.model_copy(update=update)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator
-from typing import List, Literal
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
 
 
 class TPItem(BaseModel):
@@ -11,6 +11,41 @@ class LimitOrders(BaseModel):
     range_percent: float
     orders_count: int
     engine_deal_duration_minutes: int
+    follow: bool = False                    # грид следует за ценой (окно живых уровней)
+    live_levels: Optional[int] = None       # живых уровней у рынка; по умолчанию orders_count
+    follow_threshold_levels: int = 1        # на сколько уровней цена уходит прочь, прежде чем окно сдвигается
+
+
+class ExecutionConfig(BaseModel):
+    algo: Literal["market", "twap", "iceberg", "depth"] = "market"
+    slices: int = 5                      # TWAP: число дочерних ордеров
+    interval_seconds: float = 2.0        # пауза между дочерними ордерами (iceberg: опрос слайса)
+    participation_rate: float = 0.2      # доля ликвидности в полосе slippage на один ордер
+    max_slippage_percent: float = 0.2    # полоса от лучшей цены для оценки ликвидности
+    display_amount: Optional[float] = None   # iceberg: видимый объём (USDT) на ордер
+    depth_levels: int = 50
+
+
+class MonitorConfig(BaseModel):
+    min_interval_seconds: float = 0.5      # опрос у самого стопа / TP
+    max_interval_seconds: float = 15.0     # опрос далеко от уровней в тихом рынке
+    full_refresh_seconds: float = 30.0     # позиция/ордера перечитываются не реже этого
+    rest_budget_per_minute: int = 60       # лимит REST-запросов монитора в скользящем окне 60 с
+    fill_margin_percent: float = 0.05      # цена ближе этого к нашему ордеру = возможный филл
+    safety: float = 0.25                   # доля ожидаемого времени до касания уровня
+
+
+class VolatilityConfig(BaseModel):
+    timeframe: str = "1m"                       # свечи для ATR / реализованной волатильности
+    lookback: int = 200                         # свечей на начальный прогрев индикаторов
+    atr_period: int = 14
+    vol_period: int = 30                        # EWMA-окно волатильности лог-доходностей (в свечах)
+    grid_atr_mult: Optional[float] = None       # шаг грида = k·ATR (range_percent пересчитывается)
+    sl_atr_mult: Optional[float] = None         # стоп = k·ATR от средней цены
+    trailing_vol_mult: Optional[float] = None   # отступ трейлинга = k·σ, пересчитывается каждый тик
+    min_percent: float = 0.05                   # границы для всех рассчитанных процентов
+    max_percent: float = 20.0
+    rescale_threshold: float = 0.05             # относительное изменение отступа, после которого стоп перевешивается
 
 
 class DealConfig(BaseModel):
@@ -25,6 +60,10 @@ class DealConfig(BaseModel):
     move_sl_to_breakeven: bool
     tp_orders: List[TPItem]
     limit_orders: LimitOrders
+    execution: Optional[ExecutionConfig] = None   # как исполнять вход по рынку
+    monitor: MonitorConfig = MonitorConfig()      # адаптивный интервал мониторинга
+    volatility: Optional[VolatilityConfig] = None   # сетка/стопы от ATR и волатильности
+    deal_id: Optional[str] = None   # id сделки в событиях; по умолчанию генерируется движком
 
     @field_validator("tp_orders")
     @classmethod
@@ -33,3 +72,17 @@ class DealConfig(BaseModel):
         if s != 100.0:
             raise ValueError(f"Сумма quantity_percent по TP должна быть 100%, сейчас {s}")
         return items
+
+
+class RiskLimits(BaseModel):
+    # None = без лимита
+    max_symbol_notional: Optional[float] = None   # USDT по одному символу
+    max_side_notional: Optional[float] = None     # USDT по стороне (long/short)
+    max_gross_notional: Optional[float] = None    # USDT суммарно по аккаунту
+    max_margin: Optional[float] = None            # USDT маржи (notional / leverage)
+    max_leverage: Optional[int] = None
+
+
+class FlattenRequest(BaseModel):
+    confirm: bool = False                         # должно быть true: отмена всех ордеров и закрытие всех позиций
+    retries: int = Field(2, ge=0, le=5)           # дополнительные проходы по тому, что ещё открыто
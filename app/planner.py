@@ -0,0 +1,198 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.exchanges.market_rules import FILTER_KEYS as _FILTER_KEYS, MarketFilters, MarketRules
+from app.models import DealConfig
+
+
+class MarketCache:
+    """Symbol -> market filters, persisted as JSON so batch validation runs offline."""
+
+    def __init__(self, path: str = "logs/markets.json"):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._markets: Dict[str, Dict[str, Any]] = (
+            json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        )
+
+    def get(self, symbol: str, ex=None) -> Optional[MarketFilters]:
+        """Cached filters; with `ex` given, a missing symbol is fetched via ex.market() and stored."""
+        if symbol not in self._markets:
+            if ex is None:
+                return None
+            m = ex.market(symbol)
+            with self._lock:
+                self._markets[symbol] = {k: m.get(k) for k in _FILTER_KEYS if k in m}
+        return MarketFilters(self._markets[symbol])
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._markets, indent=2, default=str), encoding="utf-8")
+
+
+class PlanLeg(BaseModel, frozen=True):
+    kind: str                       # "entry" | "grid" | "tp"
+    side: str                       # order side: buy / sell
+    price: float
+    qty: float
+    notional: float
+    skip: Optional[str] = None      # why the leg will not be placed (None = placed)
+
+
+class DealPlan(BaseModel, frozen=True):
+    """Executable deal: every leg priced, rounded and checked against market filters in advance."""
+    key: str
+    config_key: str                  # the DealConfig it was compiled from (see check_plan)
+    symbol: str
+    side: str
+    leverage: int
+    ref_price: float
+    entry: PlanLeg
+    grid: Tuple[PlanLeg, ...]
+    tp: Tuple[PlanLeg, ...]          # initial TP ladder from the entry price (re-placed on grid fills)
+    sl_price: float
+    required_margin: float           # (entry + all placed grid legs) / leverage
+    errors: Tuple[str, ...] = ()
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def skipped(self) -> Tuple[PlanLeg, ...]:
+        return tuple(l for l in self.grid + self.tp if l.skip)
+
+
+# prices within one bucket (log scale, percent wide) share a cached plan
+PLAN_PRICE_BUCKET_PERCENT = float(os.getenv("PLAN_PRICE_BUCKET_PERCENT", "0.1"))
+# a precompiled plan whose price is further than this from the market is recompiled (Engine.run)
+PLAN_MAX_DRIFT_PERCENT = float(os.getenv("PLAN_MAX_DRIFT_PERCENT", "0.5"))
+
+
+def config_key(cfg: DealConfig) -> str:
+    return hashlib.sha256(cfg.model_dump_json(exclude={"deal_id"}).encode()).hexdigest()[:16]
+
+
+def price_bucket(price: float) -> str:
+    if PLAN_PRICE_BUCKET_PERCENT <= 0:
+        return repr(float(price))
+    return str(round(math.log(price) / math.log1p(PLAN_PRICE_BUCKET_PERCENT / 100.0)))
+
+
+def plan_key(cfg: DealConfig, rules: MarketRules, ref_price: float) -> str:
+    market = rules.fingerprint() if isinstance(rules, MarketFilters) else json.dumps(
+        {k: rules.market(cfg.symbol).get(k) for k in _FILTER_KEYS}, sort_keys=True, default=str
+    )
+    raw = config_key(cfg) + market + price_bucket(ref_price)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def check_plan(plan: DealPlan, cfg: DealConfig) -> List[str]:
+    """Why `plan` cannot run the deal `cfg` (empty when it was compiled from this config)."""
+    problems = [
+        f"{name} {got!r} != {want!r}"
+        for name, got, want in (
+            ("symbol", plan.symbol, cfg.symbol),
+            ("side", plan.side, cfg.side),
+            ("leverage", plan.leverage, cfg.leverage),
+        )
+        if got != want
+    ]
+    if plan.config_key != config_key(cfg):
+        problems.append("compiled from a different config (amounts, grid, TP or SL)")
+    return problems
+
+
+def _price(rules: MarketRules, symbol: str, raw: float) -> float:
+    return rules.clamp_price_to_limits(symbol, rules.round_price_to_tick(symbol, raw))
+
+
+def _compile(key: str, cfg: DealConfig, rules: MarketRules, ref_price: float) -> DealPlan:
+    symbol = cfg.symbol
+    long = cfg.side == "long"
+    min_trade = rules.min_tradable_amount(symbol)
+    errors = []
+
+    # entry: same USDT -> qty conversion as Engine.run
+    entry_qty = rules.round_amount_down(symbol, cfg.market_order_amount / ref_price)
+    if entry_qty < min_trade:
+        errors.append(f"entry qty {entry_qty} < min tradable {min_trade}")
+    entry = PlanLeg(
+        kind="entry", side="buy" if long else "sell",
+        price=ref_price, qty=entry_qty, notional=entry_qty * ref_price,
+    )
+
+    # DCA grid across range_percent from the reference price
+    grid = []
+    n = cfg.limit_orders.orders_count
+    r = cfg.limit_orders.range_percent / 100.0
+    for i in range(1, n + 1):
+        price = _price(rules, symbol, ref_price * (1 - r * i / n) if long else ref_price * (1 + r * i / n))
+        qty = rules.round_amount_down(symbol, cfg.limit_orders_amount / n / price)
+        grid.append(PlanLeg(
+            kind="grid", side=entry.side, price=price, qty=qty, notional=qty * price,
+            skip=f"qty {qty} < min tradable {min_trade}" if qty < min_trade else None,
+        ))
+
+    # initial TP ladder on the entry qty; the last leg takes what is left
+    tp = []
+    remaining = entry_qty
+    for i, item in enumerate(cfg.tp_orders, start=1):
+        pct = item.price_percent / 100.0
+        price = _price(rules, symbol, ref_price * (1 + pct) if long else ref_price * (1 - pct))
+        target = remaining if i == len(cfg.tp_orders) else entry_qty * item.quantity_percent / 100.0
+        qty = rules.round_amount_down(symbol, min(target, remaining))
+        skip = f"qty {qty} < min tradable {min_trade}" if qty < min_trade else None
+        if not skip:
+            remaining = max(0.0, remaining - qty)
+        tp.append(PlanLeg(kind="tp", side="sell" if long else "buy", price=price, qty=qty,
+                          notional=qty * price, skip=skip))
+    if entry_qty >= min_trade and all(l.skip for l in tp):
+        errors.append("no TP leg reaches min tradable qty")
+
+    sl_pct = cfg.stop_loss_percent / 100.0
+    sl_price = _price(rules, symbol, ref_price * (1 - sl_pct) if long else ref_price * (1 + sl_pct))
+
+    exposure = entry.notional + sum(l.notional for l in grid if not l.skip)
+    return DealPlan(
+        key=key, config_key=config_key(cfg), symbol=symbol, side=cfg.side, leverage=cfg.leverage, ref_price=ref_price,
+        entry=entry, grid=tuple(grid), tp=tuple(tp), sl_price=sl_price,
+        required_margin=exposure / max(cfg.leverage, 1), errors=tuple(errors),
+    )
+
+
+# the key includes the price bucket, so the cache is a bounded LRU rather than a growing dict
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "1024"))
+_plans: "OrderedDict[str, DealPlan]" = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def compile_deal(cfg: DealConfig, rules: MarketRules, ref_price: float) -> DealPlan:
+    """
+    Compile a DealConfig against market filters and a reference price.
+    Plans are cached by (config, filters, price bucket) in an LRU of PLAN_CACHE_SIZE
+    entries, so repeated compiles are dict lookups while the price stays within
+    PLAN_PRICE_BUCKET_PERCENT; a hit keeps the ref_price it was compiled at.
+    """
+    key = plan_key(cfg, rules, ref_price)
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+    plan = _compile(key, cfg, rules, ref_price)
+    with _plans_lock:
+        _plans[key] = plan
+        _plans.move_to_end(key)
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
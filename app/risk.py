@@ -0,0 +1,241 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+from app.db import RiskReservation, engine as db_engine
+from app.models import RiskLimits
+from app.utils.logger import logger
+
+# seconds a shared reservation outlives its process' last heartbeat
+RISK_RESERVATION_TTL = float(os.getenv("RISK_RESERVATION_TTL", "60"))
+
+
+class RiskLimitExceeded(ValueError):
+    """Order would push account exposure over a configured limit."""
+
+
+def limits_from_env() -> RiskLimits:
+    def _f(name: str) -> Optional[float]:
+        v = os.getenv(name)
+        return float(v) if v else None
+
+    lev = os.getenv("RISK_MAX_LEVERAGE")
+    return RiskLimits(
+        max_symbol_notional=_f("RISK_MAX_SYMBOL_NOTIONAL"),
+        max_side_notional=_f("RISK_MAX_SIDE_NOTIONAL"),
+        max_gross_notional=_f("RISK_MAX_GROSS_NOTIONAL"),
+        max_margin=_f("RISK_MAX_MARGIN"),
+        max_leverage=int(lev) if lev else None,
+    )
+
+
+def _violated(values: Dict[str, float], prev: Dict[str, float], totals: Dict[str, float],
+              caps: Dict[str, Optional[float]]) -> Optional[str]:
+    """First key whose cap is exceeded by replacing `prev` with `values` (only growing keys are checked)."""
+    for key, v in values.items():
+        cap, grow = caps.get(key), v - prev.get(key, 0.0)
+        if grow > 0 and cap is not None and totals.get(key, 0.0) + grow > cap:
+            return key
+    return None
+
+
+class MemoryExposureStore:
+    """Exposure counters for deals running in one process."""
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, str], float] = {}
+        self._refs: Dict[str, Tuple[str, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, account: str, key: str) -> float:
+        return self._values.get((account, key), 0.0)
+
+    def set(self, ref: str, account: str, values: Dict[str, float], caps: Dict[str, Optional[float]]) -> Optional[str]:
+        """Atomically replace what `ref` holds; return the first key that would exceed its cap (nothing applied)."""
+        with self._lock:
+            prev_account, prev = self._refs.get(ref, (account, {}))
+            totals = {k: self._values.get((account, k), 0.0) for k in values}
+            violated = _violated(values, prev if prev_account == account else {}, totals, caps)
+            if violated:
+                return violated
+            for key, v in prev.items():
+                self._values[(prev_account, key)] -= v
+            for key, v in values.items():
+                self._values[(account, key)] = self._values.get((account, key), 0.0) + v
+            if values:
+                self._refs[ref] = (account, dict(values))
+            else:
+                self._refs.pop(ref, None)
+        return None
+
+
+class SqlExposureStore:
+    """
+    Exposure shared between processes through the SQLModel engine (SQLite/Postgres).
+
+    Every ref is stored as rows owned by this process with an expiry that a
+    heartbeat thread keeps pushing forward, so a crashed process stops counting
+    after `ttl` seconds. The limit check and the write run in one transaction
+    that holds the account's write lock (SQLite BEGIN IMMEDIATE, Postgres
+    transaction advisory lock), so two workers can not both pass the same limit.
+    """
+
+    def __init__(self, engine=db_engine, ttl: float = RISK_RESERVATION_TTL, owner: Optional[str] = None):
+        self.engine = engine
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._sqlite = engine.dialect.name == "sqlite"
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        SQLModel.metadata.create_all(engine, tables=[RiskReservation.__table__])
+
+    def get(self, account: str, key: str) -> float:
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text("SELECT SUM(value) FROM riskreservation WHERE account = :a AND key = :k AND expires_at >= :now"),
+                {"a": account, "k": key, "now": time.time()},
+            ).first()
+            return float(row[0]) if row and row[0] is not None else 0.0
+
+    def _begin_locked(self, conn, account: str):
+        if self._sqlite:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:a))"), {"a": account})
+
+    def set(self, ref: str, account: str, values: Dict[str, float], caps: Dict[str, Optional[float]]) -> Optional[str]:
+        now = time.time()
+        params = {"o": self.owner, "r": ref, "a": account, "now": now}
+        with self.engine.connect() as conn:
+            self._begin_locked(conn, account)
+            # reservations of processes that stopped heartbeating
+            conn.execute(text("DELETE FROM riskreservation WHERE account = :a AND expires_at < :now"), params)
+            if caps:
+                prev = dict(conn.execute(
+                    text("SELECT key, value FROM riskreservation WHERE owner = :o AND ref = :r AND account = :a"), params
+                ).all())
+                totals = dict(conn.execute(
+                    text("SELECT key, SUM(value) FROM riskreservation WHERE account = :a GROUP BY key"), params
+                ).all())
+                violated = _violated(values, prev, totals, caps)
+                if violated:
+                    conn.rollback()
+                    return violated
+            conn.execute(text("DELETE FROM riskreservation WHERE owner = :o AND ref = :r"), params)
+            if values:
+                conn.execute(
+                    text("INSERT INTO riskreservation (owner, ref, key, account, value, expires_at) "
+                         "VALUES (:o, :r, :k, :a, :v, :exp)"),
+                    [{**params, "k": k, "v": v, "exp": now + self.ttl} for k, v in values.items()],
+                )
+            conn.commit()
+        if values:
+            self._start_heartbeat()
+        return None
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._beat, name="risk-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(
+                        text("UPDATE riskreservation SET expires_at = :exp WHERE owner = :o"),
+                        {"o": self.owner, "exp": time.time() + self.ttl},
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️ Risk heartbeat failed: {e}")
+
+    def close(self):
+        """Stop the heartbeat and drop every reservation of this process."""
+        self._stop.set()
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM riskreservation WHERE owner = :o"), {"o": self.owner})
+
+
+class RiskService:
+    """
+    Portfolio-level exposure across concurrent deals.
+
+    Exposure = open position notional (synced from fills) + resting entry/grid orders.
+    Every update replaces the previous contribution of the same ref, so checks
+    are O(1) and nothing is recomputed from order/position lists.
+    """
+
+    def __init__(self, limits: Optional[RiskLimits] = None, store=None):
+        self.limits = limits or RiskLimits()
+        self.store = store or MemoryExposureStore()
+        # ref -> (account, deltas) currently applied by this process
+        self._contrib: Dict[str, Tuple[str, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _caps(self, symbol: str, side: str) -> Dict[str, Optional[float]]:
+        return {
+            f"sym:{symbol}": self.limits.max_symbol_notional,
+            f"side:{side}": self.limits.max_side_notional,
+            "gross": self.limits.max_gross_notional,
+            "margin": self.limits.max_margin,
+        }
+
+    @staticmethod
+    def _deltas(symbol: str, side: str, notional: float, leverage: int) -> Dict[str, float]:
+        notional = abs(notional)
+        return {
+            f"sym:{symbol}": notional,
+            f"side:{side}": notional,
+            "gross": notional,
+            "margin": notional / max(leverage, 1),
+        }
+
+    def _set(self, ref: str, account: str, symbol: str, side: str, notional: float, leverage: int, check: bool):
+        if check and self.limits.max_leverage is not None and leverage > self.limits.max_leverage:
+            raise RiskLimitExceeded(f"leverage {leverage} > max {self.limits.max_leverage}")
+
+        new = self._deltas(symbol, side, notional, leverage) if notional else {}
+        with self._lock:
+            _, prev = self._contrib.get(ref, (account, {}))
+            if new != prev:
+                caps = self._caps(symbol, side) if check else {}
+                violated = self.store.set(ref, account, new, caps)
+                if violated:
+                    grow = new.get(violated, 0.0) - prev.get(violated, 0.0)
+                    raise RiskLimitExceeded(
+                        f"{account}: {violated} would be {self.store.get(account, violated) + grow:.2f} > {caps[violated]}"
+                    )
+            if new:
+                self._contrib[ref] = (account, new)
+            else:
+                self._contrib.pop(ref, None)
+
+    def reserve(self, ref: str, account: str, symbol: str, side: str, notional: float, leverage: int):
+        """Check an entry/grid order against limits and hold its notional until released."""
+        self._set(ref, account, symbol, side, notional, leverage, check=True)
+
+    def release(self, ref: str):
+        with self._lock:
+            item = self._contrib.pop(ref, None)
+        if item:
+            self.store.set(ref, item[0], {}, {})
+
+    def sync_position(self, ref: str, account: str, symbol: str, side: str, size: float, avg: float, leverage: int):
+        """Record the current position after fills; never rejected (the exposure already exists)."""
+        self._set(ref, account, symbol, side, size * avg, leverage, check=False)
+
+    def exposure(self, account: str) -> Dict[str, float]:
+        keys = {k for acc, d in self._contrib.values() if acc == account for k in d}
+        return {k: self.store.get(account, k) for k in sorted(keys)}
+
+
+risk = RiskService(
+    limits=limits_from_env(),
+    store=SqlExposureStore() if os.getenv("RISK_SHARED", "false").lower() == "true" else None,
+)
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.engine import Engine
+from app.exchanges.base import Exchange
+from app.models import DealConfig
+from app.planner import DealPlan
+from app.utils.logger import logger
+
+
+class DealExists(ValueError):
+    """A deal with this id is already queued or running."""
+
+
+class DealRunner:
+    """
+    Deals inside a long-lived process: every deal is an Engine on a shared worker
+    pool, reusing the process-wide exchange clients (markets loaded once, warm
+    connections), so a start is a thread hand-off instead of a new interpreter.
+
+    Each running deal holds one worker for its lifetime; deals beyond `workers` wait
+    in the queue (status "queued"). The most recent `keep_finished` finished deals
+    stay listed.
+    """
+
+    def __init__(self, workers: Optional[int] = None, keep_finished: int = 200,
+                 engine_factory: Optional[Callable[[], Engine]] = None):
+        self.workers = workers or int(os.getenv("DEAL_WORKERS", "32"))
+        self.keep_finished = keep_finished
+        self.engine_factory = engine_factory or Engine
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._deals: "OrderedDict[str, Tuple[Engine, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="deal")
+        return self._pool
+
+    def _prune(self):
+        done = [k for k, (_, f) in self._deals.items() if f.done()]
+        for k in done[:max(0, len(done) - self.keep_finished)]:
+            del self._deals[k]
+
+    def start(self, cfg: DealConfig, plan: Optional[DealPlan] = None, ex: Optional[Exchange] = None) -> Engine:
+        """Queue a deal; returns its Engine at once (state() for progress)."""
+        eng = Engine(ex) if ex is not None else self.engine_factory()
+        if cfg.deal_id:
+            eng.deal_id = cfg.deal_id
+        cfg = cfg.model_copy(update={"deal_id": eng.deal_id})
+        eng.cfg, eng.account = cfg, cfg.account
+        with self._lock:
+            cur = self._deals.get(eng.deal_id)
+            if cur is not None and not cur[1].done():
+                raise DealExists(f"deal {eng.deal_id} is already {cur[0].status}")
+            self._prune()
+            fut = self._executor().submit(eng.run, cfg, plan)
+            self._deals[eng.deal_id] = (eng, fut)
+        logger.info(f"📥 Deal {eng.deal_id} queued: {cfg.side.upper()} {cfg.symbol}")
+        return eng
+
+    def get(self, deal_id: str) -> Optional[Engine]:
+        with self._lock:
+            item = self._deals.get(deal_id)
+        return item[0] if item else None
+
+    def list(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._deals.values())
+        return [e.state() for e, f in items if not (active_only and f.done())]
+
+    def stop(self, deal_id: str, close: bool = False, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Stop one deal (see Engine.stop); waits up to `timeout` seconds for it to wind down."""
+        with self._lock:
+            item = self._deals.get(deal_id)
+        if item is None:
+            return None
+        eng, fut = item
+        eng.stop(close=close)
+        if timeout:
+            try:
+                fut.result(timeout=timeout)
+            except Exception:
+                pass
+        return eng.state()
+
+    def stop_all(self, close: bool = False, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(e, f) for e, f in self._deals.values() if not f.done()]
+        for eng, _ in items:
+            eng.stop(close=close)
+        for _, fut in items:
+            try:
+                fut.result(timeout=timeout)
+            except Exception:
+                pass
+        return [e.state() for e, _ in items]
+
+    def shutdown(self, timeout: float = 10.0):
+        """Process exit: stop every deal (grids cancelled, positions and TPs kept), then release the workers."""
+        stopped = self.stop_all(timeout=timeout)
+        if stopped:
+            logger.info(f"⏹ Runner stopped {len(stopped)} deals")
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+runner = DealRunner()
@@ -0,0 +1,97 @@
+import math
+from collections import deque
+from typing import Deque, Iterable, Optional, Tuple
+
+from app.models import MonitorConfig
+
+_WINDOW = 60.0      # seconds the REST budget is counted over
+
+
+class TickScheduler:
+    """
+    Adaptive polling for the engine monitor loop.
+
+    - interval: a `safety` fraction of the expected time for price to reach the
+      nearest level (SL / TP / grid), from a random-walk estimate
+      t ~ (distance / sigma)^2 with sigma an EWMA of per-second log-return
+      variance; clamped to [min, max];
+    - budget: each tick is charged the REST calls it actually made, over a sliding
+      60 s window. Near a level the loop polls at `min_interval_seconds` on the calls
+      left unspent in the window (quiet stretches far from levels bank them) and is
+      only slowed once the window is full;
+    - refresh: positions and open orders only change when price comes near one of
+      our resting orders (or from outside the engine), so they are re-read only
+      then, or every `full_refresh_seconds` as a backstop.
+    """
+
+    def __init__(self, cfg: Optional[MonitorConfig] = None, halflife: int = 20):
+        self.cfg = cfg or MonitorConfig()
+        self.alpha = 1 - 0.5 ** (1 / max(halflife, 1))
+        self.var_rate: Optional[float] = None     # EWMA of r^2 / dt
+        self._prev: Optional[tuple] = None        # (t, price) of the previous tick
+        self._refreshed_at: Optional[float] = None
+        self._lo = self._hi = None                # price range seen since the last refresh
+        self._spent: Deque[Tuple[float, int]] = deque()   # (tick time, REST calls) within the window
+        self._window_calls = 0
+
+    def observe(self, now: float, price: float):
+        """Feed the price of this tick."""
+        if self._prev is not None:
+            t0, p0 = self._prev
+            dt = now - t0
+            if dt > 0 and p0 > 0 and price > 0:
+                r2 = math.log(price / p0) ** 2 / dt
+                self.var_rate = r2 if self.var_rate is None else self.var_rate + self.alpha * (r2 - self.var_rate)
+        self._prev = (now, price)
+        self._lo = price if self._lo is None else min(self._lo, price)
+        self._hi = price if self._hi is None else max(self._hi, price)
+
+    def needs_refresh(self, now: float, resting: Iterable[float]) -> bool:
+        """True if a resting order may have filled since the last refresh (or the backstop expired)."""
+        if self._refreshed_at is None or now - self._refreshed_at >= self.cfg.full_refresh_seconds:
+            return True
+        margin = self.cfg.fill_margin_percent / 100.0
+        lo, hi = self._lo * (1 - margin), self._hi * (1 + margin)
+        return any(lo <= p <= hi for p in resting)
+
+    def refreshed(self, now: float, price: float):
+        self._refreshed_at = now
+        self._lo = self._hi = price
+
+    def spend(self, now: float, calls: int):
+        """Charge `calls` REST requests made at `now` to the budget window."""
+        self._spent.append((now, calls))
+        self._window_calls += calls
+        while self._spent and self._spent[0][0] <= now - _WINDOW:
+            self._window_calls -= self._spent.popleft()[1]
+
+    def budget_wait(self, now: float, interval: float, calls: int) -> float:
+        """
+        Shortest wait >= `interval` after which a tick of `calls` requests fits the
+        budget: the window ending at the next tick holds at most rest_budget_per_minute.
+        """
+        budget = max(self.cfg.rest_budget_per_minute, 1)
+        at, total = now + interval, self._window_calls
+        for ts, n in self._spent:
+            if ts > at - _WINDOW:
+                if total + calls <= budget:
+                    break
+                at = ts + _WINDOW       # wait until this tick leaves the window
+            total -= n
+        return at - now
+
+    def next_interval(self, price: float, levels: Iterable[float], calls: int = 1) -> float:
+        """Sleep before the next tick; `calls` is what this tick sent (last_price included)."""
+        cfg = self.cfg
+        if self._prev is not None:
+            self.spend(self._prev[0], calls)
+        dist = min((abs(price - lv) / price for lv in levels if lv), default=None)
+        if dist is None or not self.var_rate:
+            interval = 3.0
+        else:
+            interval = cfg.safety * dist * dist / self.var_rate
+        interval = min(max(interval, cfg.min_interval_seconds), cfg.max_interval_seconds)
+        # the next tick is expected to cost about as much as this one
+        if self._prev is None:
+            return interval
+        return self.budget_wait(self._prev[0], interval, calls)
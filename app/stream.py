@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+
+from app.db import TradeEvent
+from app.event_bus import OVERFLOW, SubscriberOverflow
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON frames only
+    msgpack = None
+
+# Frames on /ws/stream (JSON text or msgpack binary):
+#   {"type": "snapshot", "seq": N, "events": [...]}   last events on connect
+#   {"type": "replay",   "seq": N, "events": [...]}   missed events after ?since=
+#   {"type": "batch",    "seq": N, "events": [...]}   live events of one batch window
+# seq is the id of the last event the client has been sent; reconnect with ?since=seq.
+# A client that falls EVENT_QUEUE_SIZE events behind is closed with code 1013.
+
+
+def _row(r) -> Dict[str, Any]:
+    d = dict(r)
+    if isinstance(d.get("ts"), datetime):
+        d["ts"] = d["ts"].isoformat()
+    return d
+
+
+def _where(stmt, symbol: Optional[str]):
+    t = TradeEvent.__table__
+    return stmt.where(t.c.symbol == symbol) if symbol else stmt
+
+
+def snapshot(engine, symbol: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Last `limit` events (oldest first) and the current max id, for the initial frame."""
+    t = TradeEvent.__table__
+    with engine.connect() as conn:
+        head = conn.execute(select(func.max(t.c.id))).scalar() or 0
+        rows = conn.execute(
+            _where(select(t), symbol).where(t.c.id <= head).order_by(t.c.id.desc()).limit(limit)
+        ).mappings().all()
+    return [_row(r) for r in reversed(rows)], head
+
+
+def events_since(engine, since: int, symbol: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Events with id > since (primary-key range scan), up to `limit`; returns (events, new seq)."""
+    t = TradeEvent.__table__
+    with engine.connect() as conn:
+        ids = select(t.c.id).where(t.c.id > since).order_by(t.c.id).limit(limit).subquery()
+        upto = conn.execute(select(func.max(ids.c.id))).scalar()
+        if upto is None:
+            return [], since
+        rows = conn.execute(
+            _where(select(t), symbol).where(t.c.id > since, t.c.id <= upto).order_by(t.c.id)
+        ).mappings().all()
+    return [_row(r) for r in rows], upto
+
+
+def encode(frame: Dict[str, Any], encoding: str):
+    """bytes for msgpack, str for JSON."""
+    if encoding == "msgpack" and msgpack is not None:
+        return msgpack.packb(frame, use_bin_type=True)
+    return json.dumps(frame)
+
+
+async def next_batch(q: asyncio.Queue, window: float, max_events: int) -> List[Dict[str, Any]]:
+    """
+    Wait for one event, then collect whatever else arrives within `window` seconds.
+    Raises SubscriberOverflow once the bus has cut the queue off.
+    """
+    batch = [await q.get()]
+    deadline = time.monotonic() + window
+    while len(batch) < max_events and batch[-1] is not OVERFLOW:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(q.get(), left))
+        except asyncio.TimeoutError:
+            break
+    if batch[-1] is OVERFLOW:
+        raise SubscriberOverflow()
+    return batch
+
+
+class SentIds:
+    """Ids already sent on one connection (last `size`), so late or repeated events go out once."""
+
+    def __init__(self, size: int = 10000):
+        self._order: Deque[int] = deque(maxlen=size)
+        self._ids: Set[int] = set()
+
+    def add(self, event_id: int):
+        if event_id in self._ids:
+            return
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(event_id)
+        self._ids.add(event_id)
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._ids
@@ -0,0 +1,211 @@
+import math
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from app.models import DealConfig
+
+# r(rng, n_paths) -> one step of log returns for every path
+ReturnModel = Callable[[np.random.Generator, int], np.ndarray]
+
+
+def gbm(sigma: float, mu: float = 0.0) -> ReturnModel:
+    """Geometric Brownian motion; sigma / mu are per step (log returns)."""
+    drift = mu - 0.5 * sigma * sigma
+
+    def step(rng: np.random.Generator, n: int) -> np.ndarray:
+        return drift + sigma * rng.standard_normal(n)
+    return step
+
+
+def jump_diffusion(sigma: float, jump_rate: float, jump_mean: float = 0.0, jump_std: float = 0.02,
+                   mu: float = 0.0) -> ReturnModel:
+    """Merton jump-diffusion: GBM plus Poisson(jump_rate per step) jumps of N(jump_mean, jump_std) log size."""
+    base = gbm(sigma, mu)
+
+    def step(rng: np.random.Generator, n: int) -> np.ndarray:
+        k = rng.poisson(jump_rate, n)
+        jumps = k * jump_mean + np.sqrt(k) * jump_std * rng.standard_normal(n)
+        return base(rng, n) + jumps
+    return step
+
+
+def bootstrap(returns: np.ndarray) -> ReturnModel:
+    """Real log returns (e.g. np.diff(np.log(closes))) resampled with replacement."""
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[np.isfinite(returns)]
+    if not len(returns):
+        raise ValueError("no returns to bootstrap from")
+
+    def step(rng: np.random.Generator, n: int) -> np.ndarray:
+        return returns[rng.integers(0, len(returns), n)]
+    return step
+
+
+def _pct(a: np.ndarray, qs=(5, 50, 95)) -> Dict[str, float]:
+    if not len(a):
+        return {}
+    return {f"p{q}": float(v) for q, v in zip(qs, np.percentile(a, qs))}
+
+
+def simulate(
+    cfg: DealConfig,
+    model: ReturnModel,
+    n_paths: int = 10000,
+    step_minutes: float = 1.0,
+    ref_price: float = 100.0,
+    maker_fee: float = 0.0002,
+    taker_fee: float = 0.00055,
+    seed: Optional[int] = None,
+) -> Dict:
+    """
+    Run one DealConfig over `n_paths` synthetic paths at once and summarize the outcomes.
+
+    Mirrors Engine's rules per monitor tick (one tick = one step): grid legs fill when
+    price crosses them, TP ladder re-placed from the new average on every grid fill,
+    breakeven after the first TP fill, pinned SL that starts trailing on a new best
+    (see app.triggers), market close on SL, deal ends at engine_deal_duration_minutes
+    with the position left open (marked to market). Every step is a handful of numpy
+    ops over all paths; there is no per-path Python code.
+
+    Not modelled: lot/tick rounding (see app.planner), follow-mode re-centering (the
+    whole ladder is resting), volatility scaling (static percentages), partial fills.
+    """
+    rng = np.random.default_rng(seed)
+    P = n_paths
+    T = max(1, int(math.ceil(cfg.limit_orders.engine_deal_duration_minutes / step_minutes)))
+    s = 1.0 if cfg.side == "long" else -1.0       # signed price y = s * p: adverse moves lower y
+
+    # entry at ref_price, grid ladder below (long) / above (short)
+    q0 = cfg.market_order_amount / ref_price
+    n = cfg.limit_orders.orders_count
+    r = cfg.limit_orders.range_percent / 100.0
+    g_price = ref_price * (1 - s * r * np.arange(1, n + 1) / max(n, 1)) if n else np.empty(0)
+    g_qty = cfg.limit_orders_amount / max(n, 1) / g_price if n else np.empty(0)
+    g_cum_q = np.concatenate(([0.0], np.cumsum(g_qty)))
+    g_cum_c = np.concatenate(([0.0], np.cumsum(g_qty * g_price)))
+    g_key = -s * g_price                            # ascending; level i filled once worst y <= s * price_i
+
+    tp_pct = np.array([t.price_percent / 100.0 for t in cfg.tp_orders])
+    tp_frac = np.array([t.quantity_percent / 100.0 for t in cfg.tp_orders])
+    m = len(tp_pct)
+    off = cfg.trailing_sl_offset_percent / 100.0
+    factor = 1 - s * off                            # trailing stop = best * factor (in y space)
+
+    price = np.full(P, ref_price)
+    active = np.ones(P, dtype=bool)
+    size = np.full(P, q0)
+    cost = np.full(P, q0 * ref_price)                # size * avg of the open position
+    fees = np.full(P, q0 * ref_price * taker_fee)
+    realized = np.zeros(P)
+    n_grid = np.zeros(P, dtype=np.int64)
+    worst_y = np.full(P, s * ref_price)
+    # TP ladder (re-placed on grid fills)
+    tp_price = np.tile(ref_price * (1 + s * tp_pct), (P, 1))
+    tp_qty = _tp_qty(size, tp_frac)
+    tp_done = np.zeros((P, m), dtype=bool)
+    tp_hit = np.zeros(P, dtype=bool)
+    # SL trigger in y space: pinned stop until y makes a new best above `watch`
+    stop_y = np.full(P, s * ref_price * (1 - s * cfg.stop_loss_percent / 100.0))
+    watch = np.full(P, s * ref_price)
+    trailing = np.zeros(P, dtype=bool)
+    best = np.full(P, s * ref_price)
+    outcome = np.zeros(P, dtype=np.int8)            # 0 timeout, 1 all TPs, 2 SL
+    exit_step = np.full(P, T - 1)
+    peak_margin = cost / max(cfg.leverage, 1)
+
+    for t in range(T):
+        price *= np.exp(model(rng, P))
+        y = s * price
+
+        # 1) grid fills: levels are monotone, so the count filled follows the worst price
+        np.minimum(worst_y, y, out=worst_y)
+        k = np.where(active, np.searchsorted(g_key, -worst_y, side="right"), n_grid) if n else n_grid
+        filled = k > n_grid
+        if filled.any():
+            size[filled] += g_cum_q[k[filled]] - g_cum_q[n_grid[filled]]
+            add_c = g_cum_c[k[filled]] - g_cum_c[n_grid[filled]]
+            cost[filled] += add_c
+            fees[filled] += add_c * maker_fee
+            n_grid = k
+            avg = cost[filled] / size[filled]
+            tp_price[filled] = avg[:, None] * (1 + s * tp_pct)
+            tp_qty[filled] = _tp_qty(size[filled], tp_frac)
+            tp_done[filled] = False
+            np.maximum(peak_margin, cost / max(cfg.leverage, 1), out=peak_margin)
+
+        # 2) TP fills at their limit price
+        hit = active[:, None] & ~tp_done & (y[:, None] >= s * tp_price)
+        if hit.any():
+            q = (hit * tp_qty).sum(axis=1)
+            q = np.minimum(q, size)
+            avg = np.divide(cost, size, out=np.zeros(P), where=size > 0)
+            proceeds = (hit * tp_qty * tp_price).sum(axis=1)
+            realized += s * (proceeds - q * avg)
+            fees += proceeds * maker_fee
+            size -= q
+            cost -= q * avg
+            tp_done |= hit
+            first = hit.any(axis=1) & ~tp_hit
+            tp_hit |= first
+            closed = active & (tp_done.all(axis=1) | (size <= q0 * 1e-9))
+            outcome[closed], exit_step[closed], active[closed] = 1, t, False
+            # 3) breakeven: pin the stop at avg, resume trailing from the current best
+            if cfg.move_sl_to_breakeven:
+                be = first & active
+                stop_y[be] = s * avg[be]
+                watch[be] = np.where(trailing[be], best[be], watch[be])
+                trailing[be] = False
+
+        # 4) trailing: a pinned stop starts trailing on a new best, then follows it
+        start = active & ~trailing & (y > watch)
+        best[start] = y[start]
+        trailing |= start
+        np.maximum(best, np.where(trailing, y, best), out=best)
+        level = np.where(trailing, best * factor, stop_y)
+
+        # 5) SL: close the rest at market
+        sl = active & (y <= level)
+        if sl.any():
+            avg = cost[sl] / np.maximum(size[sl], 1e-300)
+            realized[sl] += s * size[sl] * (price[sl] - avg)
+            fees[sl] += size[sl] * price[sl] * taker_fee
+            size[sl], cost[sl] = 0.0, 0.0
+            outcome[sl], exit_step[sl], active[sl] = 2, t, False
+        if not active.any():
+            break
+
+    # open at the deadline: mark to market
+    avg = np.divide(cost, size, out=np.zeros(P), where=size > 0)
+    unrealized = np.where(active, s * size * (price - avg), 0.0)
+    pnl = realized + unrealized - fees
+    minutes = (exit_step + 1) * step_minutes
+    margin_budget = (cfg.market_order_amount + cfg.limit_orders_amount) / max(cfg.leverage, 1)
+
+    return {
+        "symbol": cfg.symbol,
+        "side": cfg.side,
+        "paths": P,
+        "steps": T,
+        "step_minutes": step_minutes,
+        "p_sl": float((outcome == 2).mean()),
+        "p_tp_all": float((outcome == 1).mean()),
+        "p_timeout": float((outcome == 0).mean()),
+        "p_first_tp": float(tp_hit.mean()),
+        "grid_fills": {"mean": float(n_grid.mean()), "max": int(n_grid.max()), **_pct(n_grid)},
+        "grid_fill_dist": np.bincount(n_grid, minlength=n + 1).tolist(),
+        "minutes_in_trade": {"mean": float(minutes.mean()), **_pct(minutes)},
+        "pnl_usdt": {"mean": float(pnl.mean()), "min": float(pnl.min()), **_pct(pnl)},
+        "pnl_on_sl": {"mean": float(pnl[outcome == 2].mean()) if (outcome == 2).any() else 0.0},
+        "peak_margin_usdt": {"mean": float(peak_margin.mean()), "max": float(peak_margin.max()),
+                             **_pct(peak_margin, (50, 95, 99))},
+        "margin_budget_usdt": margin_budget,
+    }
+
+
+def _tp_qty(size: np.ndarray, frac: np.ndarray) -> np.ndarray:
+    """TP ladder quantities for the current size; the last leg takes the remainder (as Engine._replace_tp)."""
+    q = size[:, None] * frac[None, :]
+    if frac.size:
+        q[:, -1] = size - q[:, :-1].sum(axis=1)
+    return q
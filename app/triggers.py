@@ -0,0 +1,319 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedDict
+
+
+class Trigger:
+    """
+    Client-side stop protecting one position.
+
+    `stop` is a pinned price (initial SL, breakeven); with `offset` set the stop
+    trails: once the market makes a new best price it becomes best * (1 - offset)
+    for a long (best * (1 + offset) for a short) and keeps following new bests.
+    """
+
+    def __init__(self, id: str, side: str, stop: float, best: float, offset: Optional[float] = None):
+        self.id = id
+        self.side = side                      # position side: long fires below, short above
+        self.offset = offset
+        self.fired = False
+        self.fired_price: Optional[float] = None
+        self.index: Optional["TriggerIndex"] = None
+        # key space of the owning side: prices for long, negated prices for short
+        self._sign = 1.0 if side == "long" else -1.0
+        self._stop: Optional[float] = self._sign * stop
+        self._best = self._sign * best
+        self._group: Optional["_Group"] = None
+
+    @property
+    def best(self) -> float:
+        return self._sign * (self._group.bucket.best if self._group else self._best)
+
+    @property
+    def stop(self) -> float:
+        if self._group is None:
+            return self._sign * self._stop
+        return self._sign * self.index._side(self).level(self._group)
+
+
+class _Group:
+    """Trailing triggers with the same best price and factor, i.e. the same stop level."""
+
+    def __init__(self, factor: float, key: float, bucket: "_Bucket"):
+        self.factor = factor
+        self.key = key          # sorts like the stop level within a bucket
+        self.bucket = bucket
+        self.members: Dict[str, Trigger] = {}
+
+
+class _Bucket:
+    """Trailing triggers that share one best price, grouped by factor (their stops sort with it)."""
+
+    def __init__(self, best: float):
+        self.best = best
+        self.groups: SortedDict = SortedDict()   # group key -> _Group
+        self.top: Optional[Tuple[float, float]] = None
+
+
+class _Side:
+    """
+    Triggers that fire when the (signed) price falls to or below their stop.
+    Longs use prices as keys, shorts negated prices, so one implementation
+    serves both directions.
+
+    fixed:  pinned stop -> triggers
+    watch:  best -> pinned trailing triggers, waiting for a new best to start trailing
+    trail:  best -> bucket of every trailing trigger with that best; a new best merges
+            the buckets below it (they merge and never split), not individual triggers.
+    tops:   (highest stop level, best) -> bucket. Within a bucket the stop level grows
+            with the factor (falls with it for shorts, whose best is negated), so a price only has to look at the buckets whose highest
+            stop it crosses: the per-tick cost does not depend on how many distinct
+            trailing offsets (e.g. volatility-scaled) the deals use.
+    """
+
+    def __init__(self, sign: float, quantize: Optional[Callable[[float], float]]):
+        self.sign = sign
+        self.q = (lambda x: sign * quantize(sign * x)) if quantize else (lambda x: x)
+        self.fixed: SortedDict = SortedDict()
+        self.watch: SortedDict = SortedDict()
+        self.trail: SortedDict = SortedDict()
+        self.tops: SortedDict = SortedDict()
+
+    def factor(self, t: Trigger) -> float:
+        return 1 - t.offset if t.side == "long" else 1 + t.offset
+
+    def level(self, group: _Group) -> float:
+        return self.q(group.bucket.best * group.factor)
+
+    # ---------- membership ----------
+
+    @staticmethod
+    def _put(book: SortedDict, key: float, t: Trigger):
+        book.setdefault(key, {})[t.id] = t
+
+    @staticmethod
+    def _drop(book: SortedDict, key: float, t: Trigger):
+        group = book.get(key)
+        if group is not None:
+            group.pop(t.id, None)
+            if not group:
+                del book[key]
+
+    def _unlist(self, bucket: _Bucket):
+        if bucket.top is not None:
+            del self.tops[bucket.top]
+            bucket.top = None
+
+    def _list(self, bucket: _Bucket):
+        """(Re-)index a bucket by its highest stop; an empty bucket leaves the side."""
+        self._unlist(bucket)
+        if not bucket.groups:
+            if self.trail.get(bucket.best) is bucket:
+                del self.trail[bucket.best]
+            return
+        bucket.top = (self.level(bucket.groups.peekitem(-1)[1]), bucket.best)
+        self.tops[bucket.top] = bucket
+
+    def _join(self, t: Trigger, best: float):
+        bucket = self.trail.get(best)
+        if bucket is None:
+            bucket = self.trail[best] = _Bucket(best)
+        f = self.factor(t)
+        group = bucket.groups.get(self.sign * f)
+        if group is None:
+            group = bucket.groups[self.sign * f] = _Group(f, self.sign * f, bucket)
+        group.members[t.id] = t
+        t._group, t._stop = group, None
+        self._list(bucket)
+
+    @staticmethod
+    def _merge(a: _Bucket, b: _Bucket) -> _Bucket:
+        """Merge two buckets small-to-large (groups, then members of groups with the same key)."""
+        small, large = (a, b) if len(a.groups) <= len(b.groups) else (b, a)
+        for k, g in small.groups.items():
+            target = large.groups.get(k)
+            if target is None:
+                g.bucket = large
+                large.groups[k] = g
+                continue
+            if len(g.members) > len(target.members):
+                g, target = target, g
+                g.bucket, target.bucket = large, large
+                large.groups[k] = target
+            for t in g.members.values():
+                t._group = target
+            target.members.update(g.members)
+        return large
+
+    def add(self, t: Trigger):
+        self._put(self.fixed, t._stop, t)
+        if t.offset is not None:
+            self._put(self.watch, t._best, t)
+
+    def remove(self, t: Trigger):
+        if t._group is not None:
+            group = t._group
+            bucket = group.bucket
+            group.members.pop(t.id, None)
+            if not group.members:
+                del bucket.groups[group.key]
+                self._list(bucket)
+            t._best, t._group = bucket.best, None
+        else:
+            self._drop(self.fixed, t._stop, t)
+            if t.offset is not None:
+                self._drop(self.watch, t._best, t)
+
+    # ---------- price updates ----------
+
+    def on_price(self, x: float) -> List[Trigger]:
+        # 1) trailing buckets below the new best merge into the bucket at x
+        target = self.trail.get(x)
+        if target is not None:
+            self._unlist(target)
+        while self.trail and self.trail.peekitem(0)[0] < x:
+            _, bucket = self.trail.popitem(0)
+            self._unlist(bucket)
+            target = bucket if target is None else self._merge(target, bucket)
+        if target is not None:
+            target.best = x
+            self.trail[x] = target
+            self._list(target)
+
+        # 2) pinned trailing stops start trailing on a new best
+        while self.watch and self.watch.peekitem(0)[0] < x:
+            _, group = self.watch.popitem(0)
+            for t in group.values():
+                self._drop(self.fixed, t._stop, t)
+                self._join(t, x)
+
+        # 3) fire every stop at or above the price: a suffix of each book
+        fired: List[Trigger] = []
+        while self.fixed and self.fixed.peekitem(-1)[0] >= x:
+            _, group = self.fixed.popitem(-1)
+            for t in group.values():
+                if t.offset is not None:
+                    self._drop(self.watch, t._best, t)
+                fired.append(t)
+        while self.tops and self.tops.peekitem(-1)[0][0] >= x:
+            _, bucket = self.tops.popitem(-1)
+            bucket.top = None
+            while bucket.groups and self.level(bucket.groups.peekitem(-1)[1]) >= x:
+                _, group = bucket.groups.popitem(-1)
+                stop = self.level(group)
+                for t in group.members.values():
+                    t._best, t._stop, t._group = bucket.best, stop, None
+                    fired.append(t)
+            self._list(bucket)
+        return fired
+
+
+class TriggerIndex:
+    """
+    All client-side stops on one symbol, indexed by trigger price in both
+    directions. A price update touches only the stops it crosses (and the
+    trailing buckets it re-keys): O(log n + k) per update, so thousands of deals
+    can share one price stream.
+    """
+
+    def __init__(self, symbol: str, quantize: Optional[Callable[[float], float]] = None):
+        self.symbol = symbol
+        self._lock = threading.Lock()
+        self._long = _Side(1.0, quantize)
+        self._short = _Side(-1.0, quantize)
+        self._triggers: Dict[str, Trigger] = {}
+
+    def _side(self, t: Trigger) -> _Side:
+        return self._long if t.side == "long" else self._short
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def add(self, t: Trigger) -> Trigger:
+        with self._lock:
+            if t.id in self._triggers:
+                self._side(self._triggers[t.id]).remove(self._triggers[t.id])
+            t.index = self
+            self._triggers[t.id] = t
+            self._side(t).add(t)
+        return t
+
+    def remove(self, t: Trigger):
+        with self._lock:
+            if self._triggers.get(t.id) is t:
+                del self._triggers[t.id]
+                self._side(t).remove(t)
+
+    def set_stop(self, t: Trigger, stop: float):
+        """Pin the stop at a new price (e.g. breakeven); a trailing stop resumes on the next new best."""
+        with self._lock:
+            if self._triggers.get(t.id) is not t:
+                return
+            side = self._side(t)
+            side.remove(t)
+            t._stop = t._sign * stop
+            side.add(t)
+
+    def set_offset(self, t: Trigger, offset: float):
+        """
+        Change the trailing offset (e.g. volatility-scaled). A tighter offset moves a
+        trailing stop at once; a wider one never loosens it: the stop is pinned where
+        it is and the new offset applies from the next new best.
+        """
+        with self._lock:
+            if self._triggers.get(t.id) is not t:
+                return
+            side = self._side(t)
+            group = t._group
+            side.remove(t)
+            if group is not None:
+                old = side.level(group)
+                best = group.bucket.best
+                t.offset = offset
+                if side.q(best * side.factor(t)) >= old:
+                    side._join(t, best)
+                    return
+                t._stop = old
+            t.offset = offset
+            side.add(t)
+
+    def on_price(self, price: float) -> List[Trigger]:
+        """Apply a price update; returns (and removes) the triggers it fired."""
+        with self._lock:
+            fired = self._long.on_price(price) + self._short.on_price(-price)
+            for t in fired:
+                t.fired, t.fired_price = True, price
+                del self._triggers[t.id]
+        return fired
+
+
+class TriggerRegistry:
+    """Trigger index per (venue, account, symbol), shared by every deal in the process."""
+
+    def __init__(self):
+        self._books: Dict[Tuple[Optional[str], str, str], TriggerIndex] = {}
+        self._lock = threading.Lock()
+
+    def book(
+        self, venue: Optional[str], account: str, symbol: str,
+        quantize: Optional[Callable[[float], float]] = None,
+    ) -> TriggerIndex:
+        """
+        Index for `symbol` on one venue account. `quantize` (tick rounding of stop levels)
+        comes with the entry: every deal on the key trades the same market, so the first
+        caller's rules serve them all. Pass a function over a market snapshot
+        (MarketFilters), not over a live client, so the book does not keep one alive.
+        """
+        key = (venue, account, symbol)
+        with self._lock:
+            if key not in self._books:
+                self._books[key] = TriggerIndex(symbol, quantize)
+            return self._books[key]
+
+    def on_price(self, venue: Optional[str], account: str, symbol: str, price: float) -> List[Trigger]:
+        book = self._books.get((venue, account, symbol))
+        return book.on_price(price) if book else []
+
+
+triggers = TriggerRegistry()
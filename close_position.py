@@ -1,8 +1,10 @@
 import os
 import re
-import ccxt
 from dotenv import load_dotenv
 
+from app.exchanges.market_rules import MarketFilters
+from app.exchanges.session import build_exchange
+
 
 def norm(sym: str) -> str:
     # BTC/USDT:USDT -> BTCUSDT
@@ -11,35 +13,8 @@ def norm(sym: str) -> str:
 
 def get_exchange():
     load_dotenv()
-    ex = ccxt.bybit({
-        "apiKey": os.getenv("API_KEY"),
-        "secret": os.getenv("API_SECRET"),
-        "enableRateLimit": True,
-        "options": {"defaultType": "swap"},   # USDT perpetuals
-    })
-    if hasattr(ex, "set_sandbox_mode"):
-        ex.set_sandbox_mode(os.getenv("TESTNET", "true").lower() == "true")
-    return ex
-
-
-def round_amount(exchange, symbol, amount: float) -> float:
-    """
-    Rounds amount according to market precision.
-    Example: if precision=0.001 -> round to 3 decimals
-    """
-    market = exchange.market(symbol)
-    precision = market.get("precision", {}).get("amount", None)
-
-    if precision is None:
-        return amount
-
-    if isinstance(precision, float):
-        # Example: 0.001 -> 3 decimals
-        decimals = abs(int(round(-1 * (len(str(precision).split('.')[-1])))))
-    else:
-        decimals = int(precision)
-
-    return float(round(amount, decimals))
+    # USDT perpetuals on the shared pooled session
+    return build_exchange(load_markets=False)
 
 
 def find_position(ex, target_symbol):
@@ -87,7 +62,8 @@ def main():
         print("ℹ️ Position size is zero — nothing to close.")
         return
 
-    qty = round_amount(ex, env_symbol, contracts)
+    # lot-exact amount in the exchange's precision (integer lots, no float noise)
+    qty = float(MarketFilters(ex.market(env_symbol)).amount_to_precision(env_symbol, contracts))
     close_side = "sell" if side == "long" else "buy"
     params = {"reduceOnly": True}
 
@@ -0,0 +1,70 @@
+import sys
+import json
+import logging
+import pathlib
+import argparse
+import statistics
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.bench import check_regression, run_once
+from app.utils.logger import logger
+
+
+def main():
+    """
+    Replay a recorded deal through Engine.run and measure CPU time, peak allocations
+    and exchange call counts. Record a deal first with EXCHANGE_RECORD=deal.ndjson
+    (or app.bench.record_simulated). pytest tests/bench_engine.py runs the same replay
+    against the committed recording and baseline.
+
+    Usage:
+        python scripts/bench_engine.py deal.ndjson deal_config.json --rounds 5
+        python scripts/bench_engine.py deal.ndjson deal_config.json --baseline bench.json --save
+        python scripts/bench_engine.py deal.ndjson deal_config.json --baseline bench.json
+    """
+    ap = argparse.ArgumentParser(description="Offline Engine.run benchmark over a recorded exchange log")
+    ap.add_argument("recording")
+    ap.add_argument("config")
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--baseline", help="JSON file with reference numbers")
+    ap.add_argument("--save", action="store_true", help="write the result as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    args = ap.parse_args()
+
+    # Engine logs every tick; keep the console quiet so logging doesn't dominate the numbers.
+    logger.setLevel(logging.WARNING)
+
+    cpu = [run_once(args.recording, args.config)["cpu_ms"] for _ in range(args.rounds)]
+    traced = run_once(args.recording, args.config, trace=True)
+    result = {
+        "cpu_ms": statistics.median(cpu),
+        "cpu_ms_min": min(cpu),
+        "peak_kib": traced["peak_kib"],
+        "calls": traced["calls"],
+        "events": traced["events"],
+    }
+    print(json.dumps(result, indent=2))
+
+    if not args.baseline:
+        return
+    path = pathlib.Path(args.baseline)
+    if args.save:
+        path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {path}")
+        return
+
+    problems = check_regression(result, json.loads(path.read_text(encoding="utf-8")), args.tolerance)
+    if problems:
+        print("❌ Performance regression:")
+        for p in problems:
+            print(f" - {p}")
+        sys.exit(1)
+    print("✅ Within baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import sys
+import json
+import pathlib
+import argparse
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from pydantic import ValidationError
+
+from app.models import DealConfig
+from app.planner import MarketCache, compile_deal
+
+
+def _config_paths(items):
+    for item in items:
+        p = pathlib.Path(item)
+        if p.is_dir():
+            yield from sorted(p.glob("*.json"))
+        else:
+            yield p
+
+
+def main():
+    """
+    Validate deal configs in batch: compile each one into a plan against cached market filters.
+
+    Usage:
+        python scripts/compile_deals.py configs/ --markets logs/markets.json
+        python scripts/compile_deals.py a.json b.json --price BTC/USDT:USDT=65000 --offline
+        python scripts/compile_deals.py configs/ --warm
+    Exit code 1 if any config is invalid or its plan is rejected.
+    """
+    ap = argparse.ArgumentParser(description="Compile deal configs into pre-trade plans")
+    ap.add_argument("configs", nargs="+", help="config files or directories of *.json")
+    ap.add_argument("--markets", default="logs/markets.json", help="market filters cache")
+    ap.add_argument("--price", action="append", default=[], metavar="SYMBOL=PRICE",
+                    help="reference price per symbol (default: live last price)")
+    ap.add_argument("--offline", action="store_true", help="never call the exchange")
+    ap.add_argument("--json", action="store_true", help="print full plans as JSON lines")
+    ap.add_argument("--warm", action="store_true",
+                    help="apply margin/position mode + leverage for all accepted plans in one parallel batch")
+    args = ap.parse_args()
+
+    prices = {k: float(v) for k, v in (p.rsplit("=", 1) for p in args.price)}
+    cache = MarketCache(args.markets)
+    ex = None
+    if not args.offline:
+        from app.exchanges.ccxt_client import shared_client
+        ex = shared_client()
+
+    failed = 0
+    leverages = {}
+    for path in _config_paths(args.configs):
+        try:
+            cfg = DealConfig(**json.loads(path.read_text(encoding="utf-8")))
+        except (ValueError, ValidationError) as e:
+            failed += 1
+            print(f"❌ {path}: invalid config: {e}")
+            continue
+
+        rules = cache.get(cfg.symbol, ex)
+        if cfg.symbol not in prices and ex is not None:
+            prices[cfg.symbol] = ex.last_price(cfg.symbol)
+        if rules is None or cfg.symbol not in prices:
+            failed += 1
+            print(f"❌ {path}: no cached market filters / price for {cfg.symbol} (run without --offline)")
+            continue
+
+        plan = compile_deal(cfg, rules, prices[cfg.symbol])
+        if plan.ok:
+            leverages[plan.symbol] = plan.leverage
+        if args.json:
+            print(plan.model_dump_json())
+            failed += not plan.ok
+            continue
+        grid_ok = sum(1 for l in plan.grid if not l.skip)
+        mark = "✅" if plan.ok else "❌"
+        print(
+            f"{mark} {path}: {plan.symbol} {plan.side} qty={plan.entry.qty} "
+            f"grid={grid_ok}/{len(plan.grid)} tp={sum(1 for l in plan.tp if not l.skip)}/{len(plan.tp)} "
+            f"sl={plan.sl_price} margin={plan.required_margin:.2f} plan={plan.key}"
+        )
+        for err in plan.errors:
+            print(f"     error: {err}")
+        for leg in plan.skipped:
+            print(f"     skip {leg.kind} @ {leg.price}: {leg.skip}")
+        failed += not plan.ok
+
+    if ex is not None:
+        cache.save()
+        if args.warm and leverages:
+            for symbol, res in ex.warm_account_state(leverages).items():
+                if isinstance(res, Exception):
+                    failed += 1
+                    print(f"❌ {symbol}: account setup failed: {res}")
+                else:
+                    print(f"🔧 {symbol}: isolated / one-way / leverage {leverages[symbol]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import sys
+import json
+import pathlib
+import argparse
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.flatten import flatten_all
+
+
+def main():
+    """
+    Kill-switch: cancel all open orders and close all positions on every venue.
+
+    Usage:
+        python scripts/flatten_all.py --yes
+        python scripts/flatten_all.py --yes --venues bybit,gate --json
+    """
+    ap = argparse.ArgumentParser(description="Cancel all orders and close all positions across venues")
+    ap.add_argument("--yes", action="store_true", help="confirm (required)")
+    ap.add_argument("--venues", help="comma-separated venues (default: EXCHANGE)")
+    ap.add_argument("--retries", type=int, default=2)
+    ap.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = ap.parse_args()
+
+    if not args.yes:
+        ap.error("refusing to flatten without --yes")
+
+    venues = [v.strip().lower() for v in args.venues.split(",") if v.strip()] if args.venues else None
+    report = flatten_all(venues, retries=args.retries)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for v in report["venues"]:
+            mark = "✅" if v["flat"] else "❌"
+            closed = sum(1 for c in v["closes"] if c["ok"])
+            print(f"{mark} {v['venue']}: cancel={'ok' if v['cancel'].get('ok') else v['cancel']} "
+                  f"closed={closed} remaining={len(v['remaining'])} in {v['elapsed_ms']} ms")
+            for r in v["remaining"]:
+                print(f"   ⚠️ still open: {r['symbol']} {r['side']} {r['contracts']}")
+        print(f"{'🎉 Flat' if report['flat'] else '⚠️ NOT flat'} after {report['elapsed_ms']} ms")
+    sys.exit(0 if report["flat"] else 1)
+
+
+if __name__ == "__main__":
+    main()
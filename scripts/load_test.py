@@ -0,0 +1,390 @@
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import pathlib
+import argparse
+import resource
+import subprocess
+import tempfile
+from array import array
+from collections import defaultdict
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SYMBOL = "BTC/USDT:USDT"
+EVENT_TYPES = ("grid", "grid_fill", "tp", "tp_fill", "sl_move_be")
+HTTP_PATHS = (
+    f"/status?symbol={SYMBOL}",
+    f"/events?symbol={SYMBOL}&limit=50",
+    f"/ticker?symbol={SYMBOL}",
+    f"/ohlcv?symbol={SYMBOL}&timeframe=1m&limit=200",
+)
+
+
+# ---------------------------------------------------------------------------
+# Server side (child process): API on a SimulatedExchange + event publisher
+# ---------------------------------------------------------------------------
+
+def serve(port: int):
+    """API app against a local SimulatedExchange, plus POST /_load/publish to drive the EventBus."""
+    import threading
+    from datetime import datetime, timezone
+
+    import uvicorn
+
+    import app.exchanges.ccxt_client as ccxt_client
+    from app.exchanges.simulated import SimulatedExchange
+    from app.utils.logger import logger
+
+    sim = SimulatedExchange(mid=65000.0, tick=0.1)
+    ccxt_client.shared_client = lambda ex_name=None: sim     # the API's exchange (never the network)
+    logger.setLevel(logging.WARNING)
+
+    import app.api as api
+    from app.engine import emit_event
+    from app.event_bus import bus
+
+    def publish(rate: float, count: int, db: bool, seed: int):
+        rng = random.Random(seed)
+        price = sim.mid
+        t0 = time.time()
+        n = 0
+        try:
+            for n in range(count):
+                delay = t0 + n / rate - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                price = round(price * (1 + rng.gauss(0, 0.0005)), 1)
+                sim.set_price(price)
+                ev = {
+                    "type": EVENT_TYPES[n % len(EVENT_TYPES)], "symbol": SYMBOL, "side": "buy",
+                    "price": price, "qty": 0.001, "deal_id": "loadtest",
+                    "extra": json.dumps({"n": n, "t": time.time()}),
+                }
+                if db:
+                    emit_event(ev)       # the engine path: stored, then fanned out
+                else:
+                    bus.publish_sync("events", {**ev, "ts": datetime.now(timezone.utc).isoformat()})
+        except Exception as e:
+            api.app.state.load_published = {"count": n, "seconds": time.time() - t0, "error": repr(e)}
+            return
+        api.app.state.load_published = {"count": count, "seconds": time.time() - t0}
+
+    @api.app.post("/_load/publish")
+    def load_publish(rate: float = 100.0, count: int = 1000, db: bool = False, seed: int = 42):
+        api.app.state.load_published = None
+        threading.Thread(target=publish, args=(rate, count, db, seed), daemon=True).start()
+        return {"ok": True}
+
+    @api.app.get("/_load/published")
+    def load_published():
+        return getattr(api.app.state, "load_published", None) or {}
+
+    # idle streams of gone clients only notice on their next send: don't wait for them on exit
+    uvicorn.run(api.app, host="127.0.0.1", port=port, log_level="warning", timeout_graceful_shutdown=3)
+
+
+# ---------------------------------------------------------------------------
+# Client side (harness)
+# ---------------------------------------------------------------------------
+
+def _proc_cpu_seconds(pid: int) -> float:
+    """utime + stime of a process from /proc (Linux); 0 elsewhere."""
+    try:
+        fields = pathlib.Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def _self_cpu_seconds() -> float:
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _proc_mem_mb(pid: int) -> dict:
+    out = {}
+    try:
+        for line in pathlib.Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                out["rss_mb" if line.startswith("VmRSS") else "peak_rss_mb"] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return out
+
+
+def _pct(values, qs=(50, 90, 99)) -> dict:
+    if not len(values):
+        return {}
+    s = sorted(values)
+    out = {f"p{q}": round(s[min(len(s) - 1, int(len(s) * q / 100))], 2) for q in qs}
+    out["max"] = round(s[-1], 2)
+    return out
+
+
+class Stats:
+    def __init__(self, count: int):
+        self.count = count
+        self.latency_ms = array("d")
+        self.received = []              # per ws client: unique event numbers seen
+        self.ws_failed = 0
+        self.frames = 0
+        self.http = defaultdict(lambda: array("d"))
+        self.http_errors = defaultdict(int)
+
+
+async def ws_client(url: str, stats: Stats, ready: asyncio.Event, done: asyncio.Event, gate: asyncio.Semaphore):
+    import websockets
+
+    seen = set()
+    try:
+        async with gate:
+            ws = await websockets.connect(url, max_size=None, open_timeout=30)
+        async with ws:
+            stats.received.append(seen)
+            ready.set()
+            while not done.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                frame = json.loads(raw)
+                stats.frames += 1
+                if frame.get("type") == "snapshot":
+                    continue
+                now = time.time()
+                for ev in frame.get("events", ()):
+                    try:
+                        tag = json.loads(ev.get("extra") or "{}")
+                    except ValueError:
+                        continue
+                    if "n" in tag and tag["n"] not in seen:
+                        seen.add(tag["n"])
+                        stats.latency_ms.append((now - tag["t"]) * 1000)
+                if len(seen) >= stats.count:
+                    return
+    except Exception:
+        stats.ws_failed += 1
+
+
+async def http_client(client, stats: Stats, done: asyncio.Event, rng: random.Random):
+    while not done.is_set():
+        path = HTTP_PATHS[rng.randrange(len(HTTP_PATHS))]
+        name = path.split("?")[0]
+        t = time.perf_counter()
+        try:
+            r = await client.get(path)
+            if r.status_code >= 400:
+                stats.http_errors[name] += 1
+        except Exception:
+            stats.http_errors[name] += 1
+        stats.http[name].append((time.perf_counter() - t) * 1000)
+
+
+async def run_load(args, base: str, pid: int) -> dict:
+    import httpx
+
+    stats = Stats(args.events)
+    done = asyncio.Event()
+    gate = asyncio.Semaphore(args.connect_concurrency)
+    ws_url = base.replace("http", "ws", 1) + f"/ws/stream?symbol={SYMBOL}&snapshot=0&batch_ms={args.batch_ms}"
+
+    t = time.perf_counter()
+    ready = [asyncio.Event() for _ in range(args.ws)]
+    ws_tasks = [asyncio.create_task(ws_client(ws_url, stats, ready[i], done, gate)) for i in range(args.ws)]
+    # wait for every client to connect (or fail) before publishing
+    while sum(e.is_set() for e in ready) + stats.ws_failed < args.ws and time.perf_counter() - t < 120:
+        await asyncio.sleep(0.1)
+    connect_s = time.perf_counter() - t
+
+    limits = httpx.Limits(max_connections=args.http, max_keepalive_connections=args.http)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        rng = random.Random(args.seed)
+        http_tasks = [
+            asyncio.create_task(http_client(client, stats, done, random.Random(rng.random())))
+            for _ in range(args.http)
+        ]
+        cpu0, own0, wall0 = _proc_cpu_seconds(pid), _self_cpu_seconds(), time.perf_counter()
+        await client.post("/_load/publish", params={
+            "rate": args.rate, "count": args.events, "db": args.db, "seed": args.seed,
+        })
+        deadline = time.perf_counter() + args.events / args.rate + args.drain
+        published = {}
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.25)
+            if not published:
+                published = (await client.get("/_load/published")).json()
+            if published.get("error") or (published and all(len(s) >= args.events for s in stats.received)):
+                break
+        wall = time.perf_counter() - wall0
+        cpu = _proc_cpu_seconds(pid) - cpu0
+        own = _self_cpu_seconds() - own0
+        mem = _proc_mem_mb(pid)
+        done.set()
+        await asyncio.gather(*http_tasks, return_exceptions=True)
+    await asyncio.gather(*ws_tasks, return_exceptions=True)
+
+    connected = len(stats.received)
+    expected = connected * (published.get("count") or 0)
+    delivered = sum(len(s) for s in stats.received)
+    return {
+        "params": {k: getattr(args, k) for k in ("ws", "http", "rate", "events", "db", "batch_ms", "seed")},
+        "ws": {
+            "connected": connected,
+            "failed": stats.ws_failed,
+            "connect_s": round(connect_s, 2),
+            "delivered": delivered,
+            "dropped": expected - delivered,
+            "dropped_pct": round(100.0 * (expected - delivered) / expected, 3) if expected else 0.0,
+            "frames": stats.frames,
+            "latency_ms": _pct(stats.latency_ms),
+        },
+        "http": {
+            name: {"requests": len(v), "errors": stats.http_errors[name], "rps": round(len(v) / wall, 1),
+                   "latency_ms": _pct(v, (50, 95, 99))}
+            for name, v in sorted(stats.http.items())
+        },
+        "publisher": {
+            "events": args.events,
+            "rate_target": args.rate,
+            "published": published.get("count"),
+            "rate_achieved": round(published["count"] / published["seconds"], 1) if published.get("seconds") else None,
+            **({"error": published["error"]} if published.get("error") else {}),
+        },
+        "server": {"cpu_pct": round(100.0 * cpu / wall, 1) if wall else None, **{
+            k: round(v, 1) for k, v in mem.items()
+        }},
+        # clients share the machine with the server: a saturated harness inflates latencies
+        "harness": {
+            "cpu_pct": round(100.0 * own / wall, 1) if wall else None,
+            "maxrss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+
+
+def check_regression(result: dict, baseline: dict, tolerance: float) -> list:
+    problems = []
+    base_p99 = baseline.get("ws", {}).get("latency_ms", {}).get("p99")
+    p99 = result["ws"]["latency_ms"].get("p99")
+    if base_p99 and p99 and p99 > base_p99 * (1 + tolerance):
+        problems.append(f"ws p99 latency: {p99:.2f} ms > {base_p99:.2f} ms (+{tolerance:.0%})")
+    base_drop = baseline.get("ws", {}).get("dropped_pct", 0.0)
+    drop = result["ws"]["dropped_pct"]
+    if drop > base_drop * (1 + tolerance) + 0.1:
+        problems.append(f"ws dropped: {drop:.3f}% > {base_drop:.3f}%")
+    for name, cur in result["http"].items():
+        ref = baseline.get("http", {}).get(name, {}).get("latency_ms", {}).get("p95")
+        got = cur["latency_ms"].get("p95")
+        if ref and got and got > ref * (1 + tolerance):
+            problems.append(f"http {name} p95: {got:.2f} ms > {ref:.2f} ms (+{tolerance:.0%})")
+    return problems
+
+
+def main():
+    """
+    Load-test the API: a child process serves the FastAPI app on a SimulatedExchange
+    (temporary DB and archive), this process opens WebSocket and HTTP clients, the
+    server publishes synthetic TradeEvents through the EventBus at a fixed rate, and
+    the report gives delivery latency percentiles, dropped messages, HTTP latency and
+    server CPU / memory. Same parameters and seed -> same workload on every commit.
+
+    Usage:
+        python scripts/load_test.py --ws 1000 --http 50 --rate 100 --events 2000
+        python scripts/load_test.py --ws 2000 --rate 200 --db --baseline load.json --save
+        python scripts/load_test.py --ws 2000 --rate 200 --db --baseline load.json
+    """
+    ap = argparse.ArgumentParser(description="Load test for /ws/stream, /status, /events, /ticker, /ohlcv")
+    ap.add_argument("--ws", type=int, default=500, help="concurrent WebSocket clients")
+    ap.add_argument("--http", type=int, default=20, help="concurrent HTTP clients (closed loop)")
+    ap.add_argument("--rate", type=float, default=100.0, help="published events per second")
+    ap.add_argument("--events", type=int, default=1000, help="events to publish")
+    ap.add_argument("--db", action="store_true",
+                    help="store each event before publishing, like the engine (default: bus only)")
+    ap.add_argument("--batch-ms", type=int, default=100, help="/ws/stream batch window")
+    ap.add_argument("--connect-concurrency", type=int, default=200, help="WebSocket handshakes in flight")
+    ap.add_argument("--drain", type=float, default=10.0,
+                    help="seconds to wait after the last publish; events not received by then count as dropped")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--baseline", help="JSON file with reference numbers")
+    ap.add_argument("--save", action="store_true", help="write the result as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed relative latency increase")
+    ap.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    need = args.ws + args.http + 256
+    if soft < need:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(need, hard), hard))
+
+    tmp = tempfile.mkdtemp(prefix="loadtest-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp}/events.db",
+        "ARCHIVE_DIR": f"{tmp}/archive",
+        "EVENT_BROKER": "local",
+    }
+    server = subprocess.Popen(
+        [sys.executable, str(pathlib.Path(__file__).resolve()), "--serve", "--port", str(args.port)],
+        cwd=str(ROOT), env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        import httpx
+        for _ in range(200):
+            try:
+                if httpx.get(f"{base}/ping", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                sys.exit("❌ Server failed to start")
+            time.sleep(0.1)
+        result = asyncio.run(run_load(args, base, server.pid))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    try:
+        result["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        result["commit"] = None
+    print(json.dumps(result, indent=2))
+    if result["publisher"].get("error") or not result["ws"]["connected"]:
+        sys.exit("❌ Load run failed (see publisher / ws above)")
+
+    if not args.baseline:
+        return
+    path = pathlib.Path(args.baseline)
+    if args.save:
+        path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {path}")
+        return
+
+    problems = check_regression(result, json.loads(path.read_text(encoding="utf-8")), args.tolerance)
+    if problems:
+        print("❌ Performance regression:")
+        for p in problems:
+            print(f" - {p}")
+        sys.exit(1)
+    print("✅ Within baseline")
+
+
+if __name__ == "__main__":
+    main()
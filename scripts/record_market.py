@@ -0,0 +1,37 @@
+import sys
+import pathlib
+import argparse
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Load environment variables from .env before building the exchange client.
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.archive import MarketRecorder, archive
+from app.exchanges.ccxt_client import shared_client
+
+
+def main():
+    """
+    Persist candles and trades into the local columnar archive (logs/archive by default).
+
+    Usage:
+        python scripts/record_market.py BTC/USDT:USDT ETH/USDT:USDT --timeframes 1m 1s
+    """
+    ap = argparse.ArgumentParser(description="Record market data into the local archive")
+    ap.add_argument("symbols", nargs="+")
+    ap.add_argument("--timeframes", nargs="+", default=["1m"])
+    ap.add_argument("--no-trades", action="store_true")
+    ap.add_argument("--interval", type=float, default=5.0, help="seconds between polls")
+    args = ap.parse_args()
+
+    recorder = MarketRecorder(shared_client().client, archive)
+    recorder.run(args.symbols, args.timeframes, trades=not args.no_trades, interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import pathlib
+import argparse
+from datetime import datetime, timedelta
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db import archive_events, init_db
+
+
+def main():
+    """
+    Move trade events older than the retention window into monthly archive partitions.
+
+    Usage:
+        python scripts/rotate_events.py --days 30
+    """
+    ap = argparse.ArgumentParser(description="Archive old trade events out of the live table")
+    ap.add_argument("--days", type=int, default=int(os.getenv("EVENTS_RETENTION_DAYS", "30")))
+    ap.add_argument("--archive-dir", default=os.getenv("EVENTS_ARCHIVE_DIR", "logs/events_archive"))
+    args = ap.parse_args()
+
+    init_db()
+    before = datetime.utcnow() - timedelta(days=args.days)
+    moved = archive_events(before, args.archive_dir)
+    print(f"🗄️ Archived {moved} events older than {before:%Y-%m-%d %H:%M}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import os
 import sys
 import pathlib
 
@@ -21,12 +22,25 @@ def main():
         python scripts/run_deal.py deal_config.json
     or:
         python -m scripts.run_deal deal_config.json
+    or hand it to a running API process (no interpreter / market load per deal; sends API_TOKEN):
+        python scripts/run_deal.py deal_config.json --server http://localhost:8000
     """
     if len(sys.argv) < 2:
-        print("Usage: python scripts/run_deal.py <config_path.json>")
+        print("Usage: python scripts/run_deal.py <config_path.json> [--server URL]")
         sys.exit(1)
 
     cfg_path = sys.argv[1]
+    if "--server" in sys.argv:
+        import json
+        import httpx
+
+        url = sys.argv[sys.argv.index("--server") + 1].rstrip("/")
+        cfg = json.loads(pathlib.Path(cfg_path).read_text(encoding="utf-8"))
+        headers = {"X-API-Token": os.getenv("API_TOKEN", "")}
+        r = httpx.post(f"{url}/deals", json=cfg, headers=headers, timeout=30)
+        print(r.json())
+        sys.exit(0 if r.status_code == 201 else 1)
+
     Engine().run(cfg_path)
 
 
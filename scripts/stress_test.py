@@ -0,0 +1,122 @@
+import sys
+import json
+import math
+import pathlib
+import argparse
+
+# Ensure project root is on sys.path so "import app" works when running as a file.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.archive import archive, timeframe_ms
+from app.models import DealConfig
+from app.stress import bootstrap, gbm, jump_diffusion, simulate
+
+
+def _config_paths(items):
+    for item in items:
+        p = pathlib.Path(item)
+        if p.is_dir():
+            yield from sorted(p.glob("*.json"))
+        else:
+            yield p
+
+
+def _closes(symbol: str, timeframe: str, n: int, offline: bool) -> np.ndarray:
+    candles = archive.tail(symbol, timeframe, n)
+    if len(candles) < n and not offline:
+        from app.exchanges.ccxt_client import shared_client
+        from app.indicators import load_candles
+        candles = load_candles(shared_client(), symbol, timeframe, n)
+    if candles.dtype.names:
+        return np.asarray(candles["close"], dtype=float)
+    return np.asarray(candles, dtype=float).reshape(-1, 6)[:, 4]
+
+
+def main():
+    """
+    Monte Carlo stress test of deal configs: each config runs over many synthetic price
+    paths at once and gets a summary (SL probability, grid fills, time in trade, PnL,
+    peak margin).
+
+    Usage:
+        python scripts/stress_test.py configs/ --model gbm --vol-daily 4 --paths 20000
+        python scripts/stress_test.py deal.json --model jump --jump-rate 2 --jump-std 3
+        python scripts/stress_test.py deal.json --model bootstrap --timeframe 1m --candles 5000
+    Same --seed, same result.
+    """
+    ap = argparse.ArgumentParser(description="Monte Carlo stress test of deal configs")
+    ap.add_argument("configs", nargs="+", help="config files or directories of *.json")
+    ap.add_argument("--model", choices=("gbm", "jump", "bootstrap"), default="gbm")
+    ap.add_argument("--paths", type=int, default=10000)
+    ap.add_argument("--step-minutes", type=float, default=1.0, help="monitor tick (gbm / jump)")
+    ap.add_argument("--vol-daily", type=float, default=3.0, help="daily volatility, %% (gbm / jump)")
+    ap.add_argument("--drift-daily", type=float, default=0.0, help="daily drift, %% (gbm / jump)")
+    ap.add_argument("--jump-rate", type=float, default=1.0, help="jumps per day (jump)")
+    ap.add_argument("--jump-mean", type=float, default=0.0, help="mean jump, %% (jump)")
+    ap.add_argument("--jump-std", type=float, default=2.0, help="jump size std, %% (jump)")
+    ap.add_argument("--timeframe", default="1m", help="candles to resample returns from (bootstrap)")
+    ap.add_argument("--candles", type=int, default=5000, help="history length (bootstrap)")
+    ap.add_argument("--offline", action="store_true", help="archive only, never call the exchange")
+    ap.add_argument("--maker-fee", type=float, default=0.0002)
+    ap.add_argument("--taker-fee", type=float, default=0.00055)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", action="store_true", help="print full reports as JSON lines")
+    args = ap.parse_args()
+
+    failed = 0
+    for path in _config_paths(args.configs):
+        try:
+            cfg = DealConfig(**json.loads(path.read_text(encoding="utf-8")))
+        except (ValueError, ValidationError) as e:
+            failed += 1
+            print(f"❌ {path}: invalid config: {e}")
+            continue
+
+        step_minutes = args.step_minutes
+        if args.model == "bootstrap":
+            closes = _closes(cfg.symbol, args.timeframe, args.candles, args.offline)
+            if len(closes) < 2:
+                failed += 1
+                print(f"❌ {path}: no {args.timeframe} candles for {cfg.symbol} (record them or run without --offline)")
+                continue
+            model = bootstrap(np.diff(np.log(closes)))
+            step_minutes = timeframe_ms(args.timeframe) / 60000
+        else:
+            steps_per_day = 1440.0 / step_minutes
+            sigma = args.vol_daily / 100.0 / math.sqrt(steps_per_day)
+            mu = args.drift_daily / 100.0 / steps_per_day
+            if args.model == "gbm":
+                model = gbm(sigma, mu)
+            else:
+                model = jump_diffusion(sigma, args.jump_rate / steps_per_day, args.jump_mean / 100.0,
+                                       args.jump_std / 100.0, mu)
+
+        rep = simulate(cfg, model, n_paths=args.paths, step_minutes=step_minutes,
+                       maker_fee=args.maker_fee, taker_fee=args.taker_fee, seed=args.seed)
+        if args.json:
+            print(json.dumps({"config": str(path), "model": args.model, **rep}))
+            continue
+        pnl, grid, mins, margin = rep["pnl_usdt"], rep["grid_fills"], rep["minutes_in_trade"], rep["peak_margin_usdt"]
+        print(f"📊 {path}: {rep['symbol']} {rep['side']} — {rep['paths']} {args.model} paths × {rep['steps']} steps")
+        print(f"     SL {rep['p_sl']:.1%} | all TP {rep['p_tp_all']:.1%} | timeout {rep['p_timeout']:.1%} "
+              f"| first TP {rep['p_first_tp']:.1%}")
+        print(f"     grid fills: mean {grid['mean']:.2f}, p95 {grid['p95']:.0f}, max {grid['max']} "
+              f"(dist {rep['grid_fill_dist']})")
+        print(f"     time in trade: mean {mins['mean']:.0f} min, p50 {mins['p50']:.0f}")
+        print(f"     PnL USDT: mean {pnl['mean']:.2f}, p5 {pnl['p5']:.2f}, p50 {pnl['p50']:.2f}, "
+              f"p95 {pnl['p95']:.2f}, worst {pnl['min']:.2f}")
+        print(f"     peak margin USDT: p95 {margin['p95']:.2f}, max {margin['max']:.2f} "
+              f"(budget {rep['margin_budget_usdt']:.2f})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,10 @@
-import os, ccxt
+import os
 from dotenv import load_dotenv
+from app.exchanges.session import build_exchange
 
 def get_exchange():
     load_dotenv()
-    exchange_id = os.getenv("EXCHANGE", "bybit")
-    ex = getattr(ccxt, exchange_id)({
-        "apiKey": os.getenv("API_KEY"),
-        "secret": os.getenv("API_SECRET"),
-        "enableRateLimit": True,
-        "options": { "defaultType": "swap", "defaultSettle": "USDT" },
-    })
-    if hasattr(ex, "set_sandbox_mode"):
-        ex.set_sandbox_mode(os.getenv("TESTNET", "true").lower() == "true")
-    ex.load_markets()
-    return ex
+    return build_exchange()
 
 def normalize_to_swap(ex, symbol):
     if symbol in ex.markets and ex.market(symbol).get("type") in ("swap", "future"):
@@ -5,24 +5,13 @@ import ccxt
 from dotenv import load_dotenv
 from ccxt.base.errors import ExchangeError
 
+from app.exchanges.session import build_exchange
+
 
 def get_exchange() -> ccxt.Exchange:
     """Create CCXT exchange instance configured for Bybit USDT-perp testnet."""
     load_dotenv()
-    exchange_id = os.getenv("EXCHANGE", "bybit")
-    ex = getattr(ccxt, exchange_id)({
-        "apiKey": os.getenv("API_KEY"),
-        "secret": os.getenv("API_SECRET"),
-        "enableRateLimit": True,
-        "options": {
-            "defaultType": "swap",      # derivatives
-            "defaultSettle": "USDT",    # linear USDT contracts
-        }
-    })
-    if hasattr(ex, "set_sandbox_mode"):
-        ex.set_sandbox_mode(os.getenv("TESTNET", "true").lower() == "true")
-    ex.load_markets()
-    return ex
+    return build_exchange()
 
 
 def normalize_swap_symbol(ex: ccxt.Exchange, symbol: str) -> str:
@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+
+import pytest
+
+from app.bench import check_regression, run_once
+from app.utils.logger import logger
+from conftest import ROOT
+
+pytest.importorskip("pytest_benchmark")
+
+DATA = ROOT / "tests" / "data"
+RECORDING = str(DATA / "bench_deal.ndjson")        # app.bench.record_simulated over bench_deal.json
+CONFIG = str(DATA / "bench_deal.json")
+BASELINE = DATA / "bench_baseline.json"
+# allowed slowdown against the stored baseline; BENCH_SAVE=1 rewrites the baseline
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "1.0"))
+
+
+@pytest.fixture
+def quiet():
+    # the engine logs every tick; keep logging out of the numbers
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    yield
+    logger.setLevel(level)
+
+
+def test_replayed_deal(benchmark, quiet):
+    run = benchmark.pedantic(run_once, args=(RECORDING, CONFIG), rounds=5, iterations=1)
+    traced = run_once(RECORDING, CONFIG, trace=True)
+    assert run["events"] == traced["events"]
+    result = {
+        # None under --benchmark-disable: only calls / events are compared then
+        "wall_ms": benchmark.stats.stats.median * 1000.0 if benchmark.stats else None,
+        "peak_kib": traced["peak_kib"],
+        "calls": run["calls"],
+        "events": run["events"],
+    }
+
+    if os.getenv("BENCH_SAVE"):
+        BASELINE.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+        pytest.skip(f"baseline saved to {BASELINE}")
+    baseline = json.loads(BASELINE.read_text(encoding="utf-8"))
+    assert result["events"] == baseline["events"]
+    assert not check_regression(result, baseline, TOLERANCE)
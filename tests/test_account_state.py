@@ -0,0 +1,103 @@
+from ccxt.base import errors as ce
+
+from app.exchanges.account_state import AccountStateCache
+from app.exchanges.ccxt_client import CcxtClient
+from app.exchanges.guard import ExchangeGuard
+
+S = "BTC/USDT:USDT"
+SYMBOLS = [S, "ETH/USDT:USDT", "SOL/USDT:USDT"]
+
+
+class FakeCcxt:
+    """The settings calls of a ccxt client; `unsupported` names the ones the venue lacks."""
+
+    def __init__(self, unsupported=()):
+        self.unsupported = set(unsupported)
+        self.calls = []
+        self.markets = {s: {"symbol": s, "type": "swap", "linear": True} for s in SYMBOLS}
+        self.positions = []     # what fetch_positions reports
+
+    def _call(self, name, *args):
+        self.calls.append(name)
+        if name in self.unsupported:
+            raise ce.NotSupported(f"{name}() is not supported yet")
+        return {"info": {"retCode": 0}}
+
+    def set_margin_mode(self, *args):
+        return self._call("set_margin_mode", *args)
+
+    def set_position_mode(self, *args):
+        return self._call("set_position_mode", *args)
+
+    def set_leverage(self, *args):
+        return self._call("set_leverage", *args)
+
+    def market(self, symbol):
+        return self.markets[symbol]
+
+    def fetch_positions(self, symbols=None, params=None):
+        self.calls.append("fetch_positions")
+        return [p for p in self.positions if symbols is None or p["symbol"] in symbols]
+
+
+def _client(tmp_path, fake) -> CcxtClient:
+    c = CcxtClient.__new__(CcxtClient)
+    c.client, c.venue = fake, "fake"
+    c._market_cache = {}
+    c.account_state = AccountStateCache(str(tmp_path / "state.json"))
+    c.guard = ExchangeGuard("fake", retries=0)
+    return c
+
+
+def test_unsupported_settings_are_not_cached(tmp_path):
+    fake = FakeCcxt(unsupported={"set_position_mode", "set_leverage"})
+    c = _client(tmp_path, fake)
+    assert c._apply_account_state(S, 5) is None
+    # only what the venue applied is remembered
+    assert c.account_state.get("fake", S).keys() == {"margin_mode", "ts"}
+    fake.calls.clear()
+    c._apply_account_state(S, 5)
+    assert fake.calls == ["set_position_mode", "set_leverage"]
+
+
+def _count_writes(cache: AccountStateCache) -> list:
+    writes = []
+    write = cache._write
+    cache._write = lambda: (writes.append(1), write())
+    return writes
+
+
+def test_warm_up_writes_state_once(tmp_path):
+    fake = FakeCcxt()
+    fake.positions = [{"symbol": s, "leverage": "3", "marginMode": "cross", "hedged": False} for s in SYMBOLS]
+    c = _client(tmp_path, fake)
+    writes = _count_writes(c.account_state)
+    out = c.warm_account_state({s: 5 for s in SYMBOLS})
+    assert set(out) == set(SYMBOLS)
+    assert len(writes) == 1
+    reloaded = AccountStateCache(str(tmp_path / "state.json"))
+    for s in SYMBOLS:
+        assert reloaded.get("fake", s)["leverage"] == 5
+        assert reloaded.get("fake", s)["margin_mode"] == "isolated"
+
+
+def test_leverage_mismatch_reported_by_venue_is_reapplied(tmp_path):
+    fake = FakeCcxt()
+    c = _client(tmp_path, fake)
+    c._apply_account_state(S, 5)
+    fake.calls.clear()
+    c._apply_account_state(S, 5)
+    assert fake.calls == []                   # cached: nothing to send
+
+    writes = _count_writes(c.account_state)
+    fake.positions = [{"symbol": S, "leverage": "5", "marginMode": "isolated", "hedged": False}]
+    c.fetch_positions(S)
+    assert writes == []                       # the report matches the cache
+
+    fake.positions = [{"symbol": S, "leverage": "10", "marginMode": "isolated", "hedged": False}]
+    c.fetch_positions(S)
+    assert c.account_state.get("fake", S)["leverage"] == 10
+    fake.calls.clear()
+    c.set_leverage(S, 5)
+    assert fake.calls == ["set_leverage"]
+    assert c.account_state.get("fake", S)["leverage"] == 5
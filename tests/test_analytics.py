@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from app.analytics import Analytics
+
+
+def _ev(minute, etype, price, qty, deal):
+    return {"ts": datetime(2026, 1, 1, 0, minute), "type": etype, "symbol": "BTC",
+            "side": "long", "price": price, "qty": qty, "deal_id": deal}
+
+
+def _feed(a: Analytics, events):
+    for ev in events:
+        a.apply(ev)
+
+
+def test_deal_pnl_and_win_rate():
+    a = Analytics()
+    _feed(a, [
+        _ev(1, "entry", 100, 1, "a"), _ev(2, "grid_fill", 90, 1, "a"), _ev(3, "tp_fill", 110, 2, "a"),
+        _ev(4, "entry", 100, 1, "b"), _ev(5, "sl", 95, 1, "b"),
+    ])
+    sym = a.summary("BTC")["symbols"][0]
+    assert sym["closed_deals"] == 2 and sym["wins"] == 1
+    assert sym["realized_pnl"] == 25.0
+    assert sym["max_drawdown"] == 5.0
+    # closed deals that are no longer the symbol's last one are dropped
+    assert list(a.deals) == ["b"]
+
+
+def test_state_round_trip_resumes():
+    a = Analytics()
+    _feed(a, [_ev(1, "entry", 100, 1, "a"), _ev(2, "grid_fill", 80, 1, "a")])
+    b = Analytics()
+    b.load_state(a.state(), a.last_id)
+    assert b.summary() == a.summary()
+    assert b.deals["a"].opened_at == datetime(2026, 1, 1, 0, 1)
+
+    for x in (a, b):
+        x.apply(_ev(3, "tp_fill", 100, 2, "a"))
+    assert b.summary() == a.summary()
+    assert b.summary()["symbols"][0]["realized_pnl"] == 20.0
+
+
+def test_concurrent_deals_on_one_symbol():
+    a = Analytics()
+    _feed(a, [
+        _ev(1, "entry", 100, 1, "a"), _ev(2, "entry", 110, 2, "b"),
+        _ev(3, "tp_fill", 120, 1, "a"), _ev(4, "grid_fill", 100, 1, "b"),
+    ])
+    summary = a.summary("BTC")
+    assert [d["deal"] for d in summary["open_deals"]] == ["b"]
+    assert summary["open_deals"][0]["position_qty"] == 3
+    assert summary["symbols"][0]["realized_pnl"] == 20.0
+    a.apply(_ev(5, "sl", 100, 3, "b"))
+    assert a.summary()["open_deals"] == [] and list(a.deals) == ["b"]
+
+
+def test_sync_picks_up_late_commits(tmp_path):
+    from sqlalchemy import text
+    from sqlmodel import SQLModel, create_engine
+
+    from app.db import TradeEvent
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ev.db'}")
+    SQLModel.metadata.create_all(engine, tables=[TradeEvent.__table__])
+
+    def insert(rid, minute, etype, price, qty):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO tradeevent (id, ts, type, symbol, side, price, qty, deal_id) "
+                "VALUES (:id, :ts, :type, 'BTC', 'long', :price, :qty, 'a')"
+            ), {"id": rid, "ts": datetime(2026, 1, 1, 0, minute), "type": etype, "price": price, "qty": qty})
+
+    a = Analytics()
+    insert(1, 1, "entry", 100, 1)
+    insert(3, 3, "grid_fill", 80, 1)
+    assert a.sync(engine) == 2
+    # id 2 was assigned earlier but committed after 3
+    insert(2, 2, "grid_fill", 90, 1)
+    assert a.sync(engine) == 1
+    assert a.deals["a"].qty == 3 and a.deals["a"].avg_price == 90.0
+    assert a.sync(engine) == 0
+
+    b = Analytics()
+    assert b.sync(engine) == 0                  # resumes from the stored snapshot
+    assert b.summary() == a.summary()
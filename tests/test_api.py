@@ -0,0 +1,97 @@
+import csv
+import importlib.util
+import io
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+import app.exchanges.ccxt_client as ccxt_client
+from app import db
+from app.archive import MarketArchive
+from app.exchanges.simulated import SimulatedExchange
+
+S = "BTC/USDT:USDT"
+TF = 60_000
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    # app.api builds its exchange client and initialises the DB at import: keep both offline
+    saved = ccxt_client.shared_client, db.engine
+    ccxt_client.shared_client = lambda *a, **k: SimulatedExchange()
+    db.engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'events.db'}")
+    try:
+        import app.api as api
+    finally:
+        ccxt_client.shared_client, db.engine = saved
+    return api
+
+
+@pytest.fixture
+def archive(api, tmp_path, monkeypatch):
+    arc = MarketArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(api, "market_archive", arc)
+    monkeypatch.setattr(api, "ex", SimulatedExchange())
+    return arc
+
+
+def _minute(offset: int) -> int:
+    now = int(time.time() * 1000)
+    return now - now % TF + offset * TF
+
+
+def test_range_fetch_is_not_archived_across_a_gap(api, archive):
+    archive.append_candles(S, "1m", [[_minute(-500), 1, 1, 1, 1, 0]])
+    rows = api._ohlcv_range(S, "1m", _minute(-100), _minute(-90))
+    assert len(rows) == 10
+    # the archive would have jumped from -500 to -100: nothing appended
+    assert archive.last_ts(S, "1m") == _minute(-500)
+
+    rows = api._ohlcv_range(S, "1m", _minute(-499), _minute(-490))
+    assert len(rows) == 9
+    assert archive.last_ts(S, "1m") == _minute(-491)
+
+
+def test_range_fetch_starts_an_empty_archive(api, archive):
+    api._ohlcv_range(S, "1m", _minute(-30), _minute(-20))
+    assert archive.last_ts(S, "1m") == _minute(-21)
+
+
+@pytest.fixture(scope="module")
+def exported(api):
+    SQLModel.metadata.create_all(api.db_engine, tables=[db.TradeEvent.__table__])
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with Session(api.db_engine) as s:
+        for i in range(6):
+            s.add(db.TradeEvent(ts=t0 + timedelta(minutes=i), type="grid_fill" if i % 2 else "entry",
+                                symbol="EXP/USDT:USDT" if i < 4 else "OTHER/USDT:USDT", price=100.0 + i, qty=1.0))
+        s.commit()
+    return TestClient(api.app)
+
+
+def test_export_streams_filtered_csv_and_ndjson(exported):
+    res = exported.get("/events/export", params={"format": "csv", "symbol": "EXP/USDT:USDT"})
+    assert res.status_code == 200
+    assert res.headers["content-disposition"] == 'attachment; filename="events_EXP_USDT_USDT.csv"'
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert [float(r["price"]) for r in rows] == [100.0, 101.0, 102.0, 103.0]
+
+    res = exported.get("/events/export", params={
+        "format": "ndjson", "type": "grid_fill", "start": "2024-01-01T00:01:00Z", "end": "2024-01-01T00:05:00Z",
+    })
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [(e["symbol"], e["price"]) for e in lines] == [("EXP/USDT:USDT", 101.0), ("EXP/USDT:USDT", 103.0)]
+
+
+def test_parquet_export(exported, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    res = exported.get("/events/export", params={"format": "parquet", "symbol": "OTHER/USDT:USDT"})
+    assert res.status_code == 200
+    assert pq.read_table(io.BytesIO(res.content)).column("price").to_pylist() == [104.0, 105.0]
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *a: None)
+    assert exported.get("/events/export", params={"format": "parquet"}).status_code == 501
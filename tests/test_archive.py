@@ -0,0 +1,29 @@
+import numpy as np
+
+from app.archive import MarketArchive, timeframe_ms
+
+
+def _trade(i, ts, price=100.0):
+    return {"id": str(i), "timestamp": ts, "price": price, "amount": 0.1, "side": "buy"}
+
+
+def test_trades_in_the_tail_millisecond_are_kept(tmp_path):
+    arc = MarketArchive(str(tmp_path))
+    assert arc.append_trades("BTC/USDT:USDT", [_trade(1, 1000), _trade(2, 2000)]) == 2
+    # the next poll starts at the last millisecond: one trade seen already, one new
+    assert arc.append_trades("BTC/USDT:USDT", [_trade(2, 2000), _trade(3, 2000), _trade(4, 2500)]) == 2
+    # a fresh instance (restart) still knows the ids at the tail
+    again = MarketArchive(str(tmp_path))
+    assert again.append_trades("BTC/USDT:USDT", [_trade(4, 2500), _trade(5, 2500)]) == 1
+    ts = again.read_range("BTC/USDT:USDT", "trades")["ts"]
+    assert ts.tolist() == [1000, 2000, 2000, 2500, 2500]
+
+
+def test_candles_are_append_only(tmp_path):
+    arc = MarketArchive(str(tmp_path))
+    tf = timeframe_ms("1m")
+    rows = [[i * tf, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(5)]
+    assert arc.append_candles("BTC/USDT:USDT", "1m", rows) == 5
+    assert arc.append_candles("BTC/USDT:USDT", "1m", rows[3:] + [[5 * tf, 1, 1, 1, 1, 1]]) == 1
+    tail = arc.tail("BTC/USDT:USDT", "1m", 3)
+    assert np.diff(tail["ts"]).tolist() == [tf, tf]
@@ -0,0 +1,33 @@
+import pytest
+
+from app.exchanges.client_ids import MAX_LEN, ClientOrderIndex, client_order_id, matches
+
+
+def test_client_order_id_is_deterministic():
+    cid = client_order_id("deal-1", "g4_1")
+    assert cid == client_order_id("deal-1", "g4_1")
+    assert cid != client_order_id("deal-2", "g4_1")
+    assert cid.endswith("-g4_1")
+    assert len(cid) <= MAX_LEN - 3
+
+
+def test_client_order_id_too_long():
+    with pytest.raises(ValueError):
+        client_order_id("deal-1", "x" * MAX_LEN)
+
+
+def test_matches_gate_prefix():
+    cid = client_order_id("deal-1", "entry")
+    assert matches({"clientOrderId": cid}, cid)
+    assert matches({"clientOrderId": f"t-{cid}"}, cid)
+    assert not matches({"clientOrderId": None}, cid)
+
+
+def test_index_is_bounded_lru():
+    idx = ClientOrderIndex(maxsize=2)
+    idx.put("a", {"id": 1})
+    idx.put("b", {"id": 2})
+    assert idx.get("a") == {"id": 1}            # "a" becomes most recent
+    idx.put("c", {"id": 3})
+    assert idx.get("b") is None
+    assert idx.get("a") == {"id": 1} and idx.get("c") == {"id": 3}
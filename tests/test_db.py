@@ -0,0 +1,54 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import db
+from app.db import TradeEvent
+
+
+@pytest.fixture
+def events_db(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    monkeypatch.setattr(db, "engine", eng)
+    SQLModel.metadata.create_all(eng, tables=[TradeEvent.__table__])
+    return eng
+
+
+def _add(eng, days, start=datetime(2024, 1, 10, tzinfo=timezone.utc)):
+    with Session(eng) as s:
+        for d in days:
+            s.add(TradeEvent(ts=start + timedelta(days=d), type="entry", symbol="BTC/USDT:USDT", deal_id=f"d{d}"))
+        s.commit()
+
+
+def _archived(path) -> list:
+    with sqlite3.connect(path) as conn:
+        return sorted(r[0] for r in conn.execute("SELECT deal_id FROM tradeevent"))
+
+
+def test_archive_moves_rows_into_monthly_files_once(events_db, tmp_path):
+    _add(events_db, [0, 5, 15, 25, 40])         # Jan 10, 15, 25, Feb 4, Feb 19
+    arc = tmp_path / "arc"
+    assert db.archive_events(datetime(2024, 1, 20), str(arc)) == 2
+    assert db.archive_events(datetime(2024, 1, 20), str(arc)) == 0
+    # a later cut-off in the same month appends to the partition without re-copying
+    assert db.archive_events(datetime(2024, 2, 10), str(arc)) == 2
+    assert _archived(arc / "events_2024_01.db") == ["d0", "d15", "d5"]
+    assert _archived(arc / "events_2024_02.db") == ["d25"]
+    with Session(events_db) as s:
+        assert [e.deal_id for e in s.exec(select(TradeEvent))] == ["d40"]
+
+
+def test_legacy_table_gets_deal_columns_and_index(events_db, monkeypatch):
+    legacy = create_engine("sqlite://")
+    with legacy.begin() as conn:
+        conn.execute(text("CREATE TABLE tradeevent (id INTEGER PRIMARY KEY, ts DATETIME, type VARCHAR, "
+                          "symbol VARCHAR, side VARCHAR, price FLOAT, qty FLOAT, extra VARCHAR)"))
+    monkeypatch.setattr(db, "engine", legacy)
+    db._migrate_events()
+    insp = inspect(legacy)
+    assert {"deal_id", "run_id", "account", "venue"} <= {c["name"] for c in insp.get_columns("tradeevent")}
+    assert "ix_tradeevent_deal_ts" in {i["name"] for i in insp.get_indexes("tradeevent")}
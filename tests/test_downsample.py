@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.archive import CANDLE_DTYPE
+from app.downsample import bucket_markers, bucket_ms, lttb, ohlc_buckets
+
+
+def _candles(n: int) -> np.ndarray:
+    c = np.zeros(n, dtype=CANDLE_DTYPE)
+    c["ts"] = np.arange(n) * 60_000
+    c["open"] = np.arange(n) + 100.0
+    c["close"] = c["open"] + 0.5
+    c["high"] = c["open"] + 1 + (np.arange(n) % 3)
+    c["low"] = c["open"] - 1
+    c["volume"] = 1.0
+    return c
+
+
+def test_bucket_width_is_whole_timeframes():
+    assert bucket_ms(0, 1000 * 60_000, 100, 60_000) == 10 * 60_000
+    assert bucket_ms(0, 1001 * 60_000, 100, 60_000) == 11 * 60_000
+    assert bucket_ms(0, 10 * 60_000, 100, 60_000) == 60_000
+
+
+def test_ohlc_buckets_aggregate():
+    c = _candles(10)
+    out = ohlc_buckets(c, 5 * 60_000)
+    assert list(out["ts"]) == [0, 5 * 60_000]
+    assert out["open"][0] == c["open"][0] and out["close"][0] == c["close"][4]
+    assert out["high"][0] == c["high"][:5].max() and out["low"][1] == c["low"][5:].min()
+    assert list(out["volume"]) == [5.0, 5.0]
+
+
+def test_lttb_keeps_ends_and_spikes():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    idx = lttb(x, y, 50)
+    assert len(idx) == 50 and idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+    assert 437 in idx
+    assert list(lttb(x[:10], y[:10], 50)) == list(range(10))
+
+
+def test_markers_grouped_per_bar_and_type():
+    times = np.array([0.0, 60.0, 120.0])
+    events = [
+        {"ts": 61, "type": "grid_fill", "price": 100.0, "qty": 1.0},
+        {"ts": 90, "type": "grid_fill", "price": 97.0, "qty": 2.0},
+        {"ts": 95, "type": "entry", "price": 101.0, "qty": None},
+        {"ts": 500, "type": "sl", "price": None, "qty": None},
+    ]
+    m = bucket_markers(events, times)
+    assert m[0] == {"time": 60, "type": "entry", "count": 1, "price": 101.0, "qty": None}
+    assert m[1] == {"time": 60, "type": "grid_fill", "count": 2, "price": 98.0, "qty": 3.0}
+    assert m[2] == {"time": 120, "type": "sl", "count": 1, "price": None, "qty": None}
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+import app.engine as engine_mod
+from app.engine import Engine
+from app.exchanges.simulated import SimulatedExchange
+from app.models import DealConfig, RiskLimits
+from app.risk import RiskService
+
+S = "BTC/USDT:USDT"
+
+
+def _cfg(deal_id: str) -> DealConfig:
+    return DealConfig(
+        symbol=S, side="long", market_order_amount=1000, stop_loss_percent=5, trailing_sl_offset_percent=3,
+        limit_orders_amount=500, leverage=5, move_sl_to_breakeven=False,
+        tp_orders=[{"price_percent": 10, "quantity_percent": 100}],
+        limit_orders={"range_percent": 5, "orders_count": 5, "engine_deal_duration_minutes": 60},
+        deal_id=deal_id,
+    )
+
+
+def _wait(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_deals_on_one_symbol_are_charged_their_own_fills(monkeypatch):
+    monkeypatch.setattr(engine_mod, "add_event", lambda ev: None)
+    ex = SimulatedExchange(mid=100.0, tick=0.01, level_size=100.0)
+    rs = RiskService(RiskLimits(max_gross_notional=4000))
+    deals = [Engine(ex, risk=rs, sleep=lambda s: time.sleep(0.01)) for _ in range(2)]
+    threads = [threading.Thread(target=d.run, args=(_cfg(f"d{i}"),)) for i, d in enumerate(deals)]
+    for t in threads:
+        t.start()
+    try:
+        _wait(lambda: all(d.tp_ids for d in deals))
+        for d in deals:
+            # 1000 USDT entry each, although the account's net position is twice that
+            assert rs._contrib[d._risk_ref][1]["gross"] == pytest.approx(1000.0)
+            assert d.status == "running"
+        # both entries (2000) + both grids (2 x 500) fit the 4000 limit
+        assert rs.exposure("Bybit/Testnet")["gross"] == pytest.approx(3000.0, rel=1e-3)
+    finally:
+        for d in deals:
+            d.stop()
+        for t in threads:
+            t.join(5)
+    assert rs.exposure("Bybit/Testnet") == {}
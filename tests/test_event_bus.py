@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app import stream
+from app.broker import DbTailBroker, LocalBroker
+from app.event_bus import EventBus, SubscriberOverflow
+
+
+def _rows(*ids):
+    return [{"id": i} for i in ids]
+
+
+def test_tail_delivers_late_commits_once():
+    tail = DbTailBroker(engine=None, hole_ttl=60)
+    assert [r["id"] for r in tail.cursor.accept(_rows(1, 3))] == [1, 3]
+    assert set(tail.cursor.holes) == {2}
+    # id 2 committed after 3: the re-read returns 2 and 3 again, only 2 is new
+    assert [r["id"] for r in tail.cursor.accept(_rows(2, 3, 4))] == [2, 4]
+    assert not tail.cursor.holes
+
+
+def test_tail_holes_expire_and_are_capped():
+    tail = DbTailBroker(engine=None, hole_ttl=0, max_holes=10)
+    tail.cursor.accept(_rows(1, 100))
+    assert len(tail.cursor.holes) == 10
+    assert tail.cursor.accept(_rows(50)) == []            # expired hole: not delivered late
+
+
+def test_slow_subscriber_is_cut_off():
+    async def run():
+        bus = EventBus(LocalBroker(), queue_size=3)
+        slow, fast = bus.subscribe("events"), bus.subscribe("events")
+        for i in range(5):
+            await bus.deliver("events", {"id": i})
+            fast.get_nowait()
+        assert bus.channels["events"] == [fast]
+        with pytest.raises(SubscriberOverflow):
+            await stream.next_batch(slow, 0.01, 10)
+        await bus.deliver("events", {"id": 5})
+        assert (await stream.next_batch(fast, 0.01, 10)) == [{"id": 5}]
+
+    asyncio.run(run())
+
+
+def test_sent_ids_window():
+    sent = stream.SentIds(size=2)
+    for i in (1, 2, 2, 3):
+        sent.add(i)
+    assert 1 not in sent and 2 in sent and 3 in sent
@@ -0,0 +1,98 @@
+import pytest
+
+from app.exchanges.simulated import SimulatedExchange
+from app.execution import EntryExecutor
+from app.models import ExecutionConfig
+
+S = "BTC/USDT:USDT"
+
+
+class HalfFill(SimulatedExchange):
+    """Market orders fill half of what was asked."""
+
+    def place_market_order(self, symbol, side, qty, reduce_only=False, client_id=None):
+        half = max(self.round_amount_down(symbol, qty / 2), self.step)
+        o = super().place_market_order(symbol, side, half, reduce_only, client_id)
+        return dict(o, amount=qty)
+
+
+class NoFillReport(SimulatedExchange):
+    """Create responses carry no fill; `lost` orders can't be fetched either."""
+
+    lost = False
+
+    def place_market_order(self, symbol, side, qty, reduce_only=False, client_id=None):
+        o = super().place_market_order(symbol, side, qty, reduce_only, client_id)
+        if self.lost:
+            self.done.pop(o["id"])
+        return dict(o, filled=None)
+
+
+def _twap(ex, slices=4):
+    sleeps = []
+    cfg = ExecutionConfig(algo="twap", slices=slices, interval_seconds=1, participation_rate=1.0, max_slippage_percent=5)
+    return EntryExecutor(ex, cfg, sleep=sleeps.append).execute(S, "buy", 1.0, client_id="e"), sleeps
+
+
+def test_twap_sends_equal_children():
+    ex = SimulatedExchange(level_size=10.0)
+    res, sleeps = _twap(ex)
+    assert [o["amount"] for o in res["orders"]] == [0.25] * 4
+    assert res["filled"] == pytest.approx(1.0) and len(sleeps) == 3
+    assert ex.positions[S]["contracts"] == pytest.approx(1.0)
+    assert [o["clientOrderId"] for o in res["orders"]] == ["es1", "es2", "es3", "es4"]
+
+
+def test_twap_keeps_going_after_partial_fills():
+    ex = HalfFill(level_size=10.0)
+    res, _ = _twap(ex)
+    assert res["filled"] == pytest.approx(1.0, abs=0.002)
+    assert len(res["orders"]) > 4
+    assert ex.positions[S]["contracts"] == pytest.approx(res["filled"])
+
+
+def test_missing_fill_is_refetched():
+    res, _ = _twap(NoFillReport(level_size=10.0))
+    assert res["filled"] == pytest.approx(1.0) and res["unconfirmed"] == []
+
+
+def test_unknown_fill_stops_the_entry():
+    ex = NoFillReport(level_size=10.0)
+    ex.lost = True
+    res, _ = _twap(ex)
+    # one child went out, its fill is unknown: not counted, nothing more sent
+    assert len(res["orders"]) == 1 and len(res["unconfirmed"]) == 1
+    assert res["filled"] == 0.0
+
+
+def test_iceberg_rests_slices_at_the_touch():
+    ex = SimulatedExchange(level_size=10.0)
+    placed = []
+    place = ex.place_limit_order
+    ex.place_limit_order = lambda *a, **k: placed.append(a) or place(*a, **k)
+
+    def tick(_):
+        ex.set_price(ex.mid - 0.1)      # the market trades down through each resting slice
+
+    cfg = ExecutionConfig(algo="iceberg", display_amount=25.0, interval_seconds=1)
+    res = EntryExecutor(ex, cfg, sleep=tick).execute(S, "buy", 1.0)
+    assert res["filled"] == pytest.approx(1.0)
+    assert all(o["type"] == "limit" for o in res["orders"])
+    # 25 USDT visible per slice, each priced at the best bid when placed
+    assert placed[0][2] == pytest.approx(0.25) and placed[0][3] == pytest.approx(99.95)
+    assert res["avg_price"] < 100.0
+
+
+def test_iceberg_repegs_when_the_touch_moves_away():
+    ex = SimulatedExchange(level_size=10.0)
+    moves = iter([100.5, 100.5, 100.3])
+
+    def tick(_):
+        ex.set_price(next(moves, 100.3))
+
+    cfg = ExecutionConfig(algo="iceberg", display_amount=1000.0, interval_seconds=1)
+    res = EntryExecutor(ex, cfg, sleep=tick).execute(S, "buy", 1.0)
+    first, second = res["orders"][:2]
+    assert first["status"] == "canceled" and first["filled"] == 0.0
+    assert second["price"] == pytest.approx(100.45) and second["status"] == "closed"
+    assert res["filled"] == pytest.approx(1.0)
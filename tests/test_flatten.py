@@ -0,0 +1,80 @@
+import threading
+
+from ccxt.base import errors as ce
+
+from app.flatten import Flattener
+
+
+class FakeVenue:
+    """Raw ccxt client of one venue holding a long position per symbol."""
+
+    def __init__(self, symbols, batch=True, fail_batches=0, account_cancel=True, stuck=False):
+        self.has = {"createOrders": batch}
+        self.positions = {s: {"symbol": s, "side": "long", "contracts": 1.0} for s in symbols}
+        self.orders = {s: [{"symbol": s}] for s in symbols}
+        self.fail_batches = fail_batches
+        self.account_cancel = account_cancel
+        self.stuck = stuck
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def cancel_all_orders(self, symbol=None, params=None):
+        if symbol is None and not self.account_cancel:
+            raise ce.ArgumentsRequired("cancelAllOrders() requires a symbol")
+        with self._lock:
+            if symbol is None:
+                self.orders.clear()
+            else:
+                self.orders.pop(symbol, None)
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        with self._lock:
+            return [o for orders in self.orders.values() for o in orders]
+
+    def fetch_positions(self, symbols=None, params=None):
+        with self._lock:
+            return [dict(p) for p in self.positions.values()]
+
+    def _fill(self, o):
+        assert o["side"] == "sell" and o["params"]["reduceOnly"]
+        if not self.stuck:
+            self.positions.pop(o["symbol"], None)
+        return {"id": f"c-{o['symbol']}"}
+
+    def create_orders(self, orders):
+        with self._lock:
+            self.batches.append(len(orders))
+            if self.fail_batches:
+                self.fail_batches -= 1
+                raise ce.NetworkError("timeout")
+            return [self._fill(o) for o in orders]
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        with self._lock:
+            return self._fill({"symbol": symbol, "side": side, "params": params})
+
+
+def test_flatten_all_batches_closes_and_retries_the_remainder():
+    a = FakeVenue([f"S{i}/USDT:USDT" for i in range(25)], fail_batches=1)
+    b = FakeVenue(["BTC/USDT:USDT", "ETH/USDT:USDT"], batch=False, account_cancel=False)
+    report = Flattener({"a": a, "b": b}, retries=2).run()
+
+    assert report["flat"]
+    va, vb = report["venues"]
+    # 25 closes in batches of 10; the failed batch goes out again on the second pass
+    assert sorted(a.batches[:3]) == [5, 10, 10]
+    assert va["passes"] == 2 and len(a.batches) == 4
+    assert sum(c["ok"] for c in va["closes"]) == 25
+    assert not a.positions and not a.orders
+    # no account-wide cancel: per-symbol cancels of the symbols with open orders
+    assert vb["cancel"] == {"ok": True, "symbols": ["BTC/USDT:USDT", "ETH/USDT:USDT"], "errors": {}}
+    assert not b.positions and not b.orders
+
+
+def test_position_left_after_retries_is_reported():
+    stuck = FakeVenue(["BTC/USDT:USDT"], stuck=True)
+    report = Flattener({"a": stuck}, retries=1).run()
+    venue = report["venues"][0]
+    assert not report["flat"]
+    assert venue["passes"] == 2
+    assert venue["remaining"] == [{"symbol": "BTC/USDT:USDT", "side": "long", "contracts": 1.0}]
@@ -0,0 +1,77 @@
+from app.grid import GridLadder
+
+
+def _run(ladder: GridLadder, path):
+    """Drive the ladder like Engine._follow_grid: a live level at or beyond the price fills."""
+    live, fills, placed = {}, [], []
+    for last in path:
+        for i in list(live):
+            hit = last <= ladder.price(i) if ladder.long else last >= ladder.price(i)
+            if hit:
+                del live[i]
+                ladder.filled.add(i)
+                fills.append(i)
+        cancel, place = ladder.diff(last, live)
+        for i in cancel:
+            del live[i]
+        for i in place:
+            assert i not in fills, f"level {i} placed again after it filled"
+            live[i] = [f"o{i}"]
+            placed.append(i)
+    return live, fills, placed
+
+
+def test_lattice_prices():
+    long = GridLadder(100.0, 0.01, "long", live_levels=2, max_levels=4)
+    short = GridLadder(100.0, 0.01, "short", live_levels=2, max_levels=4)
+    assert long.price(2) == 98.0
+    assert short.price(2) == 102.0
+    assert long.nearest(99.5) == 1
+    assert short.nearest(100.5) == 1
+
+
+def test_window_follows_price_past_the_anchor():
+    long = GridLadder(100.0, 0.01, "long", live_levels=2, max_levels=4)
+    assert long.window(99.5) == [1, 2]
+    # favourable move: the window re-centres above the anchor instead of staying pinned
+    assert long.window(103.5) == [-3, -2]
+    assert long.price(-3) == 103.0
+    assert long.window(101.2) == [-1, 0]    # and follows back down
+    short = GridLadder(100.0, 0.01, "short", live_levels=2, max_levels=4)
+    assert short.window(96.5) == [-3, -2]
+    assert short.price(-3) == 97.0
+
+
+def test_follows_both_ways_with_threshold():
+    ladder = GridLadder(100.0, 0.01, "long", live_levels=2, max_levels=10, threshold=2)
+    assert ladder.window(99.5) == [1, 2]
+    assert ladder.window(100.5) == [1, 2]      # one level up: waits
+    assert ladder.window(102.5) == [-2, -1]
+    assert ladder.window(101.5) == [-1, 0]     # adverse: follows at once
+
+
+def test_oscillation_fills_each_level_once():
+    ladder = GridLadder(100.0, 0.01, "long", live_levels=2, max_levels=4)
+    path = [100.0, 98.9, 97.9, 100.5, 103.0, 98.9, 97.9, 96.9, 95.9, 94.9, 101.0, 96.0, 93.0] * 3
+    live, fills, placed = _run(ladder, path)
+
+    assert len(fills) == len(set(fills)) == ladder.max_levels
+    assert sorted(fills) == [-2, -1, 1, 2]    # the rally above the anchor moved the window up
+    assert not live                   # budget spent: nothing left to place
+
+
+def test_filled_plus_live_within_budget():
+    ladder = GridLadder(100.0, 0.01, "short", live_levels=3, max_levels=4)
+    ladder.filled.update({1, 3})
+    want = ladder.window(100.0)
+    assert want == [2, 4]
+    assert not set(want) & ladder.filled
+
+
+def test_favourable_move_waits_for_threshold():
+    ladder = GridLadder(100.0, 0.01, "long", live_levels=2, max_levels=10, threshold=2)
+    assert ladder.window(96.5) == [4, 5]
+    assert ladder.window(95.5) == [5, 6]     # adverse: follows at once
+    assert ladder.window(94.8) == [6, 7]
+    assert ladder.window(95.9) == [6, 7]     # favourable by one level: stays
+    assert ladder.window(96.9) == [4, 5]
@@ -0,0 +1,88 @@
+import pytest
+from ccxt.base import errors as ce
+
+from app.exchanges.errors import BENIGN, FATAL, RATE_LIMITED, RETRYABLE, UNSUPPORTED, classify, is_order_too_small
+from app.exchanges.guard import CircuitBreaker, CircuitOpen, ExchangeGuard, RetryBudget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize("exc, kind", [
+    (ce.ExchangeError('bybit {"retCode":110043,"retMsg":"leverage not modified"}'), BENIGN),
+    (ce.ExchangeError('bybit {"retCode":10006,"retMsg":"Too many visits"}'), RATE_LIMITED),
+    (ce.ExchangeError('gate {"label":"SERVER_ERROR","message":"..."}'), RETRYABLE),
+    (ce.InsufficientFunds('bybit {"retCode":110007}'), FATAL),
+    (ce.OrderNotFound("gone"), BENIGN),
+    (ce.NotSupported("no set_position_mode"), UNSUPPORTED),
+    (ce.RequestTimeout("slow"), RETRYABLE),
+    (ConnectionError("reset"), RETRYABLE),
+    (ValueError("bug"), FATAL),
+])
+def test_classify(exc, kind):
+    assert classify(exc) == kind
+
+
+def test_order_too_small():
+    assert is_order_too_small(ce.InvalidOrder('bybit {"retCode":110017,"retMsg":"..."}'))
+    assert not is_order_too_small(ce.InvalidOrder('bybit {"retCode":10001}'))
+
+
+def test_breaker_opens_probes_and_backs_off():
+    clock = Clock()
+    br = CircuitBreaker("bybit.x", threshold=2, reset_timeout=10, clock=clock)
+    br.failure()
+    br.before()
+    br.failure()
+    with pytest.raises(CircuitOpen):
+        br.before()
+    clock.now = 10
+    br.before()                                 # the one half-open probe
+    with pytest.raises(CircuitOpen):
+        br.before()
+    br.failure()
+    assert br.state == "open" and br.timeout == 20
+    clock.now = 30
+    br.before()
+    br.success()
+    assert br.state == "closed" and br.timeout == 10
+
+
+def test_retry_budget_drains_and_refills():
+    clock = Clock()
+    budget = RetryBudget(ratio=0.5, min_per_second=1.0, cap=2.0, clock=clock)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    clock.now = 1.0
+    assert budget.withdraw()
+
+
+def test_guard_retries_transient_only():
+    guard = ExchangeGuard("bybit", retries=2, backoff=0.0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ce.RequestTimeout("slow")
+        return "ok"
+
+    assert guard.call("fetch", flaky) == "ok" and len(calls) == 3
+
+    def fatal():
+        calls.append(1)
+        raise ce.InsufficientFunds('bybit {"retCode":110007}')
+
+    calls.clear()
+    with pytest.raises(ce.InsufficientFunds):
+        guard.call("create", fatal)
+    assert len(calls) == 1
+    assert guard.breaker("create").state == "closed"
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.indicators import ATR, EMA, RealizedVol, VolatilityTracker, ema_series, scale_to_volatility
+from app.models import DealConfig, VolatilityConfig
+from conftest import ROOT
+
+
+def _candles(n: int, seed: int = 1) -> np.ndarray:
+    rnd = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rnd.normal(0, 0.002, n)))
+    high = close * (1 + rnd.uniform(0, 0.003, n))
+    low = close * (1 - rnd.uniform(0, 0.003, n))
+    ts = np.arange(n) * 60_000
+    return np.column_stack([ts, close, high, low, close, np.ones(n)])
+
+
+@pytest.mark.parametrize("alpha", [0.5, 2 / 21, 1 / 14, 1e-3])
+def test_ema_series_matches_loop(alpha):
+    x = _candles(10_000)[:, 4]
+    ema = EMA(0, alpha=alpha)
+    loop = [ema.update(v) for v in x]
+    assert np.allclose(ema_series(x, alpha), loop, rtol=1e-12)
+
+
+def test_backfill_matches_updates():
+    c = _candles(500)
+    atr, vol = ATR(14), RealizedVol(30)
+    for _, _, h, l, close, _ in c:
+        atr.update(h, l, close)
+        vol.update(close)
+    atr_b, vol_b = ATR(14), RealizedVol(30)
+    atr_b.backfill(c[:300, 2], c[:300, 3], c[:300, 4])      # in two chunks
+    atr_b.backfill(c[300:, 2], c[300:, 3], c[300:, 4])
+    vol_b.backfill(c[:, 4])
+    assert atr_b.value == pytest.approx(atr.value, rel=1e-12)
+    assert vol_b.value == pytest.approx(vol.value, rel=1e-12)
+    assert atr_b.ready and vol_b.ready
+
+
+def test_tracker_reads_include_bar_in_progress():
+    tr = VolatilityTracker("1m", atr_period=3, vol_period=3)
+    tr.backfill(_candles(50))
+    committed = tr.atr
+    start = 50 * 60_000
+    tr.on_price(start, 100.0)
+    tr.on_price(start + 1_000, 150.0)                       # wide bar: ATR moves before it closes
+    assert tr.atr > committed
+    assert tr.atr_ind.value == committed
+    tr.on_price(start + 60_000, 120.0)                      # next bar commits the previous one
+    assert tr.atr_ind.value > committed
+
+
+def test_scale_to_volatility_clamps_and_keeps_static_until_ready():
+    cfg = DealConfig(**json.loads((ROOT / "deal_config.json").read_text(encoding="utf-8")))
+    cfg = cfg.model_copy(update={"volatility": VolatilityConfig(
+        grid_atr_mult=1.0, sl_atr_mult=1000.0, trailing_vol_mult=2.0, atr_period=3, vol_period=3,
+    )})
+    tr = VolatilityTracker("1m", atr_period=3, vol_period=3)
+    assert scale_to_volatility(cfg, tr, 100.0) is cfg
+    tr.backfill(_candles(50))
+    scaled = scale_to_volatility(cfg, tr, 100.0)
+    atr_pct = tr.atr / 100.0 * 100.0
+    assert scaled.limit_orders.range_percent == pytest.approx(atr_pct * cfg.limit_orders.orders_count)
+    assert scaled.stop_loss_percent == 20.0                 # clamped to max_percent
+    assert scaled.trailing_sl_offset_percent == pytest.approx(200.0 * tr.vol)
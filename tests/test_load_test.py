@@ -0,0 +1,42 @@
+import json
+import socket
+import subprocess
+import sys
+
+from conftest import ROOT
+from scripts.load_test import check_regression
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_small_load_run_delivers_every_event(tmp_path):
+    baseline = tmp_path / "load.json"
+    out = subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "load_test.py"), "--ws", "5", "--http", "2", "--rate", "200",
+         "--events", "50", "--drain", "5", "--port", str(_free_port()), "--baseline", str(baseline), "--save"],
+        cwd=str(ROOT), capture_output=True, text=True, timeout=120,
+    )
+    assert out.returncode == 0, out.stderr[-2000:]
+    result = json.loads(baseline.read_text(encoding="utf-8"))
+    assert result["publisher"]["published"] == 50
+    assert result["ws"]["connected"] == 5 and result["ws"]["failed"] == 0
+    assert result["ws"]["delivered"] == 250 and result["ws"]["dropped"] == 0
+    assert set(result["ws"]["latency_ms"]) == {"p50", "p90", "p99", "max"}
+    assert all(h["errors"] == 0 for h in result["http"].values())
+    assert check_regression(result, result, 0.5) == []
+
+
+def test_regression_check_flags_latency_and_drops():
+    base = {"ws": {"latency_ms": {"p99": 10.0}, "dropped_pct": 0.0},
+            "http": {"/status": {"latency_ms": {"p95": 5.0}}}}
+    ok = {"ws": {"latency_ms": {"p99": 14.0}, "dropped_pct": 0.05},
+          "http": {"/status": {"latency_ms": {"p95": 7.0}}}}
+    assert check_regression(ok, base, 0.5) == []
+    bad = {"ws": {"latency_ms": {"p99": 16.0}, "dropped_pct": 1.0},
+           "http": {"/status": {"latency_ms": {"p95": 8.0}}}}
+    problems = check_regression(bad, base, 0.5)
+    assert [p.split(":")[0] for p in problems] == ["ws p99 latency", "ws dropped", "http /status p95"]
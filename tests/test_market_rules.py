@@ -0,0 +1,40 @@
+from app.exchanges.market_rules import FILTER_KEYS, MarketFilters, to_decimal
+
+BTC = MarketFilters({
+    "symbol": "BTC/USDT:USDT", "type": "swap", "linear": True, "contractSize": 1,
+    "precision": {"amount": 0.001, "price": 0.1},
+    "limits": {"amount": {"min": 0.002}, "price": {"min": 1.0, "max": 1e6}},
+    "info": {"dropped": True},
+})
+S = "BTC/USDT:USDT"
+
+
+def test_to_decimal_uses_shortest_repr():
+    assert str(to_decimal(0.1)) == "0.1"
+
+
+def test_amounts_snap_to_exact_lots():
+    assert BTC.to_lots(S, 0.3) == 300
+    assert BTC.round_amount_down(S, 0.0039) == 0.003
+    assert BTC.round_amount_down(S, 0.1 + 0.2) == 0.3
+    assert BTC.amount_to_precision(S, 0.12345) == "0.123"
+    assert BTC.min_tradable_amount(S) == 0.002
+
+
+def test_prices_floor_to_tick_and_clamp():
+    assert BTC.round_price_to_tick(S, 65000.19) == 65000.1
+    assert BTC.to_ticks(S, 65000.11, rounding="up") == 650002
+    assert BTC.price_to_precision(S, 0.3) == "0.3"
+    assert BTC.clamp_price_to_limits(S, 0.5) == 1.0
+    assert BTC.clamp_price_to_limits(S, 2e6) == 1e6
+
+
+def test_integer_precision_is_decimal_places():
+    m = MarketFilters({"precision": {"amount": 3, "price": 2}, "limits": {}})
+    assert m.amount_step(S) == 0.001
+    assert m.price_step(S) == 0.01
+
+
+def test_filters_keep_only_filter_keys():
+    assert set(BTC.market(S)) <= set(FILTER_KEYS)
+    assert "info" not in BTC.fingerprint()
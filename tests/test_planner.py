@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+
+import pytest
+
+import app.engine as engine_mod
+from app import planner
+from app.engine import Engine
+from app.exchanges.simulated import SimulatedExchange
+from app.risk import RiskService
+from app.exchanges.market_rules import MarketFilters
+from app.models import DealConfig
+from conftest import ROOT
+
+BTC = MarketFilters({
+    "symbol": "BTC/USDT:USDT", "type": "swap", "linear": True, "contractSize": 1,
+    "precision": {"amount": 0.001, "price": 0.1},
+    "limits": {"amount": {"min": 0.001}, "price": {"min": 0.1, "max": 1e6}},
+})
+
+
+@pytest.fixture
+def cfg() -> DealConfig:
+    return DealConfig(**json.loads((ROOT / "deal_config.json").read_text(encoding="utf-8")))
+
+
+def test_compile_short_deal(cfg):
+    plan = planner.compile_deal(cfg, BTC, 65000.0)
+    assert plan.ok
+    assert plan.entry.side == "sell" and plan.entry.qty == 0.03
+    assert len(plan.grid) == cfg.limit_orders.orders_count
+    assert all(l.price > 65000.0 for l in plan.grid)
+    assert plan.grid[-1].price == pytest.approx(65000.0 * 1.05)
+    assert plan.sl_price == pytest.approx(65000.0 * 1.07)
+    # TP legs split the entry qty exactly
+    assert sum(l.qty for l in plan.tp if not l.skip) == pytest.approx(plan.entry.qty)
+
+
+def test_small_legs_are_skipped(cfg):
+    small = cfg.model_copy(update={"limit_orders_amount": 100.0})
+    plan = planner.compile_deal(small, BTC, 65000.0)
+    assert all(l.skip for l in plan.grid)
+    assert plan.required_margin == pytest.approx(plan.entry.notional / cfg.leverage)
+
+
+def test_plan_cache_is_bounded_lru(cfg, monkeypatch):
+    monkeypatch.setattr(planner, "PLAN_CACHE_SIZE", 3)
+    monkeypatch.setattr(planner, "_plans", planner.OrderedDict())
+    first = planner.compile_deal(cfg, BTC, 60000.0)
+    for price in (61000.0, 62000.0):
+        planner.compile_deal(cfg, BTC, price)
+    assert planner.compile_deal(cfg, BTC, 60000.0) is first     # hit refreshes the entry
+    planner.compile_deal(cfg, BTC, 63000.0)                      # evicts 61000, not 60000
+    assert first.key in planner._plans
+    for price in range(64000, 74000, 1000):
+        planner.compile_deal(cfg, BTC, float(price))
+    assert len(planner._plans) == 3
+    assert first.key not in planner._plans
+
+
+def test_cache_key_ignores_small_price_moves(cfg):
+    plan = planner.compile_deal(cfg, BTC, 65000.0)
+    assert planner.compile_deal(cfg, BTC, 65010.0) is plan       # same 0.1% bucket
+    assert planner.compile_deal(cfg, BTC, 65200.0) is not plan
+    assert planner.compile_deal(cfg.model_copy(update={"deal_id": "other"}), BTC, 65000.0) is plan
+
+
+def test_check_plan_against_config(cfg):
+    plan = planner.compile_deal(cfg, BTC, 65000.0)
+    assert planner.check_plan(plan, cfg) == []
+    other = cfg.model_copy(update={"side": "long", "market_order_amount": cfg.market_order_amount * 2})
+    problems = planner.check_plan(plan, other)
+    assert problems[0] == "side 'short' != 'long'" and len(problems) == 2
+
+
+def _deal(**update) -> DealConfig:
+    return DealConfig(
+        symbol="BTC/USDT:USDT", side="long", market_order_amount=1000, stop_loss_percent=5,
+        trailing_sl_offset_percent=3, limit_orders_amount=500, leverage=5, move_sl_to_breakeven=False,
+        tp_orders=[{"price_percent": 10, "quantity_percent": 100}],
+        limit_orders={"range_percent": 5, "orders_count": 5, "engine_deal_duration_minutes": 60},
+        deal_id="p",
+    ).model_copy(update=update)
+
+
+def test_engine_rejects_a_plan_for_another_config(monkeypatch):
+    monkeypatch.setattr(engine_mod, "add_event", lambda ev: None)
+    ex = SimulatedExchange(mid=100.0, tick=0.01, level_size=100.0)
+    plan = planner.compile_deal(_deal(market_order_amount=5000), ex, 100.0)
+    eng = Engine(ex, risk=RiskService())
+    eng.run(_deal(), plan=plan)
+    assert eng.status == "failed" and "does not match" in eng.error
+    assert ex.positions == {}
+
+
+def test_engine_recompiles_a_stale_plan(monkeypatch):
+    monkeypatch.setattr(engine_mod, "add_event", lambda ev: None)
+    ex = SimulatedExchange(mid=100.0, tick=0.01, level_size=100.0)
+    stale = planner.compile_deal(_deal(), ex, 90.0)
+    eng = Engine(ex, risk=RiskService(), sleep=lambda s: time.sleep(0.01))
+    t = threading.Thread(target=eng.run, args=(_deal(), stale))
+    t.start()
+    try:
+        end = time.monotonic() + 5
+        while not eng.tp_ids and time.monotonic() < end:
+            time.sleep(0.01)
+        # 1000 USDT at the live 100, not at the plan's 90
+        assert eng._own_qty == pytest.approx(10.0)
+    finally:
+        eng.stop()
+        t.join(5)
@@ -0,0 +1,64 @@
+import pytest
+from ccxt.base import errors as ce
+
+from app.bench import FakeClock, check_regression, offline_engine
+import app.engine as engine_mod
+from app.exchanges.recording import RecordingExchange, ReplayExchange, ReplayExhausted
+from app.exchanges.simulated import SimulatedExchange
+
+S = "BTC/USDT:USDT"
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    path = tmp_path / "rec.ndjson"
+    sim = SimulatedExchange(mid=100.0, tick=0.01)
+    rec = RecordingExchange(sim, str(path))
+    rec.market(S)
+    out = {
+        "last": rec.last_price(S),
+        "a": rec.place_limit_order(S, "buy", 0.5, 99.0, client_id="cid-a"),
+        "b": rec.place_limit_order(S, "buy", 0.5, 98.0, client_id="cid-b"),
+    }
+    with pytest.raises(ce.OrderNotFound):
+        rec.fetch_order(S, "missing")
+    rec.close()
+    return str(path), out
+
+
+def test_replay_matches_full_arguments(recorded):
+    path, out = recorded
+    rep = ReplayExchange(path)
+    # the second order is asked for first: served its own response, not the first recorded one
+    assert rep.place_limit_order(S, "buy", 0.5, 98.0, client_id="cid-b")["id"] == out["b"]["id"]
+    assert rep.place_limit_order(S, "buy", 0.5, 99.0, client_id="cid-a")["id"] == out["a"]["id"]
+    with pytest.raises(ReplayExhausted):
+        rep.place_limit_order(S, "buy", 0.6, 99.0, client_id="cid-a")
+    assert rep.calls["place_limit_order"] == 3
+
+
+def test_replay_errors_markets_and_repeatable_reads(recorded):
+    path, out = recorded
+    rep = ReplayExchange(path)
+    with pytest.raises(ce.OrderNotFound):
+        rep.fetch_order(S, "missing")
+    assert rep.market(S)["symbol"] == S
+    assert rep.amount_step(S) == 0.001
+    # polling reads repeat the last answer once the log runs dry
+    assert rep.last_price(S) == out["last"] == rep.last_price(S)
+
+
+def test_offline_engine_restores_module_state():
+    saved = engine_mod.time, engine_mod.add_event
+    with pytest.raises(RuntimeError):
+        with offline_engine(FakeClock(), lambda ev: None):
+            assert isinstance(engine_mod.time, FakeClock)
+            raise RuntimeError("deal failed")
+    assert (engine_mod.time, engine_mod.add_event) == saved
+
+
+def test_check_regression():
+    base = {"wall_ms": 10.0, "peak_kib": 40.0, "calls": {"last_price": 3}}
+    assert check_regression({"wall_ms": 19.0, "peak_kib": 40.0, "calls": {"last_price": 3}}, base, 1.0) == []
+    problems = check_regression({"wall_ms": 21.0, "peak_kib": None, "calls": {"last_price": 4}}, base, 1.0)
+    assert len(problems) == 2
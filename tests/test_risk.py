@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from sqlmodel import create_engine
+
+from app.models import RiskLimits
+from app.risk import MemoryExposureStore, RiskLimitExceeded, RiskService, SqlExposureStore
+
+LIMITS = RiskLimits(max_gross_notional=1000)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryExposureStore()
+    return SqlExposureStore(create_engine(f"sqlite:///{tmp_path / 'risk.db'}"), ttl=30)
+
+
+def test_reserve_resize_release(store):
+    rs = RiskService(LIMITS, store)
+    rs.reserve("a", "acc", "BTC", "long", 600, 2)
+    with pytest.raises(RiskLimitExceeded):
+        rs.reserve("b", "acc", "ETH", "long", 500, 2)
+    rs.reserve("a", "acc", "BTC", "long", 500, 2)       # shrinking frees room
+    rs.reserve("b", "acc", "ETH", "long", 500, 2)
+    rs.sync_position("p", "acc", "BTC", "long", 1, 300, 2)   # positions are never rejected
+    assert rs.exposure("acc")["gross"] == 1300.0
+    assert rs.exposure("acc")["margin"] == 650.0
+    for ref in ("a", "b", "p"):
+        rs.release(ref)
+    assert store.get("acc", "gross") == 0.0
+
+
+def test_reservations_of_a_dead_process_expire(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'risk.db'}")
+    dead = SqlExposureStore(engine, ttl=0.2, owner="dead")
+    dead._start_heartbeat = lambda: None                # the process crashed: no heartbeat
+    RiskService(LIMITS, dead).reserve("x", "acc", "BTC", "long", 900, 1)
+
+    alive = RiskService(LIMITS, SqlExposureStore(engine, ttl=30))
+    with pytest.raises(RiskLimitExceeded):
+        alive.reserve("y", "acc", "BTC", "long", 500, 1)
+    time.sleep(0.3)
+    alive.reserve("y", "acc", "BTC", "long", 500, 1)
+    assert alive.store.get("acc", "gross") == 500.0
+    alive.store.close()
+    assert alive.store.get("acc", "gross") == 0.0
@@ -0,0 +1,36 @@
+import pytest
+
+from app.exchanges.router import MultiVenueExchange
+from app.exchanges.simulated import SimulatedExchange
+
+S = "BTC/USDT:USDT"
+
+
+def _router() -> MultiVenueExchange:
+    # "a" quotes the tighter book but charges a taker fee; "b" is wider and free
+    return MultiVenueExchange({
+        "a": SimulatedExchange(mid=100.0, tick=0.01, taker=0.001),
+        "b": SimulatedExchange(mid=100.0, tick=0.025, taker=0.0),
+    })
+
+
+def test_price_tick_is_valid_on_every_venue():
+    r = _router()
+    assert r.price_step(S) == pytest.approx(0.05)
+    for ex in r.venues.values():
+        ratio = r.price_step(S) / ex.price_step(S)
+        assert ratio == pytest.approx(round(ratio))
+
+
+def test_order_book_keeps_raw_prices_and_routing_ranks_by_fee():
+    r = _router()
+    book = r.fetch_order_book(S, 4)
+    assert book["asks"][0] == [100.005, 1.0]             # venue a's own ask, no fee added
+    assert book["bids"][0] == [99.995, 1.0]
+    assert [p for p, _ in book["asks"]] == sorted(p for p, _ in book["asks"])
+    assert [p for p, _ in book["bids"]] == sorted((p for p, _ in book["bids"]), reverse=True)
+    # after fees venue b's wider ask is the cheaper one to take
+    eff, _, venue = r.quote(S, "buy")[0]
+    assert venue == "b" and eff == pytest.approx(100.0125)
+    order = r.place_market_order(S, "buy", 0.5)
+    assert order["venue"] == "b"
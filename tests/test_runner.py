@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import app.engine as engine_mod
+from app.engine import Engine
+from app.exchanges.simulated import SimulatedExchange
+from app.models import DealConfig
+from app.risk import RiskService
+from app.runner import DealExists, DealRunner
+
+
+def _cfg(deal_id: str, **extra) -> DealConfig:
+    return DealConfig(
+        symbol="BTC/USDT:USDT", side="long", market_order_amount=100, stop_loss_percent=5,
+        trailing_sl_offset_percent=3, limit_orders_amount=100, leverage=5, move_sl_to_breakeven=False,
+        tp_orders=[{"price_percent": 10, "quantity_percent": 100}],
+        limit_orders={"range_percent": 5, "orders_count": 2, "engine_deal_duration_minutes": 60},
+        deal_id=deal_id, **extra,
+    )
+
+
+def _wait(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(engine_mod, "add_event", lambda ev: None)
+    ex = SimulatedExchange(mid=100.0, tick=0.01, level_size=100.0)
+    rs = RiskService()
+    r = DealRunner(workers=2, engine_factory=lambda: Engine(ex, risk=rs))
+    yield r
+    r.shutdown(timeout=5)
+
+
+def _status(r, deal_id):
+    return r.get(deal_id).status
+
+
+def test_concurrent_starts_share_the_pool(runner):
+    for i in range(3):
+        runner.start(_cfg(f"d{i}"))
+    # two workers: the third deal waits in the queue until one finishes
+    _wait(lambda: [_status(runner, f"d{i}") for i in range(3)] == ["running", "running", "queued"])
+    with pytest.raises(DealExists):
+        runner.start(_cfg("d0"))
+    runner.stop("d0", timeout=5)
+    _wait(lambda: _status(runner, "d2") == "running")
+    assert {d["deal_id"] for d in runner.list(active_only=True)} == {"d1", "d2"}
+
+
+def test_stop_winds_the_deal_down_and_frees_the_id(runner):
+    eng = runner.start(_cfg("s"))
+    _wait(lambda: eng.tp_ids)
+    state = runner.stop("s", timeout=5)
+    assert state["status"] == "done"
+    assert runner.stop("missing") is None
+    # a finished deal's id can be started again
+    assert runner.start(_cfg("s")) is not eng
+
+
+def test_interrupted_twap_entry_stops_slicing(runner):
+    eng = runner.start(_cfg("t", execution={"algo": "twap", "slices": 5, "interval_seconds": 30}))
+    _wait(lambda: eng.status == "running")
+    runner.stop("t", timeout=5)
+    assert eng.status == "done"
+
+
+def test_engine_errors_surface_in_state(monkeypatch):
+    monkeypatch.setattr(engine_mod, "add_event", lambda ev: None)
+
+    class Broken(SimulatedExchange):
+        def last_price(self, symbol):
+            raise RuntimeError("feed down")
+
+    r = DealRunner(workers=1, engine_factory=lambda: Engine(Broken(), risk=RiskService()))
+    try:
+        eng = r.start(_cfg("e"))
+        _wait(lambda: eng.finished_at is not None)
+        assert eng.state()["status"] == "failed" and "feed down" in eng.state()["error"]
+        assert r.list(active_only=True) == []
+    finally:
+        r.shutdown(timeout=5)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import app.engine as engine_mod
+from app.engine import Engine
+from app.exchanges.metered import MeteredExchange
+from app.exchanges.simulated import SimulatedExchange
+from app.models import DealConfig, MonitorConfig
+from app.risk import RiskService
+from app.scheduler import TickScheduler
+
+S = "BTC/USDT:USDT"
+
+
+def _near_stop(cfg: MonitorConfig, ticks: int, calls: int = 2):
+    """Tick times and sleeps of a loop polling right next to its stop."""
+    sched, t, out = TickScheduler(cfg), 0.0, []
+    for _ in range(ticks):
+        sched.observe(t, 100.0)
+        sched.var_rate = 1e-4
+        wait = sched.next_interval(100.0, [100.01], calls)
+        out.append((t, wait))
+        t += wait
+    return out
+
+
+def test_stop_proximity_borrows_unspent_budget():
+    cfg = MonitorConfig(min_interval_seconds=0.5, rest_budget_per_minute=20)
+    ticks = _near_stop(cfg, 40)
+    # the old budget floor was 2 calls * 60 / 20 = 6 s; banked calls allow 0.5 s polls
+    assert [w for _, w in ticks[:9]] == [0.5] * 9
+    assert ticks[9][1] > 6.0
+    # ... but never more than the budget in any 60 s window
+    starts = [t for t, _ in ticks]
+    for t0 in starts:
+        assert sum(2 for t in starts if t0 <= t < t0 + 60) <= 20
+
+
+def test_ticks_are_charged_the_calls_they_made():
+    cfg = MonitorConfig(min_interval_seconds=0.5, rest_budget_per_minute=20)
+    sched = TickScheduler(cfg)
+    sched.observe(0.0, 100.0)
+    sched.var_rate = 1e-4
+    assert sched.next_interval(100.0, [100.01], calls=1) == 0.5
+    sched.observe(0.5, 100.0)
+    sched.var_rate = 1e-4
+    # a refresh + grid follow tick: the next one would overrun the budget
+    assert sched.next_interval(100.0, [100.01], calls=15) == 60.0
+
+
+def test_metered_exchange_counts_rest_calls_only():
+    ex = MeteredExchange(SimulatedExchange(mid=100.0, tick=0.01))
+    ex.last_price(S)
+    ex.fetch_positions(S)
+    ex.price_step(S)
+    ex.round_amount_down(S, 1.2345)
+    assert ex.calls == 2
+    assert ex.venue == ex.inner.venue
+
+
+def test_engine_reports_calls_per_tick(monkeypatch):
+    monkeypatch.setattr(engine_mod, "add_event", lambda ev: None)
+    charged = []
+    next_interval = TickScheduler.next_interval
+
+    def spy(self, price, levels, calls=1):
+        charged.append(calls)
+        return next_interval(self, price, levels, calls)
+
+    monkeypatch.setattr(TickScheduler, "next_interval", spy)
+    cfg = DealConfig(
+        symbol=S, side="long", market_order_amount=1000, stop_loss_percent=5, trailing_sl_offset_percent=3,
+        limit_orders_amount=500, leverage=5, move_sl_to_breakeven=False,
+        tp_orders=[{"price_percent": 10, "quantity_percent": 100}],
+        limit_orders={"range_percent": 5, "orders_count": 5, "engine_deal_duration_minutes": 60},
+    )
+    eng = Engine(SimulatedExchange(mid=100.0, tick=0.01, level_size=100.0), risk=RiskService(),
+                 sleep=lambda s: time.sleep(0.01))
+    th = threading.Thread(target=eng.run, args=(cfg,))
+    th.start()
+    try:
+        end = time.monotonic() + 5
+        while len(charged) < 3:
+            assert time.monotonic() < end, "timed out"
+            time.sleep(0.01)
+    finally:
+        eng.stop()
+        th.join(5)
+    # the first tick re-reads orders and positions on top of last_price
+    assert charged[0] == 3
+    assert 1 in charged[1:]
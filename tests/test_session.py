@@ -0,0 +1,58 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from app.exchanges.session import DnsCache, create_session
+
+
+class _Ok(BaseHTTPRequestHandler):
+    # HTTP/1.0: the server closes every connection, so each request connects anew
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = HTTPServer(("127.0.0.1", 0), _Ok)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+
+
+def test_dns_cache_is_per_session(server):
+    lookups = []
+
+    def resolve(host, port, *args):
+        lookups.append(host)
+        return socket.getaddrinfo("127.0.0.1", port, *args)
+
+    original = socket.getaddrinfo
+    cached = create_session(dns=DnsCache(60, resolve=resolve))
+    for _ in range(3):
+        assert cached.get(f"http://exchange.test:{server}/").text == "ok"
+    # three connections, one lookup; the process-wide resolver is untouched
+    assert lookups == ["exchange.test"]
+    assert socket.getaddrinfo is original
+
+    plain = create_session(dns=DnsCache(0, resolve=resolve))
+    plain.get(f"http://exchange.test:{server}/")
+    plain.get(f"http://exchange.test:{server}/")
+    assert lookups == ["exchange.test"] * 3       # ttl 0: resolved per connection
+
+
+def test_failed_connect_forgets_the_address():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]          # nothing listens here once closed
+    dns = DnsCache(60, resolve=lambda host, port, *a: socket.getaddrinfo("127.0.0.1", port, *a))
+    with pytest.raises(requests.ConnectionError):
+        create_session(dns=dns).get(f"http://exchange.test:{port}/", timeout=2)
+    assert dns._cache == {}                # the next connect resolves again
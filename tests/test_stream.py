@@ -0,0 +1,65 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import stream
+from app.db import TradeEvent
+from app.event_bus import OVERFLOW, SubscriberOverflow
+
+
+@pytest.fixture
+def events_db(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    SQLModel.metadata.create_all(eng, tables=[TradeEvent.__table__])
+    with Session(eng) as s:
+        for i in range(10):
+            s.add(TradeEvent(ts=datetime(2024, 1, 1, 0, i, tzinfo=timezone.utc), type="entry",
+                             symbol="BTC/USDT:USDT" if i % 2 else "ETH/USDT:USDT", price=float(i)))
+        s.commit()
+    return eng
+
+
+def test_snapshot_then_resume_from_seq(events_db):
+    events, seq = stream.snapshot(events_db, "BTC/USDT:USDT", 3)
+    assert seq == 10
+    assert [e["id"] for e in events] == [6, 8, 10]
+    assert isinstance(events[0]["ts"], str)
+
+    # a client that saw seq=4 gets the rest in pages, filtered by symbol, seq moving past skipped ids
+    events, upto = stream.events_since(events_db, 4, "BTC/USDT:USDT", 3)
+    assert ([e["id"] for e in events], upto) == ([6], 7)
+    events, upto = stream.events_since(events_db, upto, "BTC/USDT:USDT", 3)
+    assert ([e["id"] for e in events], upto) == ([8, 10], 10)
+    assert stream.events_since(events_db, upto, None, 3) == ([], 10)
+
+
+def test_batch_collects_one_window_and_stops_at_overflow():
+    async def run():
+        q = asyncio.Queue()
+        for i in range(5):
+            q.put_nowait({"id": i})
+        assert [e["id"] for e in await stream.next_batch(q, 0.05, 3)] == [0, 1, 2]
+        assert [e["id"] for e in await stream.next_batch(q, 0.05, 10)] == [3, 4]
+        q.put_nowait({"id": 5})
+        q.put_nowait(OVERFLOW)
+        with pytest.raises(SubscriberOverflow):
+            await stream.next_batch(q, 0.05, 10)
+
+    asyncio.run(run())
+
+
+def test_frames_encode_as_json_or_msgpack():
+    frame = {"type": "batch", "seq": 3, "events": [{"id": 3, "price": 1.5}]}
+    assert json.loads(stream.encode(frame, "json")) == frame
+    msgpack = pytest.importorskip("msgpack")
+    assert msgpack.unpackb(stream.encode(frame, "msgpack")) == frame
+
+
+def test_sent_ids_forget_oldest():
+    sent = stream.SentIds(size=2)
+    for i in (1, 2, 2, 3):
+        sent.add(i)
+    assert 1 not in sent and 2 in sent and 3 in sent
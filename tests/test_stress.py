@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.models import DealConfig
+from app.stress import gbm, simulate
+
+
+def _cfg(side="long") -> DealConfig:
+    return DealConfig(
+        symbol="BTC/USDT:USDT", side=side, market_order_amount=1000, stop_loss_percent=5,
+        trailing_sl_offset_percent=3, limit_orders_amount=500, leverage=5, move_sl_to_breakeven=False,
+        tp_orders=[{"price_percent": 10, "quantity_percent": 100}],
+        limit_orders={"range_percent": 5, "orders_count": 5, "engine_deal_duration_minutes": 60},
+    )
+
+
+def _drift(r):
+    return lambda rng, n: np.full(n, r)
+
+
+def test_straight_paths_end_in_tp_sl_or_timeout():
+    up = simulate(_cfg(), _drift(0.01), n_paths=4)
+    assert up["p_tp_all"] == 1.0 and up["grid_fills"]["max"] == 0
+    assert up["minutes_in_trade"]["mean"] == 10          # +10% after ln(1.1)/0.01 steps
+
+    down = simulate(_cfg(), _drift(-0.01), n_paths=4)
+    # every grid leg down to -5% fills before the stop at -5% closes the position
+    assert down["p_sl"] == 1.0 and down["grid_fills"]["max"] == 5
+    assert down["peak_margin_usdt"]["max"] == pytest.approx(1500 / 5)
+    assert down["pnl_usdt"]["p95"] < 0
+
+    flat = simulate(_cfg(), _drift(0.0), n_paths=4)
+    assert flat["p_timeout"] == 1.0 and flat["minutes_in_trade"]["mean"] == 60
+    assert flat["pnl_usdt"]["mean"] == pytest.approx(-1000 * 0.00055)   # entry taker fee only
+
+
+def test_short_side_is_mirrored():
+    assert simulate(_cfg("short"), _drift(0.01), n_paths=2)["p_sl"] == 1.0
+    assert simulate(_cfg("short"), _drift(-0.01), n_paths=2)["p_tp_all"] == 1.0
+
+
+def test_seeded_runs_are_reproducible():
+    a = simulate(_cfg(), gbm(0.005), n_paths=2000, seed=7)
+    b = simulate(_cfg(), gbm(0.005), n_paths=2000, seed=7)
+    assert a == b
+    assert a["p_sl"] + a["p_tp_all"] + a["p_timeout"] == pytest.approx(1.0)
+    assert sum(a["grid_fill_dist"]) == 2000
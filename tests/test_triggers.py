@@ -0,0 +1,106 @@
+import random
+
+from app.triggers import Trigger, TriggerIndex, TriggerRegistry
+
+
+class _Naive:
+    """Reference: every stop re-evaluated on every price."""
+
+    def __init__(self, side, stop, best, offset):
+        self.side, self.stop, self.best, self.offset = side, stop, best, offset
+
+    def on_price(self, x: float) -> bool:
+        long = self.side == "long"
+        if self.offset is not None and (x > self.best if long else x < self.best):
+            self.best = x
+            self.stop = x * (1 - self.offset) if long else x * (1 + self.offset)
+        return x <= self.stop if long else x >= self.stop
+
+
+def test_fixed_stops_fire_on_cross():
+    idx = TriggerIndex("BTC")
+    sl_long = idx.add(Trigger("l", "long", stop=95.0, best=100.0))
+    sl_short = idx.add(Trigger("s", "short", stop=105.0, best=100.0))
+    assert idx.on_price(96.0) == []
+    assert idx.on_price(95.0) == [sl_long]
+    assert sl_long.fired and sl_long.fired_price == 95.0
+    assert idx.on_price(106.0) == [sl_short]
+    assert len(idx) == 0
+
+
+def test_trailing_follows_new_best_only():
+    idx = TriggerIndex("BTC")
+    t = idx.add(Trigger("t", "long", stop=90.0, best=100.0, offset=0.05))
+    idx.on_price(99.0)
+    assert t.stop == 90.0                       # pinned until a new best
+    idx.on_price(110.0)
+    assert t.stop == 110.0 * 0.95
+    idx.on_price(105.0)
+    assert t.stop == 110.0 * 0.95               # never loosens
+    assert idx.on_price(104.0) == [t]
+
+
+def test_breakeven_and_offset_changes():
+    idx = TriggerIndex("BTC")
+    t = idx.add(Trigger("t", "long", stop=90.0, best=100.0, offset=0.10))
+    idx.on_price(120.0)
+    idx.set_offset(t, 0.05)                     # tighter: moves at once
+    assert t.stop == 120.0 * 0.95
+    idx.set_offset(t, 0.20)                     # wider: stays pinned
+    assert t.stop == 120.0 * 0.95
+    idx.set_stop(t, 116.0)
+    assert t.stop == 116.0
+    assert idx.on_price(116.5) == []
+    assert idx.on_price(116.0) == [t]
+
+
+def test_matches_naive_model_on_random_paths():
+    rnd = random.Random(7)
+    for _ in range(20):
+        idx, naive = TriggerIndex("BTC"), {}
+        for i in range(60):
+            side = rnd.choice(("long", "short"))
+            offset = rnd.choice((None, 0.01, 0.02, 0.05))
+            best = 100.0
+            stop = best * (0.9 if side == "long" else 1.1)
+            idx.add(Trigger(str(i), side, stop=stop, best=best, offset=offset))
+            naive[str(i)] = _Naive(side, stop, best, offset)
+        price = 100.0
+        for _ in range(300):
+            price = round(price * (1 + rnd.uniform(-0.01, 0.01)), 2)
+            fired = {t.id for t in idx.on_price(price)}
+            expected = {k for k, n in naive.items() if n.on_price(price)}
+            for k in expected:
+                del naive[k]
+            assert fired == expected
+
+
+def test_mixed_trailing_offsets_share_one_bucket():
+    idx = TriggerIndex("BTC")
+    longs = [idx.add(Trigger(f"l{i}", "long", stop=80.0, best=100.0, offset=0.01 * (i + 1))) for i in range(20)]
+    shorts = [idx.add(Trigger(f"s{i}", "short", stop=120.0, best=100.0, offset=0.01 * (i + 1))) for i in range(20)]
+    idx.on_price(110.0)
+    # every distinct offset trails from one best, and a price walks only the buckets it crosses
+    assert len(idx._long.trail) == len(idx._long.tops) == 1
+    assert [t.stop for t in longs[:3]] == [110.0 * 0.99, 110.0 * 0.98, 110.0 * 0.97]
+    assert idx.on_price(106.5) == longs[:3]
+    assert all(t.stop == 110.0 * (1 - t.offset) for t in longs[3:])
+    assert {t.id for t in idx.on_price(90.0)} == {t.id for t in longs if 110.0 * (1 - t.offset) >= 90.0} - {"l0", "l1", "l2"}
+    assert all(t.stop == 90.0 * (1 + t.offset) for t in shorts)
+    assert idx.on_price(92.5) == shorts[:2]
+    assert len(idx._short.tops) == 1 and len(idx) == 20   # l18, l19 and s2..s19
+
+def test_registry_keys_books_by_venue_and_account():
+    reg = TriggerRegistry()
+    bybit = reg.book("bybit", "Bybit/Testnet", "BTC/USDT:USDT", lambda p: round(p))
+    gate = reg.book("gateio", "Gate/Testnet", "BTC/USDT:USDT", lambda p: round(p, 1))
+    assert bybit is not gate
+    assert reg.book("bybit", "Bybit/Testnet", "BTC/USDT:USDT") is bybit
+    t_bybit = bybit.add(Trigger("a", "long", stop=95.0, best=100.0, offset=0.0333))
+    t_gate = gate.add(Trigger("a", "long", stop=95.0, best=100.0, offset=0.0333))
+    reg.on_price("bybit", "Bybit/Testnet", "BTC/USDT:USDT", 101.0)
+    assert t_bybit.stop == 98.0 and t_gate.stop == 95.0   # each venue trails on its own prices and ticks
+    reg.on_price("gateio", "Gate/Testnet", "BTC/USDT:USDT", 101.0)
+    assert t_gate.stop == 97.6
+    assert reg.on_price("gateio", "Gate/Testnet", "BTC/USDT:USDT", 97.6) == [t_gate]
+    assert len(bybit) == 1